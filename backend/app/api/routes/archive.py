@@ -0,0 +1,79 @@
+# backend/app/api/routes/archive.py
+"""Read-only views of archived academic years (see app/utils/archive.py)."""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import admin_required
+from app.schemas.exam_schema import AdminCombinedMarksOut, ExamMarksOut, ExamOut
+from app.utils.archive import (
+    Archive,
+    ArchiveError,
+    archived_grid,
+    archived_merged_grid,
+    archived_merged_sheet,
+    archived_sheet,
+    exam_out,
+    list_archives,
+    open_archive,
+)
+from app.utils.results import sheet_csv
+
+router = APIRouter(dependencies=[Depends(admin_required)])
+
+
+def _archive(academic_year: str) -> Archive:
+    try:
+        return open_archive(academic_year)
+    except ArchiveError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+def _exam(archive: Archive, exam_id: int) -> dict:
+    try:
+        return archive.exam(exam_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Exam not found in archive")
+
+
+@router.get("")
+def list_archived_years():
+    return list_archives()
+
+
+@router.get("/{academic_year}/exams", response_model=List[ExamOut])
+def list_archived_exams(academic_year: str):
+    archive = _archive(academic_year)
+    return [exam_out(meta) for meta in archive.exams.values()]
+
+
+@router.get("/{academic_year}/exams/{exam_id}/marks", response_model=ExamMarksOut)
+def get_archived_marks(academic_year: str, exam_id: int):
+    archive = _archive(academic_year)
+    meta = _exam(archive, exam_id)
+    return {"exam": exam_out(meta), **archived_grid(archive, exam_id)}
+
+
+@router.get("/{academic_year}/exams/{exam_id}/combined-marks", response_model=AdminCombinedMarksOut)
+def get_archived_combined_marks(academic_year: str, exam_id: int):
+    archive = _archive(academic_year)
+    meta = _exam(archive, exam_id)
+    return {"exam": exam_out(meta), **archived_merged_grid(archive, archive.siblings(exam_id))}
+
+
+@router.get("/{academic_year}/exams/{exam_id}/export")
+def export_archived_exam(
+    academic_year: str,
+    exam_id: int,
+    merged: bool = Query(True, description="whole logical exam, as the admin export does"),
+):
+    archive = _archive(academic_year)
+    _exam(archive, exam_id)
+    if merged:
+        sheet = archived_merged_sheet(archive, archive.siblings(exam_id))
+    else:
+        sheet = archived_sheet(archive, exam_id)
+    response = StreamingResponse(iter([sheet_csv(sheet).encode("utf-8")]), media_type="text/csv")
+    response.headers["Content-Disposition"] = f'attachment; filename="{sheet["filename"]}"'
+    return response
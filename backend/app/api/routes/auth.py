@@ -1,19 +1,21 @@
 import hashlib, secrets
-from fastapi import APIRouter, Body, HTTPException, Depends
+from fastapi import APIRouter, Body, HTTPException, Depends, Request
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
-from app.core.security import ALGORITHM, SECRET_KEY, create_access_token,hash_password,get_current_user,verify_password
+from app.core.security import create_access_token,decode_token,hash_password,get_current_user,get_current_db_user,token_claims,verify_password
+from app.core.token_epochs import revoke_user_tokens
 from app.api.dependencies import admin_required
-from typing import List
+from typing import List, Tuple
 from app.models.user import PasswordReset
 from datetime import datetime, timedelta, timezone  
 from app.utils.emailer import send_email
 from app.core.config import APP_BASE_URL
 from app.schemas.user_schema import UserOut
-from jose import jwt, JWTError
-from app.core.security import create_refresh_token
+from jose import JWTError
+from app.core.sessions import exchange_legacy_token, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+from app.core import rate_limit
 
 router = APIRouter()
 
@@ -21,7 +23,11 @@ class ForgotPasswordIn(BaseModel):
     email: str
 
 @router.post("/forgot-password")
-def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
+def forgot_password(payload: ForgotPasswordIn, request: Request, db: Session = Depends(get_db)):
+    rate_limit.enforce(
+        (rate_limit.forgot_by_ip, rate_limit.client_ip(request)),
+        (rate_limit.forgot_by_email, payload.email.strip().lower()),
+    )
     user = db.query(User).filter(User.email == payload.email).first()
 
     # Security: do not reveal whether user exists
@@ -181,7 +187,8 @@ def reset_password(
         PasswordReset.user_id == user.id
     ).delete()
 
-    db.commit()
+    # 8. Sign out every existing session
+    revoke_user_tokens(db, user)
 
     return {"detail": "Password reset successful"}
 
@@ -220,8 +227,7 @@ def freeze_teacher(teacher_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="Teacher not found")
     user.is_frozen = True
-    db.add(user)
-    db.commit()
+    revoke_user_tokens(db, user)
     return {"detail": "Teacher frozen"}
 
 # Unfreeze
@@ -258,8 +264,7 @@ def admin_reset_password(
 
     # Hash and set
     user.hashed_password = hash_password(new_password)
-    db.add(user)
-    db.commit()
+    revoke_user_tokens(db, user)
     # Do not return hashed_password in response
     return {"status": "ok", "message": "Password updated"}
 
@@ -289,8 +294,8 @@ def signup(payload: SignupIn, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
 
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    access_token = create_access_token(token_claims(user))
+    refresh_token = issue_refresh_token(db, user)
 
     return {
         "access_token": access_token,
@@ -303,7 +308,13 @@ class LoginIn(BaseModel):
     password: str
 
 @router.post("/login")
-def login(payload: LoginIn, db: Session = Depends(get_db)):
+def login(payload: LoginIn, request: Request, db: Session = Depends(get_db)):
+    # before the user query and Argon2, so floods cost next to nothing
+    email_key = payload.email.strip().lower()
+    rate_limit.enforce(
+        (rate_limit.login_by_ip, rate_limit.client_ip(request)),
+        (rate_limit.login_by_email, email_key),
+    )
 
     user = db.query(User).filter(User.email == payload.email).first()
 
@@ -319,8 +330,11 @@ def login(payload: LoginIn, db: Session = Depends(get_db)):
     if not verify_password(payload.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    # a successful login clears earlier typos for this account
+    rate_limit.login_by_email.reset(email_key)
+
+    access_token = create_access_token(token_claims(user))
+    refresh_token = issue_refresh_token(db, user)
 
     return {
         "access_token": access_token,
@@ -331,11 +345,12 @@ def login(payload: LoginIn, db: Session = Depends(get_db)):
 class RefreshIn(BaseModel):
     refresh_token: str
 
-@router.post("/refresh")
-def refresh_token(payload: RefreshIn, db: Session = Depends(get_db)):
-
+def _legacy_refresh_user(token: str, db: Session) -> Tuple[User, datetime]:
+    # JWT refresh tokens issued before refresh sessions existed are accepted
+    # once and exchanged for a session, so clients are not all logged out;
+    # returns the user and the token's expiry
     try:
-        decoded = jwt.decode(payload.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        decoded = decode_token(token)
 
         if decoded.get("type") != "refresh":
             raise HTTPException(status_code=401, detail="Invalid refresh token")
@@ -353,11 +368,57 @@ def refresh_token(payload: RefreshIn, db: Session = Depends(get_db)):
         if not user:
             raise HTTPException(status_code=401, detail="User no longer exists")
 
-        new_access = create_access_token({"sub": str(user.id)})
-        return {"access_token": new_access}
+        epoch = decoded.get("ep")
+        if epoch is None:
+            # issued before token epochs existed: good only while the account
+            # has never been revoked (freezing revokes too) and is not frozen
+            if user.is_frozen or (user.token_epoch or 0) != 0:
+                raise HTTPException(status_code=401, detail="Refresh token revoked")
+        elif epoch != (user.token_epoch or 0):
+            raise HTTPException(status_code=401, detail="Refresh token revoked")
+        return user, datetime.fromtimestamp(decoded["exp"], timezone.utc).replace(tzinfo=None)
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Refresh token expired")
+
+
+@router.post("/refresh")
+def refresh_token(payload: RefreshIn, db: Session = Depends(get_db)):
+    if payload.refresh_token.count(".") == 2:
+        user, expires_at = _legacy_refresh_user(payload.refresh_token, db)
+        user, new_refresh = exchange_legacy_token(db, payload.refresh_token, user, expires_at)
+    else:
+        # rotation: the presented token is spent, the client stores the new one
+        user, new_refresh = rotate_refresh_token(db, payload.refresh_token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Refresh token expired")
+
+    return {
+        "access_token": create_access_token(token_claims(user)),
+        "refresh_token": new_refresh,
+    }
+
+
+@router.post("/logout")
+def logout(payload: RefreshIn, db: Session = Depends(get_db)):
+    revoke_refresh_token(db, payload.refresh_token)
+    return {"detail": "Logged out"}
+
+
+# Sign out every session of the current user (access tokens included)
+@router.post("/sessions/revoke-all")
+def revoke_my_sessions(current_user: User = Depends(get_current_db_user), db: Session = Depends(get_db)):
+    revoke_user_tokens(db, current_user)
+    return {"detail": "All sessions signed out"}
+
+
+@router.post("/admin/users/{user_id}/revoke-sessions", dependencies=[Depends(admin_required)])
+def revoke_user_sessions_admin(user_id: int, db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    revoke_user_tokens(db, user)
+    return {"detail": "All sessions signed out"}
     
 
 # POST /auth/change-password
@@ -366,7 +427,7 @@ class ChangePasswordIn(BaseModel):
     new_password: str
 
 @router.post("/change-password")
-def change_password(payload: ChangePasswordIn, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def change_password(payload: ChangePasswordIn, current_user: User = Depends(get_current_db_user), db: Session = Depends(get_db)):
     if not verify_password(payload.current_password, current_user.hashed_password):
         raise HTTPException(400, "Current password is incorrect")
     # basic password policy (min length)
@@ -375,8 +436,13 @@ def change_password(payload: ChangePasswordIn, current_user: User = Depends(get_
 
     # optionally enforce password policy here
     current_user.hashed_password = hash_password(payload.new_password)
-    db.add(current_user); db.commit()
-    return {"detail":"Password updated successfully"}
+    # every existing token is revoked; the caller continues with the new pair
+    revoke_user_tokens(db, current_user)
+    return {
+        "detail": "Password updated successfully",
+        "access_token": create_access_token(token_claims(current_user)),
+        "refresh_token": issue_refresh_token(db, current_user),
+    }
 
 
 @router.post("/admin-create-teacher", dependencies=[Depends(admin_required)])
@@ -446,7 +512,7 @@ def deactivate_user(
     user.is_deleted = True
     user.is_frozen = True  # force read-only forever
 
-    db.commit()
+    revoke_user_tokens(db, user)
 
     return {
         "status": "ok",
@@ -483,5 +549,5 @@ def delete_admin_user(
 
     # Perform Soft Delete
     user.is_deleted = True
-    db.commit()
+    revoke_user_tokens(db, user)
     return {"detail": "Admin account deactivated successfully"}
\ No newline at end of file
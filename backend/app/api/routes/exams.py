@@ -1,15 +1,20 @@
 # backend/app/api/routes/exams.py
-from sqlalchemy import delete, select
-from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, func, or_, select, update
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy import UniqueConstraint
 from app.schemas.exam_schema import AdminCombinedMarksOut, ExamCreate, ExamMarksOut, ExamOut,ExamSectionCreate, ExamSectionOut, ExamUpdate,MarksSaveRequest
-from app.models.exam import Exam, Question, Student, Mark,ExamSection             
+from app.schemas.exam_schema import ExamProgressOut, MarksBatchGetOut, MarksBatchGetRequest, SectionProgressOut
+from app.schemas.exam_schema import QuestionRule, decode_question_rules, encode_question_rules
+from app.models.exam import Exam, Question, Student, Mark,ExamSection,ResultSnapshot,ExamProgress
 from sqlalchemy.orm import Session
-from app.database import get_db,engine
+from app.database import SessionLocal, get_db,get_read_db,engine
 from fastapi.responses import StreamingResponse
-import csv,io,json,logging
-from sqlalchemy.exc import StatementError
-from typing import Any, List,Optional
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError, StatementError
+from typing import Any, Dict, List,Optional
 from app.api.dependencies import admin_required,get_current_user
 from app.core.security import get_current_user
 from app.models.user import User
@@ -18,30 +23,87 @@ from app.schemas.programme import ProgrammeCreate, ProgrammeOut
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.dependencies import admin_required
 from sqlalchemy.orm import aliased
+from app.utils.sections import (
+    SectionIndex, SectionSpan, invalidate_sections, load_section_index, section_index, section_indexes,
+)
+from app.utils.extract import csv_chunks, extract_rows, ndjson_chunks
+from app.utils.layout import exam_layout, invalidate_layouts
+from app.utils.results import exam_grids, merged_exam_grid, merged_exam_sheet, sheet_csv, single_exam_sheet
+from app.utils.snapshots import drop_snapshots, merged_snapshot, single_snapshot, snapshot_exams
+from app.utils.progress import ProgressDelta, apply_progress, refresh_progress
+from app.core.config import LIVE_EVENTS_ENABLED, LIVE_MAX_CELLS, MARKS_BATCH_STREAM_CELLS
+from app.core.metrics import registry
+from app.core.live import exam_topic, get_hub, logical_topic, sse_format
+from app.core.idempotency import remember_response, request_digest, stored_response
+from app.core.write_queue import get_write_queue
+from app.utils.partitions import drop_year_partitions, ensure_year_partitions, exams_filter, year_filter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+registry.describe("gradeflow_batch_get_streamed_total", "counter", "marks:batchGet responses streamed as NDJSON")
+
+
+def _csv_response(filename: str, text: str) -> StreamingResponse:
+    response = StreamingResponse(iter([text.encode("utf-8")]), media_type="text/csv")
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _set_lock(db: Session, exam_ids, locked_by: Optional[int]) -> Optional[datetime]:
+    """Lock (or unlock, with None) the exams in ``exam_ids`` and all their sections; returns the lock time."""
+    locked_at = datetime.now(timezone.utc).replace(tzinfo=None) if locked_by is not None else None
+    values = {"is_locked": locked_by is not None, "locked_by": locked_by}
+    db.execute(
+        update(Exam).where(Exam.id.in_(exam_ids)).values(locked_at=locked_at, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(ExamSection).where(ExamSection.exam_id.in_(exam_ids)).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return locked_at
+
+
+def _set_rules(exam: Exam, rules: Dict[str, QuestionRule]) -> None:
+    """Store validated rules on ``exam``, bumping its rules version if they changed."""
+    doc = encode_question_rules(rules)
+    if doc != encode_question_rules(decode_question_rules(exam.question_rules)):
+        exam.question_rules = doc
+        exam.rules_version = Exam.rules_version + 1
+
+
+def _publish(exams, event: dict) -> None:
+    """Push a committed change to the open marks pages of ``exams`` and of their logical exam."""
+    topics = {exam_topic(e.id) for e in exams} | {logical_topic(e.logical_key()) for e in exams}
+    get_hub().publish(sorted(topics), event)
+
+
+def _drop_group_snapshots(db: Session, exam: Exam) -> None:
+    # merged snapshots belong to the logical exam, so the whole group goes
+    drop_snapshots(db, [row.id for row in db.query(Exam.id).filter(Exam.logical_filter(exam.logical_key()))])
+
 @router.post("/sections", response_model=ExamSectionOut)
 def create_section(payload: ExamSectionCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
    
     if current_user.role not in ("teacher", "admin"):
         raise HTTPException(status_code=403, detail="Insufficient privileges")
 
-    exam = db.query(Exam).filter(Exam.id == payload.exam_id).first()
+    # the row lock serialises section creation per exam
+    exam = db.query(Exam).filter(Exam.id == payload.exam_id).with_for_update().first()
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     # Validate roll range
     if payload.roll_start > payload.roll_end:
         raise HTTPException(status_code=400, detail="roll_start must be <= roll_end")
 
-    # Overlap check: ensure no overlapping sections for the same exam (or allow overlap if you want)
-    overlap = db.query(ExamSection).filter(
-        ExamSection.exam_id == payload.exam_id,
-        ((ExamSection.roll_start <= payload.roll_end) & (ExamSection.roll_end >= payload.roll_start))
-    ).first()
+    # Overlap check: ensure no overlapping sections for the same exam (or allow overlap if you want);
+    # against the rows themselves, not the cached index, which may lag a concurrent create
+    overlap = load_section_index(db, payload.exam_id).overlapping(payload.roll_start, payload.roll_end)
     if overlap:
         # overlapping allowed across sections? we assume NO
-        raise HTTPException(status_code=400, detail=f"Roll range overlaps with existing section {overlap.section_name or overlap.id} ({overlap.roll_start}-{overlap.roll_end})")
+        raise HTTPException(status_code=400, detail=f"Roll range overlaps with existing section {overlap.name or overlap.id} ({overlap.roll_start}-{overlap.roll_end})")
 
     sec = ExamSection(
         exam_id = payload.exam_id,
@@ -51,7 +113,16 @@ def create_section(payload: ExamSectionCreate, db: Session = Depends(get_db), cu
         roll_end = payload.roll_end
     )
     db.add(sec)
+    db.flush()
+    # students already saved in the new range now count towards it
+    refresh_progress(db, exam)
+    if exam.is_locked:
+        # section names are part of the frozen sheets
+        _drop_group_snapshots(db, exam)
+    # before and after the commit: see app/utils/sections.py
+    invalidate_sections(payload.exam_id)
     db.commit()
+    invalidate_sections(payload.exam_id)
     db.refresh(sec)
     return sec
 
@@ -79,12 +150,13 @@ def finalize_exam(
         if exam.created_by != current_user.id:
             raise HTTPException(status_code=403, detail="Not allowed")
 
-        exam.is_locked = True
-        exam.locked_by = current_user.id
-
-        db.add(exam)
+        locked_at = _set_lock(db, [exam.id], current_user.id)
+        snapshot_exams(db, [exam], locked_at)
         db.commit()
-        db.refresh(exam)
+        _publish([exam], {
+            "type": "finalize", "exam_ids": [exam.id], "scope": "single",
+            "locked_by": current_user.id, "locked_by_name": current_user.name,
+        })
 
         return {
             "status": "ok",
@@ -94,21 +166,15 @@ def finalize_exam(
         }
 
     if current_user.role == "admin":
-        db.query(Exam).filter(
-            Exam.subject_code == exam.subject_code,
-            Exam.subject_name == exam.subject_name,  # IMPORTANT
-            Exam.exam_type == exam.exam_type,
-            Exam.semester == exam.semester,
-            Exam.academic_year == exam.academic_year,
-        ).update(
-            {
-                "is_locked": True,
-                "locked_by": current_user.id,
-            },
-            synchronize_session=False,
-        )
-
+        # every exam of the logical exam, with their sections, in one transaction
+        exams = db.query(Exam).filter(Exam.logical_filter(exam.logical_key())).all()
+        locked_at = _set_lock(db, [e.id for e in exams], current_user.id)
+        snapshot_exams(db, exams, locked_at, merged=True)
         db.commit()
+        _publish(exams, {
+            "type": "finalize", "exam_ids": [e.id for e in exams], "scope": "global",
+            "locked_by": current_user.id, "locked_by_name": current_user.name,
+        })
 
         return {
             "status": "ok",
@@ -132,21 +198,13 @@ def unfinalize_exam(
     if not ref_exam:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    #  GLOBAL UNLOCK: unlock all shared exams
-    db.query(Exam).filter(
-        Exam.subject_code == ref_exam.subject_code,
-        Exam.exam_type == ref_exam.exam_type,
-        Exam.semester == ref_exam.semester,
-        Exam.academic_year == ref_exam.academic_year,
-    ).update(
-        {
-            "is_locked": False,
-            "locked_by": None,
-        },
-        synchronize_session=False,
-    )
-
+    #  GLOBAL UNLOCK: unlock all shared exams (same logical key as finalize)
+    exams = db.query(Exam).filter(Exam.logical_filter(ref_exam.logical_key())).all()
+    exam_ids = [e.id for e in exams]
+    _set_lock(db, exam_ids, None)
+    drop_snapshots(db, exam_ids)
     db.commit()
+    _publish(exams, {"type": "unfinalize", "exam_ids": exam_ids})
 
     return {"status": "ok", "message": "Exam unfinalized globally"}
 
@@ -158,7 +216,7 @@ def list_exams(
     exam_type: Optional[str] = Query(None),
     semester: Optional[int] = Query(None),
     programme: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     created_by: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
 ):
@@ -211,7 +269,15 @@ def create_exam(
     exam_in: ExamCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ):
+    # a retried create gets the exam it already created
+    if idempotency_key:
+        digest = request_digest("create_exam", exam_in)
+        replay = stored_response(db, current_user.id, idempotency_key, digest)
+        if replay is not None:
+            return replay
+
     existing = db.query(Exam).filter(
         Exam.subject_code == exam_in.subject_code,
         Exam.exam_type == exam_in.exam_type,
@@ -239,7 +305,23 @@ def create_exam(
     )
 
     db.add(exam)
-    db.commit()
+    # first exam of a year: its marks and students need somewhere to go
+    ensure_year_partitions(db, exam.academic_year)
+    db.flush()
+    # zeroed counters, which save_marks then keeps up to date
+    db.add(ExamProgress(exam_id=exam.id, section_id=None, teacher_id=current_user.id))
+    if idempotency_key:
+        remember_response(db, current_user.id, idempotency_key, digest,
+                          ExamOut.model_validate(exam, from_attributes=True).model_dump(mode="json"))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # the same key committed first from a concurrent retry
+        replay = stored_response(db, current_user.id, idempotency_key, digest) if idempotency_key else None
+        if replay is None:
+            raise
+        return replay
     db.refresh(exam)
 
     return exam
@@ -262,76 +344,112 @@ def save_marks(
     payload: MarksSaveRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ):
    
     logger.info("save_marks called for exam_id=%s by user=%s", exam_id, getattr(current_user, "id", None))
 
+    # a retry of a save that already committed gets its response back as is
+    digest = None
+    if idempotency_key:
+        digest = request_digest(f"marks:{exam_id}", payload)
+        replay = stored_response(db, current_user.id, idempotency_key, digest)
+        if replay is not None:
+            return replay
+
     # basic exam existence check
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
+    # finalized marks are frozen (and snapshotted)
+    if exam.is_locked:
+        raise HTTPException(status_code=403, detail="Exam is finalized; marks can no longer be changed")
 
     # --- SECTION HANDLING (optional) ---
     section = None
+    sections = section_index(db, exam_id)
     if payload.section_id is not None:
         # Validate provided section_id
-        section = (
-            db.query(ExamSection)
-            .filter(ExamSection.id == payload.section_id, ExamSection.exam_id == exam_id)
-            .first()
-        )
+        section = sections.get(payload.section_id)
         if not section:
             raise HTTPException(status_code=422, detail="Invalid section_id")
         # permission: teacher may only write for their section
         if getattr(current_user, "role", None) == "teacher" and section.teacher_id != getattr(current_user, "id", None):
             raise HTTPException(status_code=403, detail="Not allowed to save marks for this section")
 
-    # --- Build list of question labels from payload (safe access) ---
-    payload_q_labels = []
-    for q in (payload.questions or []):
-        lbl = getattr(q, "label", None)
-        if lbl:
-            payload_q_labels.append(lbl)
+    # applied with whatever else arrives for this exam in the same flush
+    # (app/core/write_queue.py)
+    write = _MarksWrite(
+        user_id=current_user.id,
+        section=section,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        digest=digest,
+        client_key=db.info.get("client_key"),
+    )
+    # hand the pooled connection back while the save waits for its flush
+    db.rollback()
+
+    result, _ = get_write_queue().submit(
+        exam_id, write, lambda writes, flush_id: _flush_marks(db, exam_id, writes, flush_id)
+    )
+    return result
+
+
+@dataclass
+class _MarksWrite:
+    """A validated save_marks request waiting in the write queue."""
+    user_id: int
+    section: Optional[SectionSpan]
+    payload: MarksSaveRequest
+    idempotency_key: Optional[str] = None
+    digest: Optional[str] = None
+    client_key: Optional[str] = None
+
+
+def _merge_writes(writes: List[_MarksWrite]) -> List[dict]:
+    """Back-to-back writes of one user into one section become one; the later value of a cell wins."""
+    groups: List[dict] = []
+    for write in writes:
+        section_id = write.section.id if write.section else None
+        group = groups[-1] if groups else None
+        if group is None or group["user_id"] != write.user_id or group["section_id"] != section_id:
+            group = {
+                "user_id": write.user_id, "section_id": section_id, "section": write.section,
+                "questions": {}, "rules": None, "students": {}, "writes": [],
+            }
+            groups.append(group)
+        group["writes"].append(write)
+        payload = write.payload
+        for q in (payload.questions or []):
+            if q.label:
+                group["questions"].setdefault(q.label, q.max_marks)
+        if payload.question_rules is not None:
+            group["rules"] = payload.question_rules
+        for s in (payload.students or []):
+            entry = group["students"].setdefault(int(s.roll_no), {"absent": False, "marks": {}})
+            entry["absent"] = bool(s.absent)
+            entry["marks"].update({lbl: v for lbl, v in (s.marks or {}).items() if lbl is not None})
+    return groups
+
+
+def _write_group(db: Session, exam: Exam, sections, group: dict, progress: ProgressDelta) -> tuple:
+    """Apply one merged write; returns (counts, changed cells, changed absent flags)."""
+    exam_id = exam.id
 
     # --- Fetch existing questions and create missing ones (auto-create behavior) ---
     q_objs = db.query(Question).filter(Question.exam_id == exam_id).order_by(Question.id.asc()).all()
     existing_labels = {q.label for q in q_objs}
-
+    missing = [(lbl, mm) for lbl, mm in group["questions"].items() if lbl not in existing_labels]
     created_questions = 0
-    if not q_objs and payload_q_labels:
-        # no questions at all — create all from payload
-        logger.info("No existing questions; creating %s from payload for exam %s", len(payload_q_labels), exam_id)
-        for q_in in (payload.questions or []):
-            lbl = getattr(q_in, "label", None)
-            if not lbl:
-                continue
-            try:
-                mm = float(getattr(q_in, "max_marks", 0) or 0)
-            except Exception:
-                mm = 0.0
-            new_q = Question(exam_id=exam_id, label=lbl, max_marks=mm)
-            db.add(new_q)
+    if missing:
+        logger.info("Creating %s missing question(s) for exam %s: %s", len(missing), exam_id, [m[0] for m in missing])
+        for lbl, mm in missing:
+            db.add(Question(exam_id=exam_id, label=lbl, max_marks=float(mm or 0)))
             created_questions += 1
         db.flush()
-        q_objs = db.query(Question).filter(Question.exam_id == exam_id).all()
-        existing_labels = {q.label for q in q_objs}
-    else:
-        # create any missing labels from payload
-        missing = [lab for lab in payload_q_labels if lab not in existing_labels]
-        if missing:
-            logger.info("Creating %s missing question(s) for exam %s: %s", len(missing), exam_id, missing)
-            for lab in missing:
-                found = next((q for q in (payload.questions or []) if getattr(q, "label", None) == lab), None)
-                try:
-                    mm = float(getattr(found, "max_marks", 0) or 0) if found else 0.0
-                except Exception:
-                    mm = 0.0
-                nq = Question(exam_id=exam_id, label=lab, max_marks=mm)
-                db.add(nq)
-                created_questions += 1
-            db.flush()
-            q_objs = db.query(Question).filter(Question.exam_id == exam_id).all()
-            existing_labels = {q.label for q in q_objs}
+        q_objs = db.query(Question).filter(Question.exam_id == exam_id).order_by(Question.id.asc()).all()
+    progress.count_questions(len(q_objs) - created_questions, created_questions)
 
     # map label -> Question object
     q_map = {}
@@ -339,211 +457,475 @@ def save_marks(
         if q.label not in q_map:
             q_map[q.label] = q
 
-    logger.info("Final question labels for exam %s: %s", exam_id, list(q_map.keys()))
-
-    # --- Persist question_rules if present (store dict or JSON string depending on column type) ---
-    try:
-        qr = getattr(payload, "question_rules", None)
-        if qr is not None:
-            exam_row = db.query(Exam).filter(Exam.id == exam_id).first()
-            if exam_row:
-                try:
-                    exam_row.question_rules = qr
-                    db.add(exam_row)
-                    logger.info("Persisted question_rules (direct assign) for exam_id=%s", exam_id)
-                except (TypeError, StatementError):
-                    try:
-                        exam_row.question_rules = json.dumps(qr)
-                        db.add(exam_row)
-                        logger.info("Persisted question_rules (json dump) for exam_id=%s", exam_id)
-                    except Exception as e:
-                        logger.exception("Failed to json-dump question_rules for exam_id=%s: %s", exam_id, e)
-    except Exception as e:
-        logger.exception("Unexpected error while persisting question_rules for exam_id=%s: %s", exam_id, e)
-        # continue — do not abort marks save for rules failure
+    # --- Persist question_rules if present (validated by MarksSaveRequest) ---
+    if group["rules"] is not None:
+        _set_rules(exam, group["rules"])
+        db.add(exam)
 
-    # --- Iterate students and save marks ---
     created_marks = 0
     updated_marks = 0
     created_students = 0
-
-    try:
-        for s in (payload.students or []):
-            # normalize roll_no depending on incoming type
-            try:
-                roll_no = int(s.roll_no)
-            except Exception:
-                # if backend expects string roll_no, change parsing accordingly
-                raise HTTPException(status_code=422, detail=f"Invalid roll_no: {s.roll_no}")
-
-            # find existing student or create
-            student = db.query(Student).filter(Student.exam_id == exam_id, Student.roll_no == roll_no).first()
-            if not student:
-                student = Student(exam_id=exam_id, roll_no=roll_no, absent=bool(getattr(s, "absent", False)))
-                db.add(student)
-                db.flush()  # ensure id populated
-                created_students += 1
-                logger.debug("Created student roll=%s id=%s", roll_no, student.id)
+    # what other open pages need to apply: changed cells and absent flags
+    changed_cells = []
+    changed_absent = []
+
+    # students and their marks in two queries instead of one per row
+    rolls = list(group["students"])
+    students_by_roll: Dict[int, Student] = {}
+    if rolls:
+        existing = (
+            db.query(Student)
+            .filter(Student.exam_id == exam_id, Student.roll_no.in_(rolls),
+                    year_filter(Student, exam.academic_year))
+            .order_by(Student.id.asc())
+        )
+        for student in existing:
+            students_by_roll.setdefault(student.roll_no, student)
+    marks_by_cell: Dict[tuple, Mark] = {}
+    filled: Dict[int, int] = {}  # entered marks per student, for the progress counters
+    if students_by_roll:
+        existing = (
+            db.query(Mark)
+            .filter(Mark.exam_id == exam_id, Mark.student_id.in_([s.id for s in students_by_roll.values()]),
+                    year_filter(Mark, exam.academic_year))
+            .order_by(Mark.id.asc())
+        )
+        for mark in existing:
+            marks_by_cell.setdefault((mark.student_id, mark.question_id), mark)
+            if mark.marks is not None:
+                filled[mark.student_id] = filled.get(mark.student_id, 0) + 1
+
+    new_students = []
+    for roll_no in rolls:
+        absent = group["students"][roll_no]["absent"]
+        student = students_by_roll.get(roll_no)
+        if student is None:
+            student = Student(exam_id=exam_id, roll_no=roll_no, absent=absent, academic_year=exam.academic_year)
+            progress.student(student, 0, new=True)
+            db.add(student)
+            students_by_roll[roll_no] = student
+            new_students.append(student)
+            created_students += 1
+            changed_absent.append([roll_no, absent])
+            continue
+        progress.student(student, filled.get(student.id, 0))
+        if bool(student.absent) != absent:
+            changed_absent.append([roll_no, absent])
+            student.absent = absent
+    if new_students:
+        db.flush()  # ids for the new students' marks
+
+    section = group["section"]
+    for roll_no in rolls:
+        student = students_by_roll[roll_no]
+        # for safety, capture section_id to assign to marks (the validated
+        # section, else the section whose roll range holds this student)
+        owner = section or sections.find(roll_no)
+        section_id_to_set = owner.id if owner else None
+
+        for label, raw_val in group["students"][roll_no]["marks"].items():
+            q = q_map.get(label)
+            if not q:
+                logger.warning("Unknown question label %s - skipping (exam %s)", label, exam_id)
+                continue
+            val = None if raw_val is None else float(raw_val)
+
+            mark = marks_by_cell.get((student.id, q.id))
+            if mark is None:
+                mark = Mark(
+                    exam_id=exam_id,
+                    student_id=student.id,
+                    question_id=q.id,
+                    marks=val,
+                    section_id=section_id_to_set,
+                    academic_year=exam.academic_year,
+                )
+                db.add(mark)
+                marks_by_cell[(student.id, q.id)] = mark
+                progress.cell(student, None, val)
+                created_marks += 1
+                if val is not None:
+                    changed_cells.append([roll_no, label, val])
             else:
-                # update absent flag
-                student.absent = bool(getattr(s, "absent", False))
-                db.add(student)
+                if mark.marks != val:
+                    changed_cells.append([roll_no, label, val])
+                progress.cell(student, mark.marks, val)
+                mark.marks = val
+                mark.section_id = section_id_to_set
+                updated_marks += 1
+
+    counts = {
+        "created_questions": created_questions,
+        "created_students": created_students,
+        "created_marks": created_marks,
+        "updated_marks": updated_marks,
+    }
+    return counts, changed_cells, changed_absent
 
-            # for safety, capture section_id to assign to marks (either validated section or None)
-            section_id_to_set = section.id if section else None
 
-            # iterate marks map for this student
-            for label, raw_val in (getattr(s, "marks", {}) or {}).items():
-                if label is None:
-                    continue
-                q = q_map.get(label)
-                if not q:
-                    logger.warning("Unknown question label %s - skipping (exam %s)", label, exam_id)
-                    continue
+def _write_marks(db: Session, exam_id: int, writes: List[_MarksWrite], flush_id: int) -> List[dict]:
+    """Apply a batch of queued saves in one transaction; one response per write."""
+    # re-read: the exam may have been finalized while the saves were queued.
+    # The row lock holds off a finalize (_set_lock's UPDATE) until these marks
+    # commit, so its snapshot includes them; one already committed shows here.
+    exam = db.query(Exam).filter(Exam.id == exam_id).with_for_update().populate_existing().first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    if exam.is_locked:
+        raise HTTPException(status_code=403, detail="Exam is finalized; marks can no longer be changed")
+    sections = section_index(db, exam_id)
+    # every client in the batch reads its own writes (see app/database.py)
+    db.info["client_keys"] = {w.client_key for w in writes if w.client_key}
+
+    progress = ProgressDelta(sections)
+    groups = _merge_writes(writes)
+    applied = []
+    for group in groups:
+        counts, cells, absent = _write_group(db, exam, sections, group, progress)
+        applied.append((group, counts, cells, absent))
+
+    logger.info("Flushing DB. flush=%s exam=%s requests=%s merged into %s", flush_id, exam_id, len(writes), len(groups))
+    db.flush()
+    # progress counters commit together with the marks
+    saved_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    apply_progress(db, exam, progress, saved_at=saved_at)
+
+    results = {}
+    remembered = set()
+    for group, counts, _, _ in applied:
+        result = {
+            "detail": "Marks saved",
+            **counts,
+            # the flush that wrote this save, and how many requests it carried
+            "flush": {"id": flush_id, "requests": len(writes), "merged": len(group["writes"]),
+                      "saved_at": saved_at.isoformat() + "Z"},
+        }
+        for write in group["writes"]:
+            results[id(write)] = result
+            # a retry queued next to its original shares one stored response
+            if write.idempotency_key and (write.user_id, write.idempotency_key) not in remembered:
+                remembered.add((write.user_id, write.idempotency_key))
+                remember_response(db, write.user_id, write.idempotency_key, write.digest, result)
+    # new question columns: the cached layouts are rebuilt on next read
+    # (invalidated before and after the commit, see app/utils/layout.py)
+    created = any(counts["created_questions"] for _, counts, _, _ in applied)
+    if created:
+        invalidate_layouts(exam_id)
+    db.commit()
+    logger.info("Commit successful")
+    if created:
+        invalidate_layouts(exam_id)
 
-                # parse numeric or accept None/blank
-                val = None
-                if raw_val is not None and raw_val != "":
-                    try:
-                        val = float(raw_val)
-                    except Exception:
-                        raise HTTPException(status_code=422, detail=f"Invalid numeric value for {label} for roll {roll_no}")
-
-                # find existing mark (student + question + exam)
-                mark = (
-                    db.query(Mark)
-                    .filter(Mark.exam_id == exam_id, Mark.student_id == student.id, Mark.question_id == q.id)
-                    .first()
-                )
+    for group, counts, cells, absent in applied:
+        if not (cells or absent or counts["created_questions"]):
+            continue
+        too_big = len(cells) > LIVE_MAX_CELLS
+        _publish([exam], {
+            "type": "marks",
+            "exam_id": exam_id,
+            "user_id": group["user_id"],
+            "section_id": group["section_id"],
+            "counts": counts,
+            # new question columns or a very large save: clients refetch the grid
+            "resync": bool(counts["created_questions"]) or too_big,
+            "cells": None if too_big else cells,
+            "absent": absent,
+        })
+    return [results[id(w)] for w in writes]
 
-                if not mark:
-                    mark = Mark(
-                        exam_id=exam_id,
-                        student_id=student.id,
-                        question_id=q.id,
-                        marks=val,
-                        section_id=section_id_to_set,
-                    )
-                    db.add(mark)
-                    created_marks += 1
-                    logger.debug("Added mark: exam=%s student=%s q=%s val=%s", exam_id, student.id, q.id, val)
-                else:
-                    mark.marks = val
-                    mark.section_id = section_id_to_set
-                    db.add(mark)
-                    updated_marks += 1
-                    logger.debug("Updated mark id=%s -> %s", mark.id, val)
-
-        logger.info(
-            "Flushing DB. created_questions=%s created_students=%s created_marks=%s updated_marks=%s",
-            created_questions, created_students, created_marks, updated_marks,
-        )
 
-        db.flush()
-        db.commit()
-        logger.info("Commit successful")
-    except Exception as exc:
-        logger.exception("Exception while saving marks: %s", exc)
+def _flush_marks(db: Session, exam_id: int, writes: List[_MarksWrite], flush_id: int) -> list:
+    """Write queue flush for save_marks: _write_marks plus its error handling."""
+    replies: list = [None] * len(writes)
+    pending = list(range(len(writes)))
+    while pending:
         try:
+            results = _write_marks(db, exam_id, [writes[i] for i in pending], flush_id)
+        except IntegrityError:
+            db.rollback()
+            # a retried key committed first elsewhere: those saves get the stored
+            # response and the rest of the batch is written again
+            replayed = []
+            for i in pending:
+                write = writes[i]
+                if write.idempotency_key:
+                    replay = stored_response(db, write.user_id, write.idempotency_key, write.digest)
+                    if replay is not None:
+                        replies[i] = replay
+                        replayed.append(i)
+            if not replayed:
+                logger.exception("Integrity error while saving marks")
+                raise HTTPException(status_code=500, detail="Failed to save marks due to server error")
+            pending = [i for i in pending if i not in replayed]
+            continue
+        except HTTPException:
             db.rollback()
-        except Exception:
-            logger.exception("Rollback failed")
-        raise HTTPException(status_code=500, detail="Failed to save marks due to server error")
+            raise
+        except Exception as exc:
+            logger.exception("Exception while saving marks: %s", exc)
+            try:
+                db.rollback()
+            except Exception:
+                logger.exception("Rollback failed")
+            raise HTTPException(status_code=500, detail="Failed to save marks due to server error")
+        for i, result in zip(pending, results):
+            replies[i] = result
+        pending = []
+    return replies
 
-    return {
-        "detail": "Marks saved",
-        "created_questions": created_questions,
-        "created_students": created_students,
-        "created_marks": created_marks,
-        "updated_marks": updated_marks,
-    }
 
+@router.get("/{exam_id}/events")
+def exam_events(
+    exam_id: int,
+    request: Request,
+    scope: str = Query("exam", pattern="^(exam|logical)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Server-Sent Events of committed changes to an exam (scope=logical: its whole logical exam, admins only)."""
+    if not LIVE_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Live events are disabled")
 
-@router.get("/{exam_id}/marks", response_model=ExamMarksOut)
-def get_exam_marks(exam_id: int, db: Session = Depends(get_db)):
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    questions = (
-        db.query(Question)
-        .filter(Question.exam_id == exam_id)
-        .order_by(Question.order.asc())
-        .all()
+    # roll ranges the caller may see, as in get_exam_marks; [] is everything
+    ranges: List[tuple] = []
+    if current_user.role != "admin":
+        if scope == "logical":
+            raise HTTPException(status_code=403, detail="Admin only")
+        ranges = _own_ranges(section_index(db, exam_id), exam, current_user)
+        if ranges is None:
+            raise HTTPException(status_code=403, detail="Not allowed to view this exam")
+
+    topics = [logical_topic(exam.logical_key())] if scope == "logical" else [exam_topic(exam_id)]
+    # the stream can stay open for hours; give the connection back now
+    db.close()
+
+    async def events():
+        yield "retry: 3000\n\n"
+        async for event in get_hub().stream(topics):
+            if await request.is_disconnected():
+                break
+            if event is not None:
+                event = _slice_event(event, ranges)
+                if event is None:
+                    continue
+            yield sse_format(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@router.get("/{exam_id}/marks", response_model=ExamMarksOut)
+def get_exam_marks(
+    exam_id: int,
+    section_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    # roll ranges the caller gets: the requested section, else a teacher's own
+    # sections of this exam; admins and the exam owner without sections see all
+    if section_id is not None:
+        section = section_index(db, exam_id).get(section_id)
+        if not section:
+            raise HTTPException(status_code=404, detail="Section not found")
+        if current_user.role != "admin" and section.teacher_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not allowed to view this section")
+        ranges = [(section.roll_start, section.roll_end)]
+    elif current_user.role != "admin":
+        ranges = _own_ranges(section_index(db, exam_id), exam, current_user)
+        if ranges is None:
+            raise HTTPException(status_code=403, detail="Not allowed to view this exam")
+    else:
+        ranges = []
+
+    # finalized: slice the frozen grid instead of querying marks
+    snap = single_snapshot(db, exam)
+    if snap is not None:
+        return {"exam": exam, **_slice_grid(snap["grid"], ranges)}
+
+    # served by ix_students_exam_roll (exam_id, roll_no)
+    student_filter = [Student.exam_id == exam_id, year_filter(Student, exam.academic_year)]
+    if ranges:
+        student_filter.append(or_(*(Student.roll_no.between(lo, hi) for lo, hi in ranges)))
+
+    questions = exam_layout(db, exam_id).grid_questions()
     students = (
         db.query(Student)
-        .filter(Student.exam_id == exam_id)
+        .filter(*student_filter)
         .order_by(Student.roll_no.asc())
         .all()
     )
-    marks = (
-        db.query(Mark)
-        .filter(Mark.exam_id == exam_id)
-        .all()
-    )
+    marks_out = [
+        {"roll_no": roll_no, "question_label": label, "marks": value}
+        for roll_no, label, value in (
+            db.query(Student.roll_no, Question.label, Mark.marks)
+            .join(Mark, Mark.student_id == Student.id)
+            .join(Question, Question.id == Mark.question_id)
+            .filter(*student_filter, year_filter(Mark, exam.academic_year))
+            .all()
+        )
+    ]
 
-    # build lookup maps
-    student_roll_by_id = {
-        s.id: s.roll_no
-        for s in students
+    return {
+        "exam": exam,
+        "questions": questions,
+        "students": students,
+        "marks": marks_out,
     }
 
-    question_label_by_id = {
-        q.id: q.label
-        for q in questions
-    }
 
-    marks_out = []
+def _own_ranges(sections, exam: Exam, user) -> Optional[List[tuple]]:
+    """Roll ranges a teacher may read: their sections, all ([]) for the owner without one, else None."""
+    ranges = [(sec.roll_start, sec.roll_end) for sec in sections.for_teacher(user.id)]
+    if not ranges and exam.created_by != user.id:
+        return None
+    return ranges
 
-    for m in marks:
-        roll_no = student_roll_by_id.get(m.student_id)
-        q_label = question_label_by_id.get(m.question_id)
 
-        if roll_no is None or q_label is None:
-            continue
+def _slice_event(event: dict, ranges: List[tuple]) -> Optional[dict]:
+    """A marks event cut down to the students in ``ranges``; None when none of it is left."""
+    if not ranges or event.get("type") != "marks":
+        return event
 
-        marks_out.append({
-            "roll_no": roll_no,
-            "question_label": q_label,
-            "marks": m.marks,
-        })
+    def visible(roll_no: int) -> bool:
+        return any(lo <= roll_no <= hi for lo, hi in ranges)
+
+    cells = event.get("cells")
+    if cells is not None:
+        cells = [cell for cell in cells if visible(cell[0])]
+    absent = [item for item in event.get("absent") or () if visible(item[0])]
+    if not (cells or absent or event.get("resync")):
+        return None
+    return {**event, "cells": cells, "absent": absent}
+
+
+def _slice_grid(grid: dict, ranges: List[tuple]) -> dict:
+    if not ranges:
+        return grid
+
+    def visible(roll_no: int) -> bool:
+        return any(lo <= roll_no <= hi for lo, hi in ranges)
 
     return {
-        "exam": exam,
-        "questions": questions,
-        "students": students,
-        "marks": marks_out,
+        "questions": grid["questions"],
+        "students": [s for s in grid["students"] if visible(s["roll_no"])],
+        "marks": [m for m in grid["marks"] if visible(m["roll_no"])],
+    }
+
+
+# exams per round of IN queries when a batch is streamed
+BATCH_GET_CHUNK = 25
+
+
+@router.post("/marks:batchGet", response_model=MarksBatchGetOut)
+def batch_get_marks(
+    payload: MarksBatchGetRequest,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Grids of many exams in one call, each as GET /exams/{id}/marks returns it.
+
+    Unknown ids are listed in ``missing`` and exams the caller may not read
+    in ``forbidden``. Batches holding more than MARKS_BATCH_STREAM_CELLS
+    marks (or requested with ``Accept: application/x-ndjson``) are streamed
+    as NDJSON instead: a first line with ``missing`` and ``forbidden``, then
+    one line per exam.
+    """
+    exam_ids = list(dict.fromkeys(payload.exam_ids))
+    exams = {e.id: e for e in db.query(Exam).filter(Exam.id.in_(exam_ids))}
+    missing = [exam_id for exam_id in exam_ids if exam_id not in exams]
+
+    ranges: Dict[int, List[tuple]] = {}
+    forbidden = []
+    indexes = section_indexes(db, list(exams)) if current_user.role != "admin" else {}
+    for exam_id in exam_ids:
+        exam = exams.get(exam_id)
+        if exam is None:
+            continue
+        if current_user.role == "admin":
+            ranges[exam_id] = []
+            continue
+        own = _own_ranges(indexes.get(exam_id) or SectionIndex(()), exam, current_user)
+        if own is None:
+            forbidden.append(exam_id)
+        else:
+            ranges[exam_id] = own
+    allowed = list(ranges)
+    years = {exam_id: exams[exam_id].academic_year for exam_id in allowed}
+    exam_json = {
+        exam_id: ExamOut.model_validate(exams[exam_id], from_attributes=True).model_dump(mode="json")
+        for exam_id in allowed
     }
 
+    cells = db.query(func.count(Mark.id)).filter(exams_filter(Mark, years)).scalar() if allowed else 0
+    wants_ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    if not wants_ndjson and cells <= MARKS_BATCH_STREAM_CELLS:
+        grids = exam_grids(db, years)
+        return {
+            "exams": [
+                {"exam": exam_json[exam_id], **_slice_grid(grids[exam_id], ranges[exam_id])}
+                for exam_id in allowed
+            ],
+            "missing": missing,
+            "forbidden": forbidden,
+        }
+
+    bind = db.get_bind()
+
+    def lines():
+        yield json.dumps({"missing": missing, "forbidden": forbidden}) + "\n"
+        # a session of its own: the request's may be closed while this runs
+        stream_db = SessionLocal(bind=bind)
+        try:
+            for start in range(0, len(allowed), BATCH_GET_CHUNK):
+                chunk = allowed[start:start + BATCH_GET_CHUNK]
+                grids = exam_grids(stream_db, {exam_id: years[exam_id] for exam_id in chunk})
+                for exam_id in chunk:
+                    item = {"exam": exam_json[exam_id], **_slice_grid(grids.pop(exam_id), ranges[exam_id])}
+                    yield ExamMarksOut.model_validate(item).model_dump_json() + "\n"
+                stream_db.rollback()
+        finally:
+            stream_db.close()
+
+    registry.inc("gradeflow_batch_get_streamed_total")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.delete("/{exam_id}")
 def delete_exam(
     exam_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Only admin OR exam creator can delete
-    if current_user.role != "admin":
-        created = db.query(Exam).filter(Exam.id == exam_id).first()
-        if not created:
-            raise HTTPException(status_code=404, detail="Exam not found")
-        if created.created_by != current_user.id:
-            raise HTTPException(
-                status_code=403, detail="Not authorized to delete this exam"
-            )
-
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
-    if not exam:
+    created_by = db.query(Exam.created_by).filter(Exam.id == exam_id).first()
+    if not created_by:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    # Delete cascade manually (SQLite does not cascade automatically)
-    db.query(Mark).filter(Mark.exam_id == exam_id).delete()
-    db.query(Student).filter(Student.exam_id == exam_id).delete()
-    db.query(Question).filter(Question.exam_id == exam_id).delete()
-    db.query(ExamSection).filter(ExamSection.exam_id == exam_id).delete()
+    # Only admin OR exam creator can delete
+    if current_user.role != "admin" and created_by[0] != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to delete this exam"
+        )
 
-    db.delete(exam)
+    # marks, students, questions, sections and snapshots go with it (ON DELETE CASCADE)
+    db.execute(delete(Exam).where(Exam.id == exam_id))
+    invalidate_sections(exam_id)
+    invalidate_layouts(exam_id)
     db.commit()
+    invalidate_sections(exam_id)
+    invalidate_layouts(exam_id)
 
     return {"status": "success", "message": "Exam deleted successfully"}
 
@@ -562,6 +944,10 @@ def update_exam(
     if current_user.role != "admin" and exam.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
+    if exam.is_locked:
+        # names and rules are part of the frozen sheets
+        _drop_group_snapshots(db, exam)
+
     if payload.subject_code is not None:
         exam.subject_code = payload.subject_code
     if payload.subject_name is not None:
@@ -569,8 +955,8 @@ def update_exam(
     # ... other fields as needed ...
 
     if payload.question_rules is not None:
-        # store as JSON string in text column
-        exam.question_rules = json.dumps(payload.question_rules)
+        # stored as a native JSON document
+        _set_rules(exam, payload.question_rules)
 
     db.add(exam)
     db.commit()
@@ -578,6 +964,102 @@ def update_exam(
     # return parsed rules as dict in pydantic model
     return exam
 
+def _progress_counts(row: ExamProgress) -> dict:
+    return {
+        "students": row.students,
+        "absent": row.absent,
+        "marked": row.marked,
+        "pending": row.students - row.absent - row.marked,
+        "cells_filled": row.cells_filled,
+        "cells_blank": row.cells_blank,
+        "last_saved_at": row.last_saved_at.replace(tzinfo=timezone.utc) if row.last_saved_at else None,
+    }
+
+
+def _progress_rows(db: Session, academic_year: str):
+    return (
+        db.query(Exam, ExamProgress, ExamSection.section_name, User.name)
+        .outerjoin(ExamProgress, ExamProgress.exam_id == Exam.id)
+        .outerjoin(ExamSection, ExamSection.id == ExamProgress.section_id)
+        .outerjoin(User, User.id == ExamProgress.teacher_id)
+        .filter(Exam.academic_year == academic_year)
+        .order_by(Exam.id, ExamProgress.section_id)
+        .all()
+    )
+
+
+@router.get("/admin/progress", response_model=List[ExamProgressOut])
+def get_admin_progress(
+    academic_year: str,
+    db: Session = Depends(get_read_db),
+    _: None = Depends(admin_required),
+):
+    """Marking progress of every exam of ``academic_year`` and of each of its sections."""
+    # exams saved before progress tracking are counted by `python -m app.migrate`
+    rows = _progress_rows(db, academic_year)
+
+    result: Dict[int, dict] = {}
+    for exam, progress, section_name, teacher_name in rows:
+        out = result.get(exam.id)
+        if out is None:
+            out = result[exam.id] = {
+                "exam_id": exam.id,
+                "programme": exam.programme,
+                "subject_code": exam.subject_code,
+                "subject_name": exam.subject_name,
+                "exam_type": exam.exam_type,
+                "semester": exam.semester,
+                "academic_year": exam.academic_year,
+                "is_locked": exam.is_locked,
+                "created_by": exam.created_by,
+                "sections": [],
+            }
+        if progress is None:
+            continue
+        if progress.section_id is None:
+            out.update(_progress_counts(progress), teacher_name=teacher_name)
+        else:
+            out["sections"].append(SectionProgressOut(
+                section_id=progress.section_id,
+                section_name=section_name,
+                teacher_id=progress.teacher_id,
+                teacher_name=teacher_name,
+                **_progress_counts(progress),
+            ))
+
+    return list(result.values())
+
+
+@router.get("/admin/extract")
+def extract_academic_year(
+    academic_year: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_read_db),
+    _: None = Depends(admin_required),
+):
+    """Every mark of ``academic_year``, one row per mark, streamed as NDJSON or CSV."""
+    if not db.query(Exam.id).filter(Exam.academic_year == academic_year).first():
+        raise HTTPException(status_code=404, detail=f"No exams found for academic year {academic_year}")
+
+    bind = db.get_bind()
+
+    def chunks():
+        # a session of its own, held only while the stream runs; closing the
+        # generator (finished or client gone) releases the cursor
+        stream_db = SessionLocal(bind=bind)
+        try:
+            rows = extract_rows(stream_db, academic_year)
+            yield from (csv_chunks(rows) if format == "csv" else ndjson_chunks(rows))
+        finally:
+            stream_db.close()
+
+    if format == "csv":
+        response = StreamingResponse(chunks(), media_type="text/csv")
+        response.headers["Content-Disposition"] = f'attachment; filename="marks_{academic_year}.csv"'
+        return response
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
 @router.get("/admin/combined-marks", response_model=AdminCombinedMarksOut
 )
 def get_admin_combined_marks(
@@ -586,7 +1068,7 @@ def get_admin_combined_marks(
     exam_type: str,
     semester: int,
     academic_year: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     if current_user.role != "admin":
@@ -595,264 +1077,43 @@ def get_admin_combined_marks(
     # 1️ Fetch all related exams (shared logical exam)
     exams = (
         db.query(Exam)
-        .filter(
-            Exam.subject_code == subject_code,
-            Exam.subject_name == subject_name,
-            Exam.exam_type == exam_type,
-            Exam.semester == semester,
-            Exam.academic_year == academic_year,
-        )
+        .filter(Exam.logical_filter((subject_code, subject_name, exam_type, semester, academic_year)))
         .all()
     )
 
     if not exams:
         raise HTTPException(status_code=404, detail="No exams found")
 
-    exam_ids = [e.id for e in exams]
     ref_exam = exams[0]  # metadata reference
 
-    # 2️ Questions (merged, unique by label)
-    questions = (
-        db.query(Question)
-        .filter(Question.exam_id.in_(exam_ids))
-        .order_by(Question.label.asc())
-        .all()
-    )
-
-    seen = {}
-    unique_questions = []
-    for q in questions:
-        if q.label not in seen:
-            seen[q.label] = True
-            unique_questions.append(q)
-
-    # 3️ Students (merged, unique by roll_no)
-    # collect unique roll numbers across all exams
-    students = (
-    db.query(Student)
-    .filter(Student.exam_id.in_(exam_ids))
-    .all()
-)
-    students_by_roll = {}
-
-    for s in students:
-        roll = s.roll_no
-        if roll not in students_by_roll:
-            students_by_roll[roll] = {
-                "id": roll,              # synthetic but stable
-                "roll_no": roll,
-                "absent": bool(s.absent),
-            }
-        else:
-            # if ABSENT in ANY exam → absent in admin view
-            students_by_roll[roll]["absent"] = (
-                students_by_roll[roll]["absent"] or bool(s.absent)
-            )
-
-    merged_students = sorted(
-    students_by_roll.values(),
-    key=lambda s: int(s["roll_no"])
-)
-   
-    # 4️ Marks (ALL)
-    marks = (
-        db.query(Mark)
-        .filter(Mark.exam_id.in_(exam_ids))
-        .all()
-    )
-
-    # map student_id -> roll_no
-    student_roll_by_id = {
-        s.id: s.roll_no
-        for s in db.query(Student).filter(Student.exam_id.in_(exam_ids)).all()
-    }
-        
-    # map (exam_id, question_id) -> label
-    question_label_by_key = {
-        (q.exam_id, q.id): q.label
-        for q in db.query(Question)
-            .filter(Question.exam_id.in_(exam_ids))
-            .all()
-    }
-    marks_out = []
-
-    for m in marks:
-        roll_no = student_roll_by_id.get(m.student_id)
-        if roll_no is None:
-            continue
+    # finalized logical exam: the grid frozen at lock time
+    snap = merged_snapshot(db, exams)
+    grid = snap["grid"] if snap is not None else merged_exam_grid(db, exams)
 
-        q_label = question_label_by_key.get((m.exam_id, m.question_id))
-        if not q_label:
-            continue
-
-        marks_out.append({
-            "roll_no": roll_no,
-            "question_label": q_label,
-            "marks": m.marks,
-        })
-
-    return {
-        "exam": ref_exam,
-        "questions": unique_questions,
-        "students": merged_students,
-        "marks": marks_out,
-    }
+    return {"exam": ref_exam, **grid}
 
 
 def export_single_exam_csv(
     exam_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    # fetch questions (flattened labels like "Q1.A")
-    questions = db.query(Question).filter(Question.exam_id == exam_id).order_by(Question.id.asc()).all()
-    q_labels = [q.label for q in questions]  # preserves DB order
+    snap = single_snapshot(db, exam)
+    if snap is not None:
+        return _csv_response(snap["filename"], snap["csv"])
 
-    # Group sub-questions by main label prefix (prefix before first dot)
-    main_order: list[str] = []
-    subs_by_main: dict[str, list[str]] = {}
-    for lbl in q_labels:
-        if "." in lbl:
-            main, sub = lbl.split(".", 1)
-        else:
-            main, sub = lbl, ""
-        if main not in subs_by_main:
-            subs_by_main[main] = []
-            main_order.append(main)
-        subs_by_main[main].append(lbl)
-
-    # fetch students and marks
-    students = db.query(Student).filter(Student.exam_id == exam_id).order_by(Student.roll_no.asc()).all()
-    marks = db.query(Mark).filter(Mark.exam_id == exam_id).all()
-
-    # build reverse map id -> label for questions
-    id_to_label = {q.id: q.label for q in questions}
-
-    # marks_map: (student_id, label) -> mark_value
-    marks_map: dict[tuple[int, str], float | None] = {}
-    for m in marks:
-        lbl = id_to_label.get(m.question_id)
-        if lbl:
-            # preserve None if m.marks is None (so we can output blank cell)
-            marks_map[(m.student_id, lbl)] = None if m.marks is None else float(m.marks)
-
-    # build student -> section mapping (if section_id present on marks)
-    sections = db.query(ExamSection).filter(ExamSection.exam_id == exam_id).all()
-    section_name_by_id = {sec.id: sec.section_name or "" for sec in sections}
-    student_section: dict[int, str] = {}
-    # prefer section_id saved in marks (if present) otherwise empty string
-    for m in marks:
-        if getattr(m, "section_id", None):
-            student_section[m.student_id] = section_name_by_id.get(m.section_id, "")
-
-    # Read question_rules from exam (may be JSON string or dict)
-    raw_qr = getattr(exam, "question_rules", None)
-    try:
-        question_rules = json.loads(raw_qr) if isinstance(raw_qr, str) else (raw_qr or {})
-    except Exception:
-        question_rules = {}
-
-    # helper to extract minToCount integer from possibly different key names
-    def get_rule_min_to_count(rule_obj: Any) -> Optional[int]:
-        if not rule_obj:
-            return None
-        # accept minToCount or min_to_count or min (fallback)
-        if isinstance(rule_obj, dict):
-            for k in ("minToCount", "min_to_count", "min", "min_to_count"):
-                if k in rule_obj and rule_obj[k] is not None:
-                    try:
-                        return int(rule_obj[k])
-                    except Exception:
-                        pass
-        return None
-
-    # prepare CSV
-    out = io.StringIO()
-    writer = csv.writer(out)
-
-    # header block (keep your existing format)
-    writer.writerow([f"Academic Year: {exam.academic_year or ''}"])
-    writer.writerow([f"Subject: {exam.subject_name} ({exam.subject_code})"])
-    writer.writerow([f"Semester: {exam.semester}"])
-    writer.writerow([f"Exam Type: {exam.exam_type}"])
-    writer.writerow([])
-
-    # build header row:
-    header = ["Roll No", "Section"]
-    # for each main question add its subs then a Total column
-    for main in main_order:
-        subs = subs_by_main.get(main, [])
-        for sub_lbl in subs:
-            header.append(sub_lbl)
-        header.append(f"Total_{main}")  # e.g. Total_Q1
-    header.append("Grand_Total")
-    writer.writerow(header)
-
-    # data rows
-    for s in students:
-        row: list[Any] = [s.roll_no, student_section.get(s.id, "")]
-        grand_total = 0.0
-
-        for main in main_order:
-            subs = subs_by_main.get(main, [])
-            # collect values (None means blank / not entered)
-            sub_vals: list[Optional[float]] = []
-            for lbl in subs:
-                val = marks_map.get((s.id, lbl))
-                sub_vals.append(val)
-                # write cell: blank if None, else write numeric preserving fraction
-                if val is None:
-                    row.append("")
-                else:
-                    # keep as number; csv.writer will convert to string
-                    # keep fractional precision as-is (we'll not round here)
-                    row.append(val)
-
-            # compute main total using rules if present
-            rule_obj = question_rules.get(main) if isinstance(question_rules, dict) else None
-            N = get_rule_min_to_count(rule_obj)
-            if N and N > 0:
-                # take top N numeric values (ignore None)
-                numeric_vals = [v for v in sub_vals if v is not None]
-                numeric_vals.sort(reverse=True)
-                chosen = numeric_vals[:N]
-                main_total = sum(chosen)
-            else:
-                # default: sum all present numeric values (ignore None)
-                numeric_vals = [v for v in sub_vals if v is not None]
-                main_total = sum(numeric_vals)
-
-            # format main_total: integer if whole else round 2 decimals
-            if float(main_total).is_integer():
-                row.append(int(main_total))
-            else:
-                row.append(round(main_total, 2))
-
-            grand_total += main_total
-
-        # final grand total formatting
-        if float(grand_total).is_integer():
-            row.append(int(grand_total))
-        else:
-            row.append(round(grand_total, 2))
-
-        writer.writerow(row)
-
-    out.seek(0)
-    safe_name = f"{(exam.subject_name or 'exam').replace(' ', '_')}_{exam.exam_type}_Sem{exam.semester}_{exam.academic_year or ''}.csv"
-    response = StreamingResponse(iter([out.getvalue().encode("utf-8")]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f'attachment; filename="{safe_name}"'
-    return response
+    sheet = single_exam_sheet(db, exam)
+    return _csv_response(sheet["filename"], sheet_csv(sheet))
 
 
 @router.post("/export-merged")
 def export_merged_exam_csv(
     payload: dict,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     if current_user.role != "admin":
@@ -866,190 +1127,19 @@ def export_merged_exam_csv(
     if not exams:
         raise HTTPException(status_code=404, detail="No exams found")
 
-    ref = exams[0]  # metadata reference
-
-    # -------------------------------
-    # QUESTIONS (merged)
-    # -------------------------------
-    questions = (
-        db.query(Question)
-        .filter(Question.exam_id.in_(exam_ids))
-        .order_by(Question.label.asc())
-        .all()
-    )
-
-    # unique labels, ordered
-    q_labels = sorted({q.label for q in questions})
-
-
-    # Group by main question
-    main_order: list[str] = []
-    subs_by_main: dict[str, list[str]] = {}
-
-    for lbl in q_labels:
-        main = lbl.split(".", 1)[0]
-        if main not in subs_by_main:
-            subs_by_main[main] = set()
-            main_order.append(main)
-        subs_by_main[main].add(lbl)
-
-    # convert sets → sorted lists (stable CSV order)
-    subs_by_main = {
-        k: sorted(v)
-        for k, v in subs_by_main.items()
-    }
-
-
-    # -------------------------------
-    # STUDENTS + MARKS
-    # -------------------------------
-    students = (
-        db.query(Student)
-        .filter(Student.exam_id.in_(exam_ids))
-        .order_by(Student.roll_no.asc())
-        .all()
-    )
-
-    marks = (
-        db.query(Mark)
-        .filter(Mark.exam_id.in_(exam_ids))
-        .all()
-    )
+    # finalized logical exam: serve the sheet frozen at lock time
+    snap = merged_snapshot(db, exams)
+    if snap is not None:
+        return _csv_response(snap["filename"], snap["csv"])
 
-    id_to_label = {q.id: q.label for q in questions}
-
-    # (student_id, label) → marks
-    marks_map: dict[tuple[int, str], float | None] = {}
-    for m in marks:
-        lbl = id_to_label.get(m.question_id)
-        if lbl:
-            marks_map[(m.student_id, lbl)] = (
-                None if m.marks is None else float(m.marks)
-            )
-
-    # -------------------------------
-    # SECTIONS
-    # -------------------------------
-    sections = (
-        db.query(ExamSection)
-        .filter(ExamSection.exam_id.in_(exam_ids))
-        .all()
-    )
-    section_name_by_id = {s.id: s.section_name or "" for s in sections}
-
-    student_section: dict[int, str] = {}
-    for m in marks:
-        if m.section_id:
-            student_section[m.student_id] = section_name_by_id.get(m.section_id, "")
-
-    # -------------------------------
-    # QUESTION RULES (merge)
-    # -------------------------------
-    question_rules: dict[str, Any] = {}
-
-    for e in exams:
-        raw = e.question_rules
-        try:
-            rules = json.loads(raw) if isinstance(raw, str) else (raw or {})
-        except Exception:
-            rules = {}
-
-        for k, v in rules.items():
-            if k not in question_rules:
-                question_rules[k] = v
-
-    def get_rule_min(rule):
-        if not isinstance(rule, dict):
-            return None
-        for k in ("minToCount", "min", "min_to_count"):
-            if k in rule:
-                try:
-                    return int(rule[k])
-                except Exception:
-                    pass
-        return None
-
-    # -------------------------------
-    # CSV OUTPUT
-    # -------------------------------
-    out = io.StringIO()
-    writer = csv.writer(out)
-
-    writer.writerow([f"Academic Year: {ref.academic_year}"])
-    writer.writerow([f"Subject: {ref.subject_name} ({ref.subject_code})"])
-    writer.writerow([f"Semester: {ref.semester}"])
-    writer.writerow([f"Exam Type: {ref.exam_type}"])
-    writer.writerow([])
-
-    header = ["Roll No", "Section"]
-    for main in main_order:
-        for sub in subs_by_main[main]:
-            header.append(sub)
-        header.append(f"Total_{main}")
-    header.append("Grand_Total")
-    writer.writerow(header)
-
-    # -------------------------------
-    # DATA ROWS
-    # -------------------------------
-    for s in students:
-        row = [s.roll_no, student_section.get(s.id, "")]
-        grand_total = 0.0
-
-        for main in main_order:
-            subs = subs_by_main[main]
-            values: list[float] = []
-
-            for lbl in subs:
-                v = marks_map.get((s.id, lbl))
-                row.append("" if v is None else v)
-                if v is not None:
-                    values.append(v)
-
-            rule = question_rules.get(main)
-            N = get_rule_min(rule)
-
-            if N:
-                values.sort(reverse=True)
-                main_total = sum(values[:N])
-            else:
-                main_total = sum(values)
-
-            if isinstance(main_total, int) or main_total == int(main_total):
-                row.append(int(main_total))
-            else:
-                row.append(round(float(main_total), 2))
-
-            grand_total += main_total
-
-        #  GRAND TOTAL 
-        if isinstance(grand_total, int) or grand_total == int(grand_total):
-            row.append(int(grand_total))
-        else:
-            row.append(round(float(grand_total), 2))
-
-        writer.writerow(row)
-
-
-    out.seek(0)
-
-    filename = (
-        f"{ref.subject_code}_{ref.subject_name}_"
-        f"{ref.exam_type}_Sem{ref.semester}_{ref.academic_year}_MERGED.csv"
-    )
-
-    response = StreamingResponse(
-        iter([out.getvalue().encode("utf-8")]),
-        media_type="text/csv",
-    )
-    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    sheet = merged_exam_sheet(db, exams)
+    return _csv_response(sheet["filename"], sheet_csv(sheet))
 
 
 @router.get("/{exam_id}/export")
 def export_exam_csv(
     exam_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
@@ -1058,19 +1148,9 @@ def export_exam_csv(
 
     #  ADMIN → MERGED EXPORT
     if current_user.role == "admin":
-        exams = (
-            db.query(Exam)
-            .filter(
-                Exam.subject_code == exam.subject_code,
-                Exam.subject_name == exam.subject_name,
-                Exam.exam_type == exam.exam_type,
-                Exam.semester == exam.semester,
-                Exam.academic_year == exam.academic_year,
-            )
-            .all()
-        )
-
-        exam_ids = [e.id for e in exams]
+        exam_ids = [
+            row.id for row in db.query(Exam.id).filter(Exam.logical_filter(exam.logical_key())).all()
+        ]
 
         return export_merged_exam_csv(
             payload={"exam_ids": exam_ids},
@@ -1137,43 +1217,21 @@ def delete_exams_by_academic_year(
         )
 
 
-    # subquery of exams for the academic year
-    exam_ids_subquery = (
-        db.query(Exam.id)
-        .filter(Exam.academic_year == academic_year)
-        .subquery()
-    )
-
     try:
-        #  delete marks
-        db.execute(
-            delete(Mark).where(
-                Mark.exam_id.in_(exam_ids_subquery)
-            )
-        )
-
-        # delete questions
-        db.execute(
-            delete(Question).where(
-                Question.exam_id.in_(exam_ids_subquery)
-            )
-        )
-
-        # delete exam sections
-        db.execute(
-            delete(ExamSection).where(
-                ExamSection.exam_id.in_(exam_ids_subquery)
-            )
-        )
-
-        #  delete exams
+        # partitioned marks/students go with their partitions; everything
+        # else under the exams is removed by ON DELETE CASCADE
+        drop_year_partitions(db, academic_year)
         db.execute(
             delete(Exam).where(
                 Exam.academic_year == academic_year
             )
         )
 
+        invalidate_sections()
+        invalidate_layouts()
         db.commit()
+        invalidate_sections()
+        invalidate_layouts()
 
     
     except Exception as e:
@@ -9,11 +9,15 @@ from app.api.dependencies import get_current_user
 from app.models.user import User
 from app.models.programme import Programme
 from app.schemas.programme import ProgrammeCreate, ProgrammeOut
+from app.core.cache import get_cache
 import re
 from sqlalchemy import func
 
 router = APIRouter()
 
+# catalog and programme lists change rarely; any write drops the whole namespace
+CATALOG_CACHE = "catalog"
+
 def normalize_base_programme(name: str) -> str:
     """
     Removes 'part X', 'part-X', 'part I', etc. (case-insensitive)
@@ -30,17 +34,23 @@ def get_subjects_catalog(
     semester: int = Query(..., description="Semester number"),
     db: Session = Depends(get_db),
 ):
-    subjects = (
-        db.query(SubjectCatalog)
-        .filter(
-            SubjectCatalog.programme == programme,
-            SubjectCatalog.semester == semester,
-            SubjectCatalog.is_active == True,
+    def load():
+        subjects = (
+            db.query(SubjectCatalog)
+            .filter(
+                SubjectCatalog.programme == programme,
+                SubjectCatalog.semester == semester,
+                SubjectCatalog.is_active == True,
+            )
+            .order_by(SubjectCatalog.subject_code.asc())
+            .all()
         )
-        .order_by(SubjectCatalog.subject_code.asc())
-        .all()
-    )
-    return subjects
+        return [
+            {"id": s.id, "subject_code": s.subject_code, "subject_name": s.subject_name}
+            for s in subjects
+        ]
+
+    return get_cache().get_or_set(CATALOG_CACHE, f"subjects:{programme}:{semester}", load)
 
 
 @router.post("/catalog", status_code=201)
@@ -82,13 +92,20 @@ def add_subject_to_catalog(
     db.add(subject)
     db.commit()
     db.refresh(subject)
+    get_cache().invalidate(CATALOG_CACHE)
 
     return subject
 
 
 @router.get("/catalog/programmes", response_model=list[ProgrammeOut])
 def get_programmes(db: Session = Depends(get_db)):
-    return db.query(Programme).order_by(Programme.name).all()
+    def load():
+        return [
+            ProgrammeOut.model_validate(p).model_dump()
+            for p in db.query(Programme).order_by(Programme.name).all()
+        ]
+
+    return get_cache().get_or_set(CATALOG_CACHE, "programmes", load)
 
 
 @router.delete("/catalog/{subject_id}")
@@ -114,6 +131,7 @@ def deactivate_subject(
 
     subject.is_active = 0
     db.commit()
+    get_cache().invalidate(CATALOG_CACHE)
 
     return {"status": "ok", "message": "Subject removed from catalog"}
 
@@ -196,6 +214,7 @@ def create_programme(
     db.add(programme)
     db.commit()
     db.refresh(programme)
+    get_cache().invalidate(CATALOG_CACHE)
 
     return programme
 
@@ -0,0 +1,104 @@
+# backend/app/archive.py
+"""
+Archive a past academic year.
+
+    cd backend
+    python -m app.archive 2023-2024            # write ARCHIVE_DIR/2023-2024.gfa
+    python -m app.archive 2023-2024 --purge    # ... then delete the year's exams
+    python -m app.archive --list               # archived years
+
+The archive is written to a temporary file, renamed into place and read
+back; rows are only purged once its counts match the database. Purging
+refuses to drop exams that are not finalized unless --force is given.
+Archived years stay readable through the /archive routes.
+
+Purging drops the cached section indexes and question layouts. With a
+shared cache backend (CACHE_BACKEND sqlite or redis) the running API
+workers see that; with the in-process ``memory`` backend they cannot, so
+--purge warns that they must be restarted.
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy import delete, func, select
+
+logger = logging.getLogger(__name__)
+
+
+def archive_year(db, academic_year: str, purge: bool = False, force: bool = False) -> dict:
+    """Write the archive of ``academic_year`` and optionally purge its rows; returns the summary."""
+    from app.models.exam import Exam, Mark, Student
+    from app.utils.archive import ArchiveError, write_archive
+    from app.utils.layout import invalidate_layouts
+    from app.utils.partitions import drop_year_partitions
+    from app.utils.sections import invalidate_sections
+
+    year_exams = select(Exam.id).where(Exam.academic_year == academic_year)
+    unlocked = db.query(Exam).filter(Exam.academic_year == academic_year, Exam.is_locked == False).count()  # noqa: E712
+    if purge and unlocked and not force:
+        raise ArchiveError(f"{unlocked} exam(s) of {academic_year} are not finalized; use --force to purge anyway")
+
+    summary = write_archive(db, academic_year)
+    expected = {
+        "exams": db.query(Exam).filter(Exam.academic_year == academic_year).count(),
+        "students": db.query(func.count(Student.id)).filter(Student.exam_id.in_(year_exams)).scalar(),
+        "marks": db.query(func.count(Mark.id)).filter(Mark.exam_id.in_(year_exams)).scalar(),
+    }
+    for table, count in expected.items():
+        if summary[table] != count:
+            raise ArchiveError(f"archive holds {summary[table]} {table}, database has {count}; nothing purged")
+    summary["unlocked"] = unlocked
+
+    if purge:
+        # everything under the exams is removed by ON DELETE CASCADE, or
+        # with the year's partitions when marks are partitioned
+        drop_year_partitions(db, academic_year)
+        db.execute(delete(Exam).where(Exam.academic_year == academic_year))
+        invalidate_sections()
+        invalidate_layouts()
+        db.commit()
+        invalidate_sections()
+        invalidate_layouts()
+        summary["purged"] = True
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("academic_year", nargs="?", help="academic year to archive, e.g. 2023-2024")
+    parser.add_argument("--purge", action="store_true", help="delete the year's exams once archived")
+    parser.add_argument("--force", action="store_true", help="purge even if some exams are not finalized")
+    parser.add_argument("--list", action="store_true", help="list archived years")
+    args = parser.parse_args(argv)
+
+    from app.core.cache import get_cache
+    from app.database import SessionLocal
+    from app.utils.archive import ArchiveError, list_archives
+
+    if args.list:
+        for summary in list_archives():
+            print(summary)
+        return 0
+    if not args.academic_year:
+        parser.error("academic_year is required")
+
+    db = SessionLocal()
+    try:
+        summary = archive_year(db, args.academic_year, purge=args.purge, force=args.force)
+    except ArchiveError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    print(summary)
+    if summary.get("purged") and not get_cache().backend.shared:
+        # this process's cache is not the API's: nothing reached the workers
+        print("warning: the cache backend is not shared between processes; restart the API so its "
+              "workers drop cached sections and question layouts of the purged exams", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,473 @@
+# backend/app/core/cache.py
+"""
+Pluggable cache shared by every worker process.
+
+CACHE_BACKEND selects the store:
+
+* ``memory``  - in-process LRU (default; one worker only)
+* ``sqlite``  - a SQLite file shared by all workers on one host (CACHE_URL is the path)
+* ``redis``   - any Redis-compatible server (CACHE_URL is a redis:// URL; needs the
+                ``redis`` package)
+
+Keys live in namespaces. ``invalidate(namespace)`` bumps a generation counter
+stored in the backend, so every worker stops seeing the old entries at once,
+and publishes an invalidation message on the backend's bus so workers can drop
+per-process state (compiled objects, indexes) built from the same data.
+
+Values must be plain JSON data. The shared backends store them as JSON, so
+tuples come back as lists and dict keys as strings.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    CACHE_BACKEND,
+    CACHE_DEFAULT_TTL,
+    CACHE_MAX_ENTRIES,
+    CACHE_POLL_INTERVAL,
+    CACHE_URL,
+    WEB_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "invalidate"
+
+# identifies this worker on the message bus so it can skip its own messages;
+# the pid is read each time so forked workers do not share an identity
+_ORIGIN_TOKEN = uuid.uuid4().hex[:8]
+
+
+def _origin() -> str:
+    return f"{os.getpid()}-{_ORIGIN_TOKEN}"
+
+
+# JSON rather than pickle: whoever can write to the cache file or server must
+# not be able to run code in the workers reading it
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _loads(raw) -> Any:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        # not JSON (e.g. written by an older release): treat as a miss
+        return None
+
+
+class CacheBackend:
+    """Key/value store plus a broadcast channel between workers."""
+
+    # True when other processes see the same data (needs the message listener)
+    shared = False
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set only if the key is absent; returns True when it was stored."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to an integer counter; ``ttl`` applies when it is created."""
+        raise NotImplementedError
+
+    def publish(self, channel: str, payload: str) -> None:
+        pass
+
+    def listen(self, handler: Callable[[str, str], None], stop: threading.Event) -> None:
+        """Block, calling ``handler(channel, payload)`` for messages from other workers."""
+        stop.wait()
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return None if item is None else item[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                value = amount
+                self._store(key, value, ttl)
+            else:
+                value = item[0] + amount
+                self._data[key] = (value, item[1])
+            return value
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, exp) in self._data.items() if exp is not None and exp < now]
+            for k in expired:
+                del self._data[k]
+        return len(expired)
+
+
+class SQLiteBackend(CacheBackend):
+    """Cache file shared by the workers of one host (WAL mode, one connection per thread)."""
+
+    shared = True
+
+    def __init__(self, path: str, poll_interval: float = CACHE_POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL,"
+            " payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return None if row is None else _loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, _dumps(value), time.time() + ttl if ttl else None),
+        )
+        # expired rows are only skipped by reads; clear them out now and then
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.purge_expired()
+
+    def add(self, key, value, ttl=None):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _dumps(value), now + ttl if ttl else None),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def incr(self, key, amount=1, ttl=None):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                value = amount
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, _dumps(value), now + ttl if ttl else None),
+                )
+            else:
+                value = (_loads(row[0]) or 0) + amount
+                conn.execute("UPDATE cache_entries SET value = ? WHERE key = ?", (_dumps(value), key))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def publish(self, channel, payload):
+        self._conn().execute(
+            "INSERT INTO cache_messages (channel, payload, created_at) VALUES (?, ?, ?)",
+            (channel, payload, time.time()),
+        )
+
+    def listen(self, handler, stop):
+        conn = self._conn()
+        cursor = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_messages").fetchone()[0]
+        while not stop.wait(self.poll_interval):
+            rows = conn.execute(
+                "SELECT id, channel, payload FROM cache_messages WHERE id > ? ORDER BY id LIMIT 1000",
+                (cursor,),
+            ).fetchall()
+            for msg_id, channel, payload in rows:
+                cursor = msg_id
+                handler(channel, payload)
+
+    def purge_expired(self):
+        conn = self._conn()
+        now = time.time()
+        purged = conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,)).rowcount
+        # listeners poll every CACHE_POLL_INTERVAL seconds; a minute of history is plenty
+        conn.execute("DELETE FROM cache_messages WHERE created_at < ?", (now - 60,))
+        return purged
+
+
+class RedisBackend(CacheBackend):
+    """Redis or any server speaking its protocol (Valkey, KeyDB, Dragonfly...)."""
+
+    shared = True
+    prefix = "gradeflow:"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._redis.get(self.prefix + key)
+        # counters written by INCRBY are plain integers, which are JSON too
+        return None if raw is None else _loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self.prefix + key, _dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._redis.set(self.prefix + key, _dumps(value), nx=True,
+                                    px=int(ttl * 1000) if ttl else None))
+
+    def delete(self, key):
+        self._redis.delete(self.prefix + key)
+
+    def incr(self, key, amount=1, ttl=None):
+        pipe = self._redis.pipeline()
+        pipe.incrby(self.prefix + key, amount)
+        if ttl:
+            pipe.pexpire(self.prefix + key, int(ttl * 1000), nx=True)
+        return int(pipe.execute()[0])
+
+    def publish(self, channel, payload):
+        self._redis.publish(self.prefix + channel, payload)
+
+    def listen(self, handler, stop):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.prefix + "*")
+        try:
+            while not stop.is_set():
+                msg = pubsub.get_message(timeout=1.0)
+                if msg and msg["type"] == "pmessage":
+                    channel = msg["channel"].decode()[len(self.prefix):]
+                    handler(channel, msg["data"].decode())
+        finally:
+            pubsub.close()
+
+
+class Cache:
+    """Namespaced cache on top of a backend, with cross-worker messages.
+
+    Values returned from an in-process backend are the stored objects
+    themselves; callers must not mutate them.
+    """
+
+    def __init__(self, backend: CacheBackend, default_ttl: Optional[float] = CACHE_DEFAULT_TTL):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._subscribers: Dict[str, List[Callable[[dict], None]]] = defaultdict(list)
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # ---------- values ----------
+
+    def _key(self, namespace: str, key: Any) -> str:
+        generation = self.backend.get(f"gen:{namespace}") or 0
+        return f"{namespace}:{generation}:{key}"
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        value = self.backend.get(self._key(namespace, key))
+        return default if value is None else value
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(self._key(namespace, key), value, ttl or self.default_ttl)
+
+    def get_or_set(self, namespace: str, key: Any, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        full_key = self._key(namespace, key)
+        value = self.backend.get(full_key)
+        if value is None:
+            value = factory()
+            self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def delete(self, namespace: str, key: Any) -> None:
+        self.backend.delete(self._key(namespace, key))
+        self.publish(INVALIDATE_CHANNEL, {"ns": namespace, "key": str(key)})
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every entry of ``namespace`` in all workers."""
+        self.backend.incr(f"gen:{namespace}")
+        self.publish(INVALIDATE_CHANNEL, {"ns": namespace, "key": None})
+
+    # ---------- versioned entries ----------
+    #
+    # For values loaded from the database: take the slot *before* the query
+    # and store under it afterwards. Writers bump the key inside their
+    # transaction and again after committing, so a reader that loaded the
+    # pre-commit rows stored them in a slot nobody reads any more.
+
+    def slot(self, namespace: str, key: Any) -> str:
+        """Backend key of ``key`` at its current version (and namespace generation)."""
+        version = self.backend.get(f"ver:{namespace}:{key}") or 0
+        return f"{self._key(namespace, key)}@{version}"
+
+    def get_at(self, slot: str, default: Any = None) -> Any:
+        value = self.backend.get(slot)
+        return default if value is None else value
+
+    def set_at(self, slot: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(slot, value, ttl or self.default_ttl)
+
+    def bump(self, namespace: str, key: Any) -> None:
+        """Move ``key`` to a new slot in all workers."""
+        self.backend.incr(f"ver:{namespace}:{key}")
+        self.publish(INVALIDATE_CHANNEL, {"ns": namespace, "key": str(key)})
+
+    # ---------- messages ----------
+
+    def publish(self, channel: str, message: dict) -> None:
+        # local subscribers first, then the other workers
+        self._dispatch(channel, message)
+        if self.backend.shared:
+            self.backend.publish(channel, json.dumps({"origin": _origin(), "data": message}))
+
+    def subscribe(self, channel: str, callback: Callable[[dict], None]) -> None:
+        self._subscribers[channel].append(callback)
+        if self.backend.shared:
+            self._start_listener()
+
+    def on_invalidate(self, namespace: str, callback: Callable[[Optional[str]], None]) -> None:
+        """Call ``callback(key)`` when ``namespace`` (key None) or one of its keys is invalidated."""
+        def handler(message):
+            if message.get("ns") == namespace:
+                callback(message.get("key"))
+        self.subscribe(INVALIDATE_CHANNEL, handler)
+
+    def _dispatch(self, channel: str, message: dict) -> None:
+        for callback in list(self._subscribers.get(channel, ())):
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Cache subscriber for %s failed", channel)
+
+    def _on_remote(self, channel: str, payload: str) -> None:
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            return
+        if envelope.get("origin") != _origin():
+            self._dispatch(channel, envelope.get("data") or {})
+
+    def _start_listener(self) -> None:
+        with self._lock:
+            if self._listener is not None:
+                return
+
+            def run():
+                while not self._stop.is_set():
+                    try:
+                        self.backend.listen(self._on_remote, self._stop)
+                    except Exception:
+                        logger.exception("Cache message listener failed; retrying")
+                        self._stop.wait(1.0)
+
+            self._listener = threading.Thread(target=run, name="cache-listener", daemon=True)
+            self._listener.start()
+
+    def purge_expired(self) -> int:
+        return self.backend.purge_expired()
+
+
+def build_backend(kind: str = CACHE_BACKEND, url: Optional[str] = CACHE_URL) -> CacheBackend:
+    kind = (kind or "memory").lower()
+    if kind == "memory":
+        if WEB_CONCURRENCY > 1:
+            logger.warning(
+                "CACHE_BACKEND=memory with WEB_CONCURRENCY=%s: worker caches will diverge; "
+                "use CACHE_BACKEND=sqlite or redis", WEB_CONCURRENCY,
+            )
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(url or "./gradeflow-cache.sqlite3")
+    if kind == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    raise RuntimeError(f"Unknown CACHE_BACKEND: {kind}")
+
+
+@lru_cache(maxsize=None)
+def get_cache() -> Cache:
+    return Cache(build_backend())
@@ -7,3 +7,71 @@ load_dotenv()
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 EMAIL_FROM = os.getenv("EMAIL_FROM", "GradeFlow <onboarding@resend.dev>")
 APP_BASE_URL = getenv("APP_BASE_URL", "https://grade-frontend-vercel.vercel.app/")
+
+# Request instrumentation (Server-Timing headers and /metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token required by /metrics
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() in ("1", "true", "yes")  # serve /metrics without a token
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "50"))  # queries per request before N+1 warning
+
+# Shared cache (see app/core/cache.py). Use sqlite or redis with more than one worker.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | sqlite | redis
+CACHE_URL = os.getenv("CACHE_URL")  # sqlite file path or redis:// URL
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_POLL_INTERVAL = float(os.getenv("CACHE_POLL_INTERVAL", "0.5"))  # sqlite message bus
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Create missing tables on import. Deployments turn this off and run
+# `python -m app.migrate` as a release step instead (see app/migrate.py).
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "true").lower() in ("1", "true", "yes")
+
+# Reporting reads go to DATABASE_READ_URL when it is set (see app/database.py);
+# after a write, that client reads from the primary for this many seconds
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "10"))
+
+# Marks and students are LIST partitioned by academic year on Postgres; turn
+# on once `python -m app.partition` has converted them (see app/utils/partitions.py)
+DB_PARTITION_BY_YEAR = os.getenv("DB_PARTITION_BY_YEAR", "false").lower() in ("1", "true", "yes")
+
+# Stateless auth: authorize requests from the token claims plus an in-memory
+# epoch table instead of loading the user row (see app/core/token_epochs.py)
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() in ("1", "true", "yes")
+AUTH_EPOCH_REFRESH = float(os.getenv("AUTH_EPOCH_REFRESH", "60"))  # seconds between table reloads
+
+# Refresh-token sessions (see app/core/sessions.py)
+REFRESH_REUSE_GRACE = float(os.getenv("REFRESH_REUSE_GRACE", "30"))  # seconds a rotated token may race its successor
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "600"))  # 0 disables the background sweeper
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "1000"))
+
+# Rate limits for /auth/login and /auth/forgot-password as "hits/seconds",
+# per client IP and per email (see app/core/rate_limit.py)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+LOGIN_RATE_LIMIT = (os.getenv("LOGIN_RATE_LIMIT_IP", "30/300"), os.getenv("LOGIN_RATE_LIMIT_EMAIL", "10/900"))
+FORGOT_PASSWORD_RATE_LIMIT = (os.getenv("FORGOT_PASSWORD_RATE_LIMIT_IP", "10/3600"), os.getenv("FORGOT_PASSWORD_RATE_LIMIT_EMAIL", "3/3600"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # per limit, in-process counters
+# keep counters in the shared cache backend; unset = only when that backend is shared
+RATE_LIMIT_SHARED = {"true": True, "false": False}.get(os.getenv("RATE_LIMIT_SHARED", "").lower())
+
+# Columnar archives of past academic years (see app/utils/archive.py)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+
+# save_marks requests for one exam arriving while it is being written are
+# queued and written together (see app/core/write_queue.py)
+MARKS_WRITE_MAX_BATCH = int(os.getenv("MARKS_WRITE_MAX_BATCH", "50"))  # saves per flush
+
+# POST /exams/marks:batchGet streams NDJSON above this many marks
+MARKS_BATCH_STREAM_CELLS = int(os.getenv("MARKS_BATCH_STREAM_CELLS", "20000"))
+
+# GET /exams/admin/extract (see app/utils/extract.py)
+EXTRACT_BATCH_ROWS = int(os.getenv("EXTRACT_BATCH_ROWS", "5000"))  # rows per cursor fetch
+EXTRACT_CHUNK_BYTES = int(os.getenv("EXTRACT_CHUNK_BYTES", "65536"))  # bytes per response chunk
+
+# Idempotency-Key responses for retried writes (see app/core/idempotency.py)
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))  # seconds a key is remembered
+
+# Live exam events over Server-Sent Events (see app/core/live.py)
+LIVE_EVENTS_ENABLED = os.getenv("LIVE_EVENTS_ENABLED", "true").lower() in ("1", "true", "yes")
+LIVE_HEARTBEAT = float(os.getenv("LIVE_HEARTBEAT", "15"))  # seconds between keep-alive comments
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "256"))  # events buffered per client before it must resync
+LIVE_MAX_CELLS = int(os.getenv("LIVE_MAX_CELLS", "2000"))  # larger saves are announced without their cells
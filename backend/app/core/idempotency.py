@@ -0,0 +1,86 @@
+# backend/app/core/idempotency.py
+"""
+Idempotency keys for retried writes.
+
+A client sends ``Idempotency-Key: <random>`` with POST /exams/ or
+POST /exams/{id}/marks and reuses the key when it retries the same request.
+The route stores its JSON response under (user, key) in the same
+transaction as the write; a retry with that key gets the stored response
+back without touching exams, students or marks. Two copies racing each
+other are settled by the unique index: the loser rolls back and replays
+the winner's response.
+
+Only SHA-256 digests of the key and of the request are kept, with the
+response body, for IDEMPOTENCY_TTL seconds. Expired rows are deleted by
+the session sweeper (app/core/sessions.py).
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import IDEMPOTENCY_TTL
+from app.core.metrics import registry
+from app.models.idempotency import IdempotencyRecord
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+registry.describe("gradeflow_idempotent_replays_total", "counter", "Writes answered from a stored Idempotency-Key response")
+
+
+def _utcnow() -> datetime:
+    # stored naive, in UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def request_digest(scope: str, payload: BaseModel) -> str:
+    """Digest of the endpoint (``scope``) and request body a key was first used with."""
+    return _sha256(f"{scope}\n{payload.model_dump_json()}")
+
+
+def stored_response(db: Session, user_id: int, key: str, digest: str) -> Optional[JSONResponse]:
+    """The response recorded for ``key``, or None if the request has not completed yet."""
+    record = (
+        db.query(IdempotencyRecord)
+        .filter(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key_hash == _sha256(key))
+        .first()
+    )
+    if record is None or record.expires_at < _utcnow():
+        return None
+    if record.request_hash != digest:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    registry.inc("gradeflow_idempotent_replays_total")
+    return JSONResponse(
+        json.loads(record.response),
+        status_code=record.status_code,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def remember_response(db: Session, user_id: int, key: str, digest: str, body, status_code: int = 200) -> None:
+    """Store ``body`` as the response for ``key``; the caller commits it with the write."""
+    now = _utcnow()
+    # an expired row for the same key would block the unique index
+    db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.user_id == user_id,
+        IdempotencyRecord.key_hash == _sha256(key),
+        IdempotencyRecord.expires_at < now,
+    ).delete(synchronize_session=False)
+    db.add(IdempotencyRecord(
+        user_id=user_id,
+        key_hash=_sha256(key),
+        request_hash=digest,
+        status_code=status_code,
+        response=json.dumps(body, separators=(",", ":"), default=str),
+        created_at=now,
+        expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL),
+    ))
@@ -0,0 +1,140 @@
+# backend/app/core/live.py
+"""
+Live exam events for open marks pages, pushed as Server-Sent Events.
+
+Routes publish an event after their commit (cell deltas from save_marks,
+finalize / unfinalize) to one or more topics: ``exam:<id>`` for the
+teachers of an exam and ``logical:<key>`` for admins watching the whole
+logical exam. Events travel over the cache message bus (``live`` channel),
+so with a shared cache backend a client connected to any worker receives
+events published by every other worker.
+
+Each connected client has a bounded queue. A client that falls behind gets
+a single ``resync`` event and is expected to refetch the grid.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from app.core.config import LIVE_EVENTS_ENABLED, LIVE_HEARTBEAT, LIVE_QUEUE_SIZE
+from app.core.metrics import registry
+
+LIVE_CHANNEL = "live"
+
+registry.describe("gradeflow_live_events_total", "counter", "Live events published by type")
+registry.describe("gradeflow_live_streams_total", "counter", "Live event streams opened")
+
+
+def exam_topic(exam_id: int) -> str:
+    return f"exam:{exam_id}"
+
+
+def logical_topic(key: tuple) -> str:
+    digest = hashlib.sha1(json.dumps(list(key), default=str).encode()).hexdigest()[:16]
+    return f"logical:{digest}"
+
+
+class _Listener:
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def push(self, event: dict) -> None:
+        # called from whichever thread delivered the message
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # drop the backlog; the client refetches instead
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "reason": "overflow"})
+
+
+class LiveHub:
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._listeners: Dict[str, Set[_Listener]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def _register(self) -> None:
+        if self._registered:
+            return
+        from app.core.cache import get_cache
+
+        with self._lock:
+            if not self._registered:
+                get_cache().subscribe(LIVE_CHANNEL, self._deliver)
+                self._registered = True
+
+    def publish(self, topics: Iterable[str], event: dict) -> None:
+        """Send ``event`` to every client listening on any of ``topics``, in all workers."""
+        if not LIVE_EVENTS_ENABLED:
+            return
+        from app.core.cache import get_cache
+
+        self._register()
+        event = {**event, "ts": time.time()}
+        registry.inc("gradeflow_live_events_total", {"type": event.get("type", "")})
+        get_cache().publish(LIVE_CHANNEL, {"topics": list(topics), "event": event})
+
+    def _deliver(self, message: dict) -> None:
+        event = message.get("event") or {}
+        with self._lock:
+            targets = set()
+            for topic in message.get("topics") or []:
+                targets.update(self._listeners.get(topic, ()))
+        for listener in targets:
+            listener.push(event)
+
+    def listeners(self, topic: str) -> int:
+        with self._lock:
+            return len(self._listeners.get(topic, ()))
+
+    async def stream(self, topics: List[str], heartbeat: float = LIVE_HEARTBEAT) -> AsyncIterator[Optional[dict]]:
+        """Events for ``topics`` as they arrive; None every ``heartbeat`` idle seconds."""
+        self._register()
+        listener = _Listener(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            for topic in topics:
+                self._listeners[topic].add(listener)
+        registry.inc("gradeflow_live_streams_total")
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(listener.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.get("type") == "resync":
+                    return
+        finally:
+            with self._lock:
+                for topic in topics:
+                    self._listeners[topic].discard(listener)
+                    if not self._listeners[topic]:
+                        del self._listeners[topic]
+
+
+@lru_cache(maxsize=None)
+def get_hub() -> LiveHub:
+    return LiveHub()
+
+
+def sse_format(event: Optional[dict]) -> str:
+    if event is None:
+        return ": ping\n\n"
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
@@ -0,0 +1,249 @@
+# backend/app/core/metrics.py
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from app.core.config import METRICS_ENABLED, QUERY_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# latency buckets (seconds) for the request histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# a single statement repeated this many times in one request is reported as N+1
+REPEATED_STATEMENT_THRESHOLD = 10
+
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    db_time: float = 0.0
+    queries: int = 0
+    rows: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+    @property
+    def wall_time(self) -> float:
+        return time.perf_counter() - self.started
+
+
+# Stats of the request being served. The object is mutable on purpose: sync
+# routes run in the threadpool with a *copy* of the context, so they must
+# update the same instance the middleware created instead of re-binding it.
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("gradeflow_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+class MetricsRegistry:
+    """Tiny in-process metrics store rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], list] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._meta.setdefault(name, (kind, help_text))
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0) -> None:
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Optional[Dict[str, str]], value: float) -> None:
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # [bucket counts..., +Inf count, sum]
+                hist = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+                self._histograms[key] = hist
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += value
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+
+        lines = []
+        for name in sorted({k[0] for k in counters} | {k[0] for k in histograms}):
+            kind, help_text = self._meta.get(name, ("counter", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for (n, labels), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    bucket_labels = labels + (("le", str(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {hist[i]}")
+                inf_labels = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{_format_labels(inf_labels)} {hist[len(LATENCY_BUCKETS)]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(hist[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist[len(LATENCY_BUCKETS)]}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(round(value, 6))
+
+
+registry = MetricsRegistry()
+registry.describe("gradeflow_http_requests_total", "counter", "HTTP requests served")
+registry.describe("gradeflow_http_request_duration_seconds", "histogram", "Wall time per request")
+registry.describe("gradeflow_db_time_seconds_total", "counter", "Time spent in DB cursor execution")
+registry.describe("gradeflow_db_queries_total", "counter", "SQL statements executed")
+registry.describe("gradeflow_db_rows_total", "counter", "Rows loaded or affected by SQL statements")
+registry.describe("gradeflow_query_budget_exceeded_total", "counter", "Requests that exceeded QUERY_BUDGET or repeated a statement (N+1)")
+
+
+# ---------- SQLAlchemy hooks ----------
+
+# The start time is kept on the statement's execution context rather than on
+# the connection: a statement that fails never reaches after_cursor_execute,
+# and its start time then goes away with its context instead of being paired
+# with the next statement's end.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._gradeflow_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = getattr(context, "_gradeflow_started", None)
+    if started is not None:
+        stats.db_time += time.perf_counter() - started
+    stats.queries += 1
+    stats.statements[statement] += 1
+    # SELECT rows are counted as the ORM loads them (see _on_loaded); here we
+    # only add rows affected by INSERT/UPDATE/DELETE
+    is_dml = context is not None and (context.isinsert or context.isupdate or context.isdelete)
+    if is_dml and cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def _on_loaded(session, instance):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def instrument_engine(engine) -> None:
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def instrument_sessions(session_factory) -> None:
+    from sqlalchemy import event
+
+    event.listen(session_factory, "loaded_as_persistent", _on_loaded)
+
+
+# ---------- ASGI middleware ----------
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    # some FastAPI versions keep included routes relative to the router
+    # prefix; recover the prefix from the request path
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for i, ch in enumerate(path):
+            if ch == "/" and i and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+def _record(scope, status: int, stats: RequestStats) -> None:
+    labels = {"method": scope.get("method", ""), "route": _route_name(scope)}
+    wall = stats.wall_time
+
+    registry.inc("gradeflow_http_requests_total", {**labels, "status": str(status)})
+    registry.observe("gradeflow_http_request_duration_seconds", labels, wall)
+    registry.inc("gradeflow_db_time_seconds_total", labels, stats.db_time)
+    registry.inc("gradeflow_db_queries_total", labels, stats.queries)
+    registry.inc("gradeflow_db_rows_total", labels, stats.rows)
+
+    # N+1 detector: too many statements overall, or one statement repeated
+    repeated_sql, repeated = (stats.statements.most_common(1) or [("", 0)])[0]
+    if stats.queries > QUERY_BUDGET or repeated >= REPEATED_STATEMENT_THRESHOLD:
+        registry.inc("gradeflow_query_budget_exceeded_total", labels)
+        logger.warning(
+            "Query budget exceeded: %s %s issued %s queries (budget %s), most repeated x%s: %s",
+            labels["method"], labels["route"], stats.queries, QUERY_BUDGET,
+            repeated, " ".join(repeated_sql.split())[:200],
+        )
+
+
+def _server_timing(stats: RequestStats) -> bytes:
+    return (
+        f'app;dur={stats.wall_time * 1000:.2f}, '
+        f'db;dur={stats.db_time * 1000:.2f};desc="queries={stats.queries} rows={stats.rows}"'
+    ).encode("latin-1")
+
+
+class RequestMetricsMiddleware:
+    """Records wall time, DB time, query and row counts for each HTTP request.
+
+    The numbers are sent back as a ``Server-Timing`` header and aggregated per
+    route for the ``/metrics`` endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            _record(scope, status, stats)
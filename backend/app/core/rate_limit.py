@@ -0,0 +1,162 @@
+# backend/app/core/rate_limit.py
+"""
+Sliding-window rate limits for the unauthenticated auth endpoints.
+
+Each limit counts hits per key (client IP, email) in fixed windows and
+estimates the sliding-window rate as
+
+    previous_window_count * (1 - elapsed_fraction) + current_window_count
+
+which needs two counters per key instead of a log of timestamps. Checks run
+before any DB query or password hashing; over-limit requests get a 429 with
+Retry-After.
+
+Counters live in this process by default. With a shared cache backend
+(CACHE_BACKEND=sqlite|redis) they are kept there instead so all workers see
+the same counts; RATE_LIMIT_SHARED overrides the choice.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.core.config import (
+    FORGOT_PASSWORD_RATE_LIMIT,
+    LOGIN_RATE_LIMIT,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_SHARED,
+)
+from app.core.metrics import registry
+
+registry.describe("gradeflow_rate_limit_total", "counter", "Rate-limited endpoint hits by limit and outcome")
+
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """``"10/60"`` -> (10 hits, 60 seconds)."""
+    count, _, seconds = spec.partition("/")
+    return int(count), float(seconds or 60)
+
+
+def _retry_after(limit: int, window: float, elapsed: float, current: float, previous: float) -> int:
+    # seconds until previous * (1 - t/window) + current drops below limit
+    if current >= limit or previous <= 0:
+        return max(1, math.ceil(window - elapsed))
+    fraction = 1 - (limit - current) / previous
+    return max(1, math.ceil(fraction * window - elapsed))
+
+
+class SlidingWindowLimiter:
+    def __init__(self, name: str, limit: int, window: float, shared: Optional[bool] = None,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._shared = shared
+        # key -> [window index, current count, previous count]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        if self._shared is None:
+            from app.core.cache import get_cache
+
+            self._shared = get_cache().backend.shared if RATE_LIMIT_SHARED is None else RATE_LIMIT_SHARED
+        return self._shared
+
+    def hit(self, key: str) -> Optional[int]:
+        """Count one hit for ``key``; returns None if allowed, else seconds to wait."""
+        now = time.time()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        if self.shared:
+            current, previous = self._hit_shared(key, index)
+        else:
+            current, previous = self._hit_local(key, index)
+
+        estimate = previous * (1 - elapsed / self.window) + current
+        if estimate <= self.limit:
+            return None
+        return _retry_after(self.limit, self.window, elapsed, current, previous)
+
+    def reset(self, key: str) -> None:
+        if self.shared:
+            from app.core.cache import get_cache
+
+            index = int(time.time() // self.window)
+            backend = get_cache().backend
+            for i in (index, index - 1):
+                backend.delete(self._shared_key(key, i))
+        else:
+            with self._lock:
+                self._counters.pop(key, None)
+
+    def _hit_local(self, key: str, index: int) -> Tuple[int, int]:
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = [index, 0, 0]
+                self._counters[key] = entry
+                if len(self._counters) > self.max_keys:
+                    self._counters.popitem(last=False)
+            elif entry[0] != index:
+                # roll the window forward; a gap of more than one window forgets everything
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[1] = 0
+                entry[0] = index
+            self._counters.move_to_end(key)
+            entry[1] += 1
+            return entry[1], entry[2]
+
+    def _shared_key(self, key: str, index: int) -> str:
+        return f"rl:{self.name}:{key}:{index}"
+
+    def _hit_shared(self, key: str, index: int) -> Tuple[int, int]:
+        from app.core.cache import get_cache
+
+        backend = get_cache().backend
+        current = backend.incr(self._shared_key(key, index), 1, ttl=self.window * 2)
+        previous = backend.get(self._shared_key(key, index - 1)) or 0
+        return current, int(previous)
+
+
+def _limiter(name: str, spec: str) -> SlidingWindowLimiter:
+    limit, window = parse_rate(spec)
+    return SlidingWindowLimiter(name, limit, window)
+
+
+# per client IP and per target email, so neither one address nor one
+# account can be hammered from many places
+login_by_ip = _limiter("login_ip", LOGIN_RATE_LIMIT[0])
+login_by_email = _limiter("login_email", LOGIN_RATE_LIMIT[1])
+forgot_by_ip = _limiter("forgot_ip", FORGOT_PASSWORD_RATE_LIMIT[0])
+forgot_by_email = _limiter("forgot_email", FORGOT_PASSWORD_RATE_LIMIT[1])
+
+
+def client_ip(request: Request) -> str:
+    # uvicorn --proxy-headers already resolves X-Forwarded-For into client.host,
+    # for requests from FORWARDED_ALLOW_IPS only (see the Dockerfile)
+    return request.client.host if request.client else "unknown"
+
+
+def enforce(*checks: Tuple[SlidingWindowLimiter, str]) -> None:
+    """Count a hit on every (limiter, key) pair; raise 429 if any is over its limit."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = 0
+    for limiter, key in checks:
+        retry = limiter.hit(key)
+        registry.inc("gradeflow_rate_limit_total", {"limit": limiter.name, "result": "rejected" if retry else "allowed"})
+        if retry:
+            wait = max(wait, retry)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts. Please try again later.",
+            headers={"Retry-After": str(wait)},
+        )
@@ -1,16 +1,18 @@
 # backend/app/core/security.py
 from datetime import datetime, timedelta, timezone
 import logging
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Dict
-from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.orm import Session
 from app.models import User
 from app.database import get_db
+from app.core.config import AUTH_STATELESS
 
 load_dotenv()
 
@@ -20,14 +22,32 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  #30 minutes
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# passlib/argon2 and jose's crypto backends are imported on first use rather
+# than at startup; most cold starts serve a request that needs neither.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
+
+
+def _jwt():
+    from jose import jwt
+
+    return jwt
+
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def token_claims(user: User) -> Dict:
+    # role/name/epoch let AUTH_STATELESS requests skip the user query
+    return {"sub": str(user.id), "role": user.role, "name": user.name, "ep": user.token_epoch or 0}
 
 
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -40,22 +60,22 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire,"type": "access"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return _jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-REFRESH_TOKEN_EXPIRE_DAYS = 7
+def decode_token(token: str) -> Dict:
+    return _jwt().decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
-def create_refresh_token(data: Dict) -> str:
-    to_encode = data.copy()
+@dataclass
+class TokenUser:
+    """Current user built from token claims in AUTH_STATELESS mode.
 
-    if "sub" in to_encode:
-        to_encode["sub"] = str(to_encode["sub"])
+    Carries what routes read from ``current_user``; use get_current_db_user
+    where the full row is needed.
+    """
+    id: int
+    role: str
+    name: Optional[str] = None
 
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({
-        "exp": expire,
-        "type": "refresh"
-    })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -73,7 +93,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     logger.debug("get_current_user: raw token prefix: %s", token[:30])
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         logger.debug("get_current_user: decoded payload: %s", payload)
         user_id = payload.get("sub")
         if user_id is None:
@@ -93,9 +113,36 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         logger.exception("Unexpected error decoding token: %s", e)
         raise credentials_exception
 
+    epoch = payload.get("ep")
+    if AUTH_STATELESS and epoch is not None and "role" in payload:
+        from app.core.token_epochs import get_epoch_table
+
+        entry = get_epoch_table().lookup(user_id)
+        if entry is not None:
+            current_epoch, active = entry
+            if not active or epoch < current_epoch:
+                logger.debug("Revoked token for user %s (epoch %s < %s)", user_id, epoch, current_epoch)
+                raise credentials_exception
+            if epoch == current_epoch:
+                return TokenUser(id=user_id, role=payload["role"], name=payload.get("name"))
+        # unknown to the table yet (new account, newer epoch): ask the DB
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         logger.error("No user found for id from token: %s", user_id)
         raise credentials_exception
+    if epoch is not None and epoch != (user.token_epoch or 0):
+        logger.debug("Revoked token for user %s (epoch %s != %s)", user_id, epoch, user.token_epoch)
+        raise credentials_exception
+
+    return user
+
 
-    return user
\ No newline at end of file
+def get_current_db_user(user=Depends(get_current_user), db: Session = Depends(get_db)) -> User:
+    """The authenticated user's row, for routes that read or modify it."""
+    if isinstance(user, User):
+        return user
+    db_user = db.query(User).filter(User.id == user.id).first()
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return db_user
\ No newline at end of file
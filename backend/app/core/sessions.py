@@ -0,0 +1,200 @@
+# backend/app/core/sessions.py
+"""
+Refresh-token sessions.
+
+Refresh tokens are opaque random strings; the ``refresh_sessions`` table keeps
+a SHA-256 of each one (unique index) with its user and expiry. Every call to
+/auth/refresh rotates the token: the presented row is marked rotated and a
+new one issued. A rotated token presented again within REFRESH_REUSE_GRACE
+seconds (a second tab or a retried request racing the first refresh) gets a
+token of its own; after that it is treated as stolen and all of that user's
+sessions are revoked. Rotated rows are kept for a day for that check.
+
+JWT refresh tokens from before sessions existed are exchanged once: the
+spent token is recorded as a rotated session, so replaying it is handled
+like any other reused token.
+
+Expired sessions, password reset rows and Idempotency-Key responses are
+deleted in batches by ``sweep_expired``, run periodically by ``start_sweeper``.
+"""
+import hashlib
+import logging
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import REFRESH_REUSE_GRACE, SESSION_SWEEP_INTERVAL, SWEEP_BATCH_SIZE
+from app.models import IdempotencyRecord, PasswordReset, RefreshSession, User
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = 7
+# how long a rotated row outlives the grace window, for reuse detection
+ROTATED_KEEP = timedelta(days=1)
+
+
+def _utcnow() -> datetime:
+    # stored naive, in UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user: User, commit: bool = True) -> str:
+    token = secrets.token_urlsafe(32)
+    now = _utcnow()
+    db.add(RefreshSession(
+        user_id=user.id,
+        token_hash=_hash(token),
+        created_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    if commit:
+        db.commit()
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[Optional[User], Optional[str]]:
+    """Exchange ``token`` for a new one. Returns (user, new_token), or (None, None) if invalid."""
+    now = _utcnow()
+    row = db.query(RefreshSession).filter(RefreshSession.token_hash == _hash(token)).first()
+    if row is None or row.expires_at < now:
+        return None, None
+
+    if row.rotated_at is not None and now - row.rotated_at > timedelta(seconds=REFRESH_REUSE_GRACE):
+        logger.warning("Rotated refresh token reused for user %s; revoking all sessions", row.user_id)
+        revoke_user_sessions(db, row.user_id)
+        db.commit()
+        return None, None
+
+    user = db.query(User).filter(User.id == row.user_id, User.is_deleted == False).first()
+    if user is None:
+        return None, None
+
+    # only hashes are stored, so a refresh racing the one that rotated the
+    # token cannot be handed that successor: it gets a session of its own
+    # rather than a 401, which would log the client out
+    if row.rotated_at is not None:
+        return user, issue_refresh_token(db, user)
+
+    # conditional update so only one concurrent refresh rotates the row
+    claimed = (
+        db.query(RefreshSession)
+        .filter(RefreshSession.id == row.id, RefreshSession.rotated_at.is_(None))
+        .update({
+            RefreshSession.rotated_at: now,
+            RefreshSession.expires_at: min(row.expires_at, now + timedelta(seconds=REFRESH_REUSE_GRACE) + ROTATED_KEEP),
+        }, synchronize_session=False)
+    )
+    if not claimed:
+        db.rollback()
+        return user, issue_refresh_token(db, user)
+    new_token = issue_refresh_token(db, user, commit=False)
+    db.commit()
+    return user, new_token
+
+
+def exchange_legacy_token(db: Session, token: str, user: User,
+                          expires_at: datetime) -> Tuple[Optional[User], Optional[str]]:
+    """Spend a validated JWT refresh token; later presentations go through rotation."""
+    if db.query(RefreshSession.id).filter(RefreshSession.token_hash == _hash(token)).first() is not None:
+        return rotate_refresh_token(db, token)
+
+    now = _utcnow()
+    # kept until the JWT itself expires, so it cannot be replayed meanwhile
+    db.add(RefreshSession(
+        user_id=user.id, token_hash=_hash(token), created_at=now, expires_at=expires_at, rotated_at=now,
+    ))
+    new_token = issue_refresh_token(db, user, commit=False)
+    try:
+        db.commit()
+    except IntegrityError:
+        # a concurrent exchange recorded the token first
+        db.rollback()
+        return rotate_refresh_token(db, token)
+    return user, new_token
+
+
+def revoke_refresh_token(db: Session, token: str) -> None:
+    db.query(RefreshSession).filter(RefreshSession.token_hash == _hash(token)).delete(synchronize_session=False)
+    db.commit()
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> int:
+    """Delete every refresh session of ``user_id``; the caller commits."""
+    return db.query(RefreshSession).filter(RefreshSession.user_id == user_id).delete(synchronize_session=False)
+
+
+# ---------- sweeping ----------
+
+def _delete_in_batches(db: Session, model, condition, batch_size: int) -> int:
+    total = 0
+    while True:
+        ids = select(model.id).where(condition).limit(batch_size)
+        deleted = db.execute(
+            delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        total += deleted or 0
+        if not deleted or deleted < batch_size:
+            return total
+
+
+def sweep_expired(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> dict:
+    """Delete expired refresh sessions, password resets and idempotency keys, ``batch_size`` at a time."""
+    now = _utcnow()
+    # rotation shortens expires_at to the reuse check window (ROTATED_KEEP)
+    sessions = _delete_in_batches(db, RefreshSession, RefreshSession.expires_at < now, batch_size)
+    resets = _delete_in_batches(db, PasswordReset, PasswordReset.expires_at < now, batch_size)
+    keys = _delete_in_batches(db, IdempotencyRecord, IdempotencyRecord.expires_at < now, batch_size)
+    return {"refresh_sessions": sessions, "password_resets": resets, "idempotency_keys": keys}
+
+
+_sweeper: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def _sweep_once() -> None:
+    from app.core.cache import get_cache
+    from app.database import SessionLocal
+
+    cache = get_cache()
+    # one worker per interval does the work
+    if not cache.backend.add("sweeper:lock", 1, ttl=max(SESSION_SWEEP_INTERVAL - 1, 1)):
+        return
+    db = SessionLocal()
+    try:
+        counts = sweep_expired(db)
+    finally:
+        db.close()
+    counts["cache_entries"] = cache.purge_expired()
+    if any(counts.values()):
+        logger.info("Sweeper removed %s", counts)
+
+
+def start_sweeper(interval: float = SESSION_SWEEP_INTERVAL) -> None:
+    global _sweeper
+    if interval <= 0 or (_sweeper is not None and _sweeper.is_alive()):
+        return
+
+    def run():
+        while not _sweeper_stop.wait(interval):
+            try:
+                _sweep_once()
+            except Exception:
+                logger.exception("Expired session sweep failed")
+
+    _sweeper_stop.clear()
+    _sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+    _sweeper.start()
+
+
+def stop_sweeper() -> None:
+    _sweeper_stop.set()
@@ -0,0 +1,93 @@
+# backend/app/core/token_epochs.py
+"""
+Account token epochs, for revoking tokens without a per-request user query.
+
+Access tokens carry the account's ``token_epoch`` as the ``ep`` claim.
+Freezing, deactivating or deleting an account, or changing its password,
+bumps the epoch (``revoke_user_tokens``), which revokes every access token
+issued before and deletes the account's refresh sessions. With
+AUTH_STATELESS on, get_current_user checks tokens against the
+``EpochTable`` below instead of loading the user:
+
+* the table maps user id -> (epoch, active) and is reloaded from the users
+  table every AUTH_EPOCH_REFRESH seconds
+* bumps are broadcast on the cache message bus, so every worker applies
+  them straight away rather than at the next reload
+"""
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.core.config import AUTH_EPOCH_REFRESH
+
+logger = logging.getLogger(__name__)
+
+EPOCH_CHANNEL = "auth.epoch"
+
+
+class EpochTable:
+    def __init__(self, refresh_interval: float = AUTH_EPOCH_REFRESH):
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[int, Tuple[int, bool]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        get_cache().subscribe(EPOCH_CHANNEL, self._on_message)
+
+    def lookup(self, user_id: int) -> Optional[Tuple[int, bool]]:
+        """(epoch, active) for ``user_id``, or None if the account is unknown."""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+                    self.reload()
+        return self._entries.get(user_id)
+
+    def reload(self) -> None:
+        from app.database import SessionLocal
+        from app.models import User
+
+        db = SessionLocal()
+        try:
+            rows = db.query(User.id, User.token_epoch, User.is_deleted).all()
+        finally:
+            db.close()
+        entries = {row.id: (row.token_epoch or 0, not row.is_deleted) for row in rows}
+        # a bump applied from a message while the query ran must not be undone
+        for user_id, entry in self._entries.items():
+            if user_id in entries and entry[0] > entries[user_id][0]:
+                entries[user_id] = entry
+        self._entries = entries
+        self._loaded_at = time.monotonic()
+
+    def apply(self, user_id: int, epoch: int, active: bool) -> None:
+        current = self._entries.get(user_id)
+        if current is None or epoch >= current[0]:
+            self._entries[user_id] = (epoch, active)
+
+    def _on_message(self, message: dict) -> None:
+        try:
+            self.apply(int(message["user_id"]), int(message["epoch"]), bool(message["active"]))
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring malformed token epoch message: %s", message)
+
+
+@lru_cache(maxsize=None)
+def get_epoch_table() -> EpochTable:
+    return EpochTable()
+
+
+def revoke_user_tokens(db: Session, user) -> None:
+    """Bump ``user``'s token epoch, drop its refresh sessions, commit, and tell every worker."""
+    from app.core.sessions import revoke_user_sessions
+
+    user.token_epoch = (user.token_epoch or 0) + 1
+    db.add(user)
+    revoke_user_sessions(db, user.id)
+    db.commit()
+    get_cache().publish(EPOCH_CHANNEL, {
+        "user_id": user.id, "epoch": user.token_epoch, "active": not user.is_deleted,
+    })
@@ -0,0 +1,133 @@
+# backend/app/core/write_queue.py
+"""
+Per-key write coalescing (group commit) for save_marks.
+
+Requests for the same key (an exam) join an open batch. The first request
+of a batch becomes its leader and flushes the whole batch in one
+transaction while the others block on the batch. Batches of one key take a
+ticket when they open and flush strictly in ticket order, never
+overlapping, so a later save always lands after an earlier one. A leader
+with no earlier batch in flight flushes at once; otherwise it waits for its
+turn, and the saves arriving meanwhile gather in its batch. Saves are only
+delayed, and coalesced, while the exam is already being written.
+
+Every request gets the result of its own item plus the id of the flush
+that wrote it. If the batch flush fails, its items are flushed again one
+at a time, so only the request whose item fails gets (its own) exception.
+Batches are per process:
+with several workers, saves for one exam are coalesced per worker and the
+database still orders the flushes.
+"""
+import itertools
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import MARKS_WRITE_MAX_BATCH
+from app.core.metrics import registry
+
+registry.describe("gradeflow_write_flushes_total", "counter",
+                  "Coalesced write flushes by outcome (ok, error, split: retried item by item)")
+registry.describe("gradeflow_write_requests_total", "counter", "Requests written through the write queue")
+
+# flush(items, flush_id) -> one result per item, in order
+FlushFn = Callable[[List[Any], int], List[Any]]
+
+
+class _Batch:
+    def __init__(self, ticket: int):
+        self.ticket = ticket
+        self.items: List[Any] = []
+        self.done = threading.Event()
+        self.results: List[Any] = []
+        self.errors: List[Optional[BaseException]] = []
+        self.flush_id = 0
+
+
+class WriteQueue:
+    def __init__(self, max_batch: int = MARKS_WRITE_MAX_BATCH):
+        self.max_batch = max_batch
+        self._open: Dict[Hashable, _Batch] = {}
+        # per key: next ticket to hand out, and the ticket whose turn it is
+        self._issued: Dict[Hashable, int] = {}
+        self._serving: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+        self._ids = itertools.count(1)
+
+    def submit(self, key: Hashable, item: Any, flush: FlushFn) -> Tuple[Any, int]:
+        """Queue ``item`` under ``key`` and wait for its flush; returns (result, flush id)."""
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None or len(batch.items) >= self.max_batch
+            if leader:
+                ticket = self._issued.get(key, 0)
+                self._issued[key] = ticket + 1
+                batch = self._open[key] = _Batch(ticket)
+            index = len(batch.items)
+            batch.items.append(item)
+        registry.inc("gradeflow_write_requests_total")
+
+        if leader:
+            self._lead(key, batch, flush)
+        else:
+            batch.done.wait()
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+        return batch.results[index], batch.flush_id
+
+    def _lead(self, key: Hashable, batch: _Batch, flush: FlushFn) -> None:
+        with self._turn:
+            # earlier batches of this key flush first; an idle key does not wait
+            self._turn.wait_for(lambda: self._serving.get(key, 0) == batch.ticket)
+            # close the batch: later arrivals start the next one
+            if self._open.get(key) is batch:
+                del self._open[key]
+        try:
+            batch.flush_id = next(self._ids)
+            self._flush(batch, flush)
+        finally:
+            with self._turn:
+                self._serving[key] = batch.ticket + 1
+                if self._serving[key] == self._issued.get(key):
+                    # nothing queued behind: forget the key
+                    del self._serving[key], self._issued[key]
+                self._turn.notify_all()
+            batch.done.set()
+
+    def _flush(self, batch: _Batch, flush: FlushFn) -> None:
+        count = len(batch.items)
+        try:
+            batch.results = flush(batch.items, batch.flush_id)
+            batch.errors = [None] * count
+            registry.inc("gradeflow_write_flushes_total", {"outcome": "ok"})
+            return
+        except Exception as exc:
+            if count == 1:
+                batch.results, batch.errors = [None], [exc]
+                registry.inc("gradeflow_write_flushes_total", {"outcome": "error"})
+                return
+        except BaseException as exc:
+            batch.results, batch.errors = [None] * count, [exc] * count
+            raise
+
+        # one bad item must not fail the requests coalesced with it
+        registry.inc("gradeflow_write_flushes_total", {"outcome": "split"})
+        batch.results, batch.errors = [], []
+        for item in batch.items:
+            try:
+                batch.results.append(flush([item], batch.flush_id)[0])
+                batch.errors.append(None)
+            except Exception as exc:
+                batch.results.append(None)
+                batch.errors.append(exc)
+
+    def pending(self, key: Hashable) -> int:
+        with self._lock:
+            batch = self._open.get(key)
+            return len(batch.items) if batch else 0
+
+
+@lru_cache(maxsize=None)
+def get_write_queue() -> WriteQueue:
+    return WriteQueue()
@@ -1,46 +1,139 @@
 # backend/app/database.py
 
 import os
-from sqlalchemy import create_engine
+import time
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from app.core.config import READ_YOUR_WRITES_WINDOW
+from app.core.metrics import instrument_engine, instrument_sessions, registry
 
 load_dotenv()
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+
+def _normalize_url(url: str) -> str:
+    # Fix postgres:// issue (Render/Vercel compatibility)
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    #  Add SSL for Supabase
+    if "supabase.co" in url:
+        if "sslmode" not in url:
+            url += "?sslmode=require"
+    return url
+
+
+def _create_engine(url: str):
+    # SQLite special config
+    connect_args = {}
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+
+    #  Engine with better pooling
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    )
+
+    if url.startswith("sqlite"):
+        # SQLite ignores FOREIGN KEY / ON DELETE CASCADE unless enabled per connection
+        @event.listens_for(new_engine, "connect")
+        def _enable_sqlite_foreign_keys(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+    # per-request query count / DB time (see app/core/metrics.py)
+    instrument_engine(new_engine)
+    return new_engine
+
 
 # Fallback (local dev)
-if not SQLALCHEMY_DATABASE_URL:
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./gradeflow.db"
-
-# Fix postgres:// issue (Render/Vercel compatibility)
-if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
-    SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-#  Add SSL for Supabase
-if "supabase.co" in SQLALCHEMY_DATABASE_URL:
-    if "sslmode" not in SQLALCHEMY_DATABASE_URL:
-        SQLALCHEMY_DATABASE_URL += "?sslmode=require"
-
-# SQLite special config
-connect_args = {}
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
-#  Engine with better pooling
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
+SQLALCHEMY_DATABASE_URL = _normalize_url(os.getenv("DATABASE_URL") or "sqlite:///./gradeflow.db")
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Optional read replica for heavy reporting reads (see get_read_db)
+SQLALCHEMY_READ_URL = os.getenv("DATABASE_READ_URL")
+read_engine = _create_engine(_normalize_url(SQLALCHEMY_READ_URL)) if SQLALCHEMY_READ_URL else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_sessions(SessionLocal)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+instrument_sessions(ReadSessionLocal)
 Base = declarative_base()
 
-def get_db():
+registry.describe("gradeflow_read_sessions_total", "counter", "Read-only sessions by the database they were routed to")
+
+# users that wrote recently (shared cache namespace, one key per user id)
+RECENT_WRITES_CACHE = "recent_writes"
+
+
+def _client_key(request: Request) -> Optional[str]:
+    # the token's user rather than the token itself, so a refreshed token or
+    # another tab of the same user still reads its own writes
+    if read_engine is engine:
+        return None
+    auth = request.headers.get("authorization") or ""
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    from app.core.security import decode_token
+
+    try:
+        sub = decode_token(token).get("sub")
+    except Exception:
+        return None
+    return None if sub is None else f"user:{sub}"
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _note_write(session) -> None:
+    # a replica may lag: after a commit this client reads from the primary for a while
+    # (client_keys: every client of a coalesced marks flush)
+    keys = set(session.info.get("client_keys") or ()) | {session.info.get("client_key")}
+    keys.discard(None)
+    if not keys or read_engine is engine:
+        return
+    from app.core.cache import get_cache
+
+    now = time.time()
+    for key in keys:
+        get_cache().set(RECENT_WRITES_CACHE, key, now, ttl=READ_YOUR_WRITES_WINDOW)
+
+
+def _wrote_recently(request: Request) -> bool:
+    key = _client_key(request)
+    if key is None:
+        return False
+    from app.core.cache import get_cache
+
+    written = get_cache().get(RECENT_WRITES_CACHE, key)
+    return written is not None and time.time() - written < READ_YOUR_WRITES_WINDOW
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["client_key"] = _client_key(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only routes: the replica when DATABASE_READ_URL is set,
+    except for a user who wrote within READ_YOUR_WRITES_WINDOW seconds.
+    """
+    primary = read_engine is engine or _wrote_recently(request)
+    registry.inc("gradeflow_read_sessions_total", {"target": "primary" if primary else "replica"})
+    db = SessionLocal() if primary else ReadSessionLocal()
     try:
         yield db
     finally:
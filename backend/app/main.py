@@ -1,11 +1,17 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from app.database import Base, engine, SessionLocal
-from app.api.routes import auth, exams, subjects
+from app.api.routes import archive, auth, exams, subjects
 from app.models.user import User
 from app.models.programme import Programme
 from app.models.exam import SubjectCatalog
+from app.core.config import DB_AUTO_CREATE, METRICS_PUBLIC, METRICS_TOKEN
+from app.core.metrics import RequestMetricsMiddleware, registry
+from app.core.sessions import start_sweeper, stop_sweeper
 
 
 def seed_all_data(db: Session):
@@ -43,9 +49,22 @@ def seed_all_data(db: Session):
     db.commit()
 
 # RUN SETUP
-Base.metadata.create_all(bind=engine)
+# production runs `python -m app.migrate` once per release instead
+if DB_AUTO_CREATE:
+    from app.migrate import migrate
+    migrate(engine)
+
+# expired refresh sessions / password resets (app/core/sessions.py)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_sweeper()
+    try:
+        yield
+    finally:
+        stop_sweeper()
 
-app = FastAPI(title="GradeFlow API")
+
+app = FastAPI(title="GradeFlow API", lifespan=lifespan)
 
 # @app.on_event("startup")
 # def startup_event():
@@ -56,8 +75,6 @@ app = FastAPI(title="GradeFlow API")
 #         db.close()
 
 # 3. CORS SETTINGS
-from fastapi.middleware.cors import CORSMiddleware
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -71,10 +88,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outermost, so Server-Timing covers CORS handling too
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(exams.router, prefix="/exams", tags=["exams"])
 app.include_router(subjects.router, prefix="/subjects", tags=["subjects"])
+app.include_router(archive.router, prefix="/archive", tags=["archive"])
 
 @app.get("/")
 async def root():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    # closed unless a token is configured or the endpoint is explicitly public
+    if not METRICS_PUBLIC and (not METRICS_TOKEN or request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,155 @@
+# backend/app/migrate.py
+"""
+Explicit schema migration step.
+
+    cd backend
+    python -m app.migrate           # create missing tables, columns and indexes
+    python -m app.migrate --check   # list pending changes, exit 1 if any
+
+The API only creates the schema on import when DB_AUTO_CREATE is on (the
+default, for local development). Deployments run this once per release
+instead, so worker cold starts do not pay for schema inspection.
+
+Changes are additive only: new tables, new columns (nullable or with a
+server default) and new indexes. Anything else needs a hand-written step.
+
+After the schema, exams without progress counters (saved before they were
+tracked) are counted once; save_marks keeps them up to date from then on.
+"""
+import argparse
+import logging
+import sys
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _column_ddl(column, dialect) -> str:
+    ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    default = column.server_default
+    if default is not None and hasattr(default, "arg"):
+        arg = default.arg
+        value = arg.text if hasattr(arg, "text") else str(arg)
+        ddl += f" DEFAULT {value}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+
+def pending_changes(engine) -> List[str]:
+    """DDL statements needed to bring the database up to the models."""
+    from app.database import Base
+    import app.models  # noqa: F401  registers every table on Base.metadata
+
+    inspector = inspect(engine)
+    dialect = engine.dialect
+    existing = set(inspector.get_table_names())
+    statements = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            statements.append(f"CREATE TABLE {table.name}")
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                statements.append(
+                    f"ALTER TABLE {dialect.identifier_preparer.quote(table.name)} "
+                    f"ADD COLUMN {_column_ddl(column, dialect)}"
+                )
+        indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip())
+    return statements
+
+
+def migrate(engine=None) -> List[str]:
+    """Apply pending changes and return the statements that were run."""
+    from app.database import Base
+    import app.models  # noqa: F401
+
+    if engine is None:
+        from app.database import engine
+
+    statements = pending_changes(engine)
+    if not statements:
+        return []
+
+    # new tables (with their indexes) in one go, then the ALTER/CREATE INDEX
+    # statements for tables that already existed
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in statements:
+            if statement.startswith("CREATE TABLE "):
+                continue
+            logger.info("migrate: %s", statement)
+            conn.exec_driver_sql(statement)
+    return statements
+
+
+def _untracked_exams(session):
+    from app.models.exam import Exam, ExamProgress
+
+    tracked = session.query(ExamProgress.exam_id).filter(ExamProgress.section_id.is_(None))
+    return session.query(Exam).filter(~Exam.id.in_(tracked))
+
+
+def pending_backfill(engine) -> int:
+    """Number of exams whose progress counters were never computed."""
+    from sqlalchemy.orm import Session
+
+    with Session(engine) as session:
+        return _untracked_exams(session).count()
+
+
+def backfill_progress(engine, batch_size: int = 100) -> int:
+    """Count the progress rows of every exam that has none; returns how many exams."""
+    from sqlalchemy.orm import Session
+    from app.utils.progress import refresh_progress
+
+    done = 0
+    with Session(engine) as session:
+        while True:
+            exams = _untracked_exams(session).limit(batch_size).all()
+            if not exams:
+                return done
+            for exam in exams:
+                refresh_progress(session, exam)
+            session.commit()
+            done += len(exams)
+            logger.info("migrate: progress counted for %s exam(s)", done)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report pending changes")
+    args = parser.parse_args(argv)
+
+    from app.database import engine
+
+    if args.check:
+        statements = pending_changes(engine)
+        for statement in statements:
+            print(statement)
+        untracked = 0 if statements else pending_backfill(engine)
+        if untracked:
+            print(f"progress counters missing for {untracked} exam(s)")
+        return 1 if statements or untracked else 0
+
+    statements = migrate(engine)
+    for statement in statements:
+        print(statement)
+    print(f"Schema up to date ({len(statements)} change(s) applied)")
+    counted = backfill_progress(engine)
+    if counted:
+        print(f"Progress counters computed for {counted} exam(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -1,5 +1,6 @@
 # backend/app/models/__init__.py
 from app.database import Base
-from app.models.user import User,PasswordReset
-from app.models.exam import Exam, Question, Student, Mark ,SubjectCatalog, ExamSection
+from app.models.user import User,PasswordReset,RefreshSession
+from app.models.exam import Exam, Question, Student, Mark ,SubjectCatalog, ExamSection, ResultSnapshot, ExamProgress
 from app.models.programme import Programme
+from app.models.idempotency import IdempotencyRecord
@@ -1,10 +1,14 @@
 # backend/app/models/exam.py
-from sqlalchemy import Column, Float, Integer, String, Boolean, ForeignKey, DateTime,Text
+from sqlalchemy import JSON, Column, Float, Index, Integer, String, Boolean, ForeignKey, DateTime,Text, LargeBinary, UniqueConstraint, and_
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
-from sqlalchemy.dialects.sqlite import JSON 
-import json
+
+# exams created separately by each teacher for the same subject paper form one
+# "logical exam"; finalize, unfinalize and the admin views work on the group
+LOGICAL_KEY = ("subject_code", "subject_name", "exam_type", "semester", "academic_year")
+
 
 class Exam(Base):
     __tablename__ = "exams"
@@ -17,45 +21,62 @@ class Exam(Base):
     semester = Column(Integer, nullable=False)
     academic_year= Column(String, nullable=False)
     students_count = Column(Integer, default=0)
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
-    locked_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    locked_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     is_locked = Column(Boolean, default=False, nullable=False) 
+    locked_at = Column(DateTime, nullable=True)   # UTC; identifies the frozen snapshot
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    question_rules = Column(JSON, nullable=True)
+    # {main label: QuestionRule} as a JSON document (JSONB on Postgres)
+    question_rules = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    # bumped whenever question_rules changes; keys the compiled-rules cache
+    rules_version = Column(Integer, default=0, server_default="0", nullable=False)
     
+    # children are removed by the database (ON DELETE CASCADE); passive_deletes
+    # keeps the ORM from loading them just to delete them row by row
     questions = relationship(
-        "Question", back_populates="exam", cascade="all, delete-orphan"
+        "Question", back_populates="exam", cascade="all, delete-orphan", passive_deletes=True
     )
     students = relationship(
-        "Student", back_populates="exam", cascade="all, delete-orphan"
+        "Student", back_populates="exam", cascade="all, delete-orphan", passive_deletes=True
     )
     marks = relationship(
-        "Mark", back_populates="exam", cascade="all, delete-orphan"
+        "Mark", back_populates="exam", cascade="all, delete-orphan", passive_deletes=True
     )
     sections = relationship(
-        "ExamSection", back_populates="exam", cascade="all, delete-orphan")
+        "ExamSection", back_populates="exam", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_exams_logical_key", *LOGICAL_KEY),
+        # year-wide admin views (progress dashboard, delete by year)
+        Index("ix_exams_academic_year", "academic_year"),
+    )
+
+    def logical_key(self) -> tuple:
+        return tuple(getattr(self, col) for col in LOGICAL_KEY)
+
+    @classmethod
+    def logical_filter(cls, key: tuple):
+        """WHERE clause selecting every exam of the logical exam ``key``."""
+        return and_(*(getattr(cls, col) == value for col, value in zip(LOGICAL_KEY, key)))
 
     def get_question_rules(self):
-        if not self.question_rules:
-            return {}
-        try:
-            return json.loads(self.question_rules)
-        except Exception:
-            return {}
+        from app.schemas.exam_schema import decode_question_rules, encode_question_rules
+
+        return encode_question_rules(decode_question_rules(self.question_rules))
 
 class Question(Base):
     __tablename__ = "questions"
 
     id = Column(Integer, primary_key=True, index=True)
-    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"))
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), index=True)
     label = Column(String, nullable=False)       # "Q1", "Q2" etc
     max_marks = Column(Integer, nullable=False)  # change to Float if needed
     order = Column(Integer, default=0)
 
     exam = relationship("Exam", back_populates="questions")
     marks = relationship(
-        "Mark", back_populates="question", cascade="all, delete-orphan"
+        "Mark", back_populates="question", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -66,10 +87,17 @@ class Student(Base):
     exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"))
     roll_no = Column(Integer, nullable=False)   
     absent = Column(Boolean, default=False)
+    # copied from the exam: the partition key on Postgres (app/utils/partitions.py)
+    academic_year = Column(String, nullable=True)
 
     exam = relationship("Exam", back_populates="students")
     marks = relationship(
-        "Mark", back_populates="student", cascade="all, delete-orphan"
+        "Mark", back_populates="student", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __table_args__ = (
+        # per-section slices: WHERE exam_id = ? AND roll_no BETWEEN ? AND ?
+        Index("ix_students_exam_roll", "exam_id", "roll_no"),
     )
 
 
@@ -77,22 +105,29 @@ class Mark(Base):
     __tablename__ = "marks"
 
     id = Column(Integer, primary_key=True, index=True)
-    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"))
+    # every FK is indexed: cascades look rows up by the referencing column
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), index=True)
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"))
-    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"))
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), index=True)
     marks = Column(Float, nullable=True)  # None if absent or not entered
-    section_id = Column(Integer, ForeignKey("exam_sections.id"), nullable=True)
+    section_id = Column(Integer, ForeignKey("exam_sections.id", ondelete="SET NULL"), nullable=True, index=True)
+    academic_year = Column(String, nullable=True)  # partition key, as on Student
 
     exam = relationship("Exam", back_populates="marks")
     student = relationship("Student", back_populates="marks")
     question = relationship("Question", back_populates="marks")
+
+    __table_args__ = (
+        # marks of a student slice are found through their students
+        Index("ix_marks_student_id", "student_id"),
+    )
     
 
 class ExamSection(Base):
     __tablename__ = "exam_sections"
     id = Column(Integer, primary_key=True, index=True)
-    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"))
-    teacher_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), index=True)
+    teacher_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     section_name = Column(String, nullable=True)
     roll_start = Column(Integer, nullable=False)
     roll_end = Column(Integer, nullable=False)
@@ -105,6 +140,50 @@ class ExamSection(Base):
 
 
 
+class ResultSnapshot(Base):
+    """
+    Result sheet frozen when an exam is finalized: zlib-compressed JSON of the
+    marks grid, totals and rendered CSV. Rows are written once and keyed by
+    the exam's lock time, so a re-finalized exam never reads an older sheet.
+    """
+    __tablename__ = "result_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
+    scope = Column(String(16), nullable=False)    # "single" or "merged"
+    locked_at = Column(DateTime, nullable=False)
+    exam_ids = Column(Text, nullable=True)         # JSON list of the exams a merged sheet covers
+    blob = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("exam_id", "scope", "locked_at", name="uq_result_snapshots_key"),
+    )
+
+
+class ExamProgress(Base):
+    """
+    Marking progress counters of an exam (section_id NULL) and of each of its
+    sections, rewritten by save_marks in the same transaction as the marks.
+    """
+    __tablename__ = "exam_progress"
+
+    id = Column(Integer, primary_key=True, index=True)
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
+    section_id = Column(Integer, ForeignKey("exam_sections.id", ondelete="CASCADE"), nullable=True, index=True)
+    teacher_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    students = Column(Integer, default=0, server_default="0", nullable=False)
+    absent = Column(Integer, default=0, server_default="0", nullable=False)
+    marked = Column(Integer, default=0, server_default="0", nullable=False)   # present, every question entered
+    cells_filled = Column(Integer, default=0, server_default="0", nullable=False)
+    cells_blank = Column(Integer, default=0, server_default="0", nullable=False)
+    last_saved_at = Column(DateTime, nullable=True)   # UTC
+
+    __table_args__ = (
+        Index("ix_exam_progress_exam_section", "exam_id", "section_id"),
+    )
+
+
 class SubjectCatalog(Base):
     __tablename__ = "subjects_catalog"
 
@@ -0,0 +1,21 @@
+# backend/app/models/idempotency.py
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from app.database import Base
+
+
+class IdempotencyRecord(Base):
+    """Response of a completed write, replayed when its Idempotency-Key is sent again."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key_hash = Column(String(64), nullable=False)        # SHA-256 of the client's key
+    request_hash = Column(String(64), nullable=False)    # SHA-256 of endpoint + body
+    status_code = Column(Integer, nullable=False)
+    response = Column(Text, nullable=False)              # JSON body
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key_hash", name="uq_idempotency_keys_user_key"),
+    )
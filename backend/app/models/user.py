@@ -15,14 +15,29 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_frozen = Column(Boolean, default=False, nullable=False)
     is_deleted = Column(Boolean, default=False, nullable=False)
+    # bumped to revoke every token issued so far (see app/core/token_epochs.py)
+    token_epoch = Column(Integer, default=0, server_default="0", nullable=False)
 
 
 class PasswordReset(Base):
     __tablename__ = "password_resets"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     token = Column(String, unique=True, index=True)
     expires_at = Column(DateTime)
 
     user = relationship("User")
+
+
+class RefreshSession(Base):
+    """One row per live refresh token; only a SHA-256 of the token is stored."""
+    __tablename__ = "refresh_sessions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # set when the token was exchanged; presenting it again means it leaked
+    rotated_at = Column(DateTime, nullable=True)
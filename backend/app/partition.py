@@ -0,0 +1,178 @@
+# backend/app/partition.py
+"""
+Convert marks and students to tables partitioned by academic year (Postgres).
+
+    cd backend
+    python -m app.migrate              # adds the academic_year columns first
+    python -m app.partition --check    # print the plan, change nothing
+    python -m app.partition            # convert, in one transaction
+
+The conversion fills academic_year from the exams, builds partitioned
+copies of both tables (primary keys become (id, academic_year), and marks
+reference students through (student_id, academic_year)), creates one
+partition per year, copies the rows across and swaps the tables. It holds
+an exclusive lock on both tables while it runs, so schedule it outside
+marking periods. Then set DB_PARTITION_BY_YEAR=true and restart.
+"""
+import argparse
+import logging
+import sys
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+# unknown year (orphaned rows) still needs a partition: the key is NOT NULL
+UNKNOWN_YEAR = ""
+
+
+def _columns(table, dialect) -> List[str]:
+    """Column list of the partitioned copy: the model's columns, ids from the old sequence."""
+    quote = dialect.identifier_preparer.quote
+    columns = []
+    for column in table.columns:
+        ddl = f"{quote(column.name)} {column.type.compile(dialect=dialect)}"
+        if column.name == "id":
+            ddl += f" NOT NULL DEFAULT nextval('{table.name}_id_seq')"
+        elif column.name == "academic_year":
+            ddl += " NOT NULL"
+        elif not column.nullable:
+            ddl += " NOT NULL"
+        columns.append(ddl)
+    return columns
+
+
+def _foreign_keys(table, skip: str) -> List[str]:
+    keys = []
+    for fk in table.foreign_keys:
+        if fk.parent.name == skip:
+            continue
+        ddl = f"FOREIGN KEY ({fk.parent.name}) REFERENCES {fk.column.table.name} ({fk.column.name})"
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+        keys.append(ddl)
+    return keys
+
+
+def conversion_plan(engine, years: List[str]) -> List[str]:
+    """Statements converting both tables, given the years present after the backfill."""
+    from app.models.exam import Mark, Student
+    from app.utils.partitions import create_partition_ddl
+
+    dialect = engine.dialect
+    statements = []
+    for table in ("students", "marks"):
+        statements.append(
+            f"UPDATE {table} SET academic_year = COALESCE(e.academic_year, '{UNKNOWN_YEAR}') FROM exams e "
+            f"WHERE e.id = {table}.exam_id AND {table}.academic_year IS DISTINCT FROM e.academic_year"
+        )
+        statements.append(f"UPDATE {table} SET academic_year = '{UNKNOWN_YEAR}' WHERE academic_year IS NULL")
+
+    students = ",\n  ".join(
+        _columns(Student.__table__, dialect)
+        + ["PRIMARY KEY (id, academic_year)"]
+        + _foreign_keys(Student.__table__, skip="")
+    )
+    marks = ",\n  ".join(
+        _columns(Mark.__table__, dialect)
+        + ["PRIMARY KEY (id, academic_year)"]
+        + _foreign_keys(Mark.__table__, skip="student_id")
+        # a mark lives in the same year as its student
+        + ["FOREIGN KEY (student_id, academic_year) REFERENCES students_partitioned (id, academic_year) "
+           "ON DELETE CASCADE"]
+    )
+    statements += [
+        f"CREATE TABLE students_partitioned (\n  {students}\n) PARTITION BY LIST (academic_year)",
+        f"CREATE TABLE marks_partitioned (\n  {marks}\n) PARTITION BY LIST (academic_year)",
+    ]
+    for year in years:
+        statements += [
+            ddl.replace(" PARTITION OF marks ", " PARTITION OF marks_partitioned ")
+               .replace(" PARTITION OF students ", " PARTITION OF students_partitioned ")
+            for ddl in create_partition_ddl(year)
+        ]
+
+    for table in (Student.__table__, Mark.__table__):
+        names = ", ".join(c.name for c in table.columns)
+        statements += [
+            f"INSERT INTO {table.name}_partitioned ({names}) SELECT {names} FROM {table.name}",
+            # the sequence would otherwise be dropped with the old table
+            f"ALTER SEQUENCE {table.name}_id_seq OWNED BY NONE",
+        ]
+    statements += ["DROP TABLE marks", "DROP TABLE students"]
+    for table in (Student.__table__, Mark.__table__):
+        statements += [
+            f"ALTER TABLE {table.name}_partitioned RENAME TO {table.name}",
+            f"ALTER TABLE {table.name} RENAME CONSTRAINT {table.name}_partitioned_pkey TO {table.name}_pkey",
+            f"ALTER SEQUENCE {table.name}_id_seq OWNED BY {table.name}.id",
+        ]
+        # same index names as the models, so app.migrate sees nothing missing
+        statements += [str(CreateIndex(index).compile(dialect=dialect)).strip() for index in table.indexes]
+    return statements
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"),
+        {"t": table},
+    ).scalar())
+
+
+def _years(conn) -> List[str]:
+    rows = conn.execute(text(
+        f"SELECT DISTINCT COALESCE(academic_year, '{UNKNOWN_YEAR}') FROM exams "
+        f"UNION SELECT '{UNKNOWN_YEAR}'"
+    ))
+    return sorted(row[0] for row in rows)
+
+
+def partition(engine, check: bool = False) -> List[str]:
+    """Convert both tables (or only return the plan with ``check``); [] when already done."""
+    import app.models  # noqa: F401
+
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("partitioning needs Postgres")
+    with engine.begin() as conn:
+        if _is_partitioned(conn, "marks"):
+            return []
+        statements = conversion_plan(engine, _years(conn))
+        if check:
+            return statements
+        conn.exec_driver_sql("LOCK TABLE marks, students IN ACCESS EXCLUSIVE MODE")
+        for statement in statements:
+            logger.info("partition: %s", statement.splitlines()[0])
+            conn.exec_driver_sql(statement)
+    return statements
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="print the statements without running them")
+    args = parser.parse_args(argv)
+
+    from app.database import engine
+    from app.migrate import pending_changes
+
+    if engine.dialect.name != "postgresql":
+        print("error: partitioning needs Postgres", file=sys.stderr)
+        return 1
+    if any(" academic_year " in s for s in pending_changes(engine)):
+        print("error: run `python -m app.migrate` first", file=sys.stderr)
+        return 1
+
+    statements = partition(engine, check=args.check)
+    if not statements:
+        print("marks and students are already partitioned")
+        return 0
+    for statement in statements:
+        print(statement + ";")
+    if not args.check:
+        print(f"Converted marks and students ({len(statements)} statement(s)); set DB_PARTITION_BY_YEAR=true")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
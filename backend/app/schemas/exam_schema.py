@@ -1,7 +1,66 @@
 # backend/app/schemas/exam_schema.py
+import json
 from datetime import datetime, timezone
 from typing import List, Dict, Optional,Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, BeforeValidator, Field, ValidationError, model_validator
+from typing_extensions import Annotated
+
+class QuestionRule(BaseModel):
+    """Scoring rule of a main question: count the best ``minToCount`` of its ``outOf`` sub-questions."""
+    mainLabel: Optional[str] = None
+    minToCount: Optional[int] = Field(None, ge=0)
+    outOf: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _legacy_keys(cls, data):
+        # older rows spell minToCount as min_to_count or min
+        if isinstance(data, dict) and data.get("minToCount") is None:
+            for key in ("min_to_count", "min"):
+                if data.get(key) is not None:
+                    return {**data, "minToCount": data[key]}
+        return data
+
+
+def decode_question_rules(raw) -> Dict[str, QuestionRule]:
+    """Rules as stored on an exam (dict, or a JSON string in older rows); invalid entries are dropped."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return {}
+    if not isinstance(raw, dict):
+        return {}
+    rules: Dict[str, QuestionRule] = {}
+    for main, rule in raw.items():
+        try:
+            rules[str(main)] = QuestionRule.model_validate(rule)
+        except ValidationError:
+            continue
+    return rules
+
+
+def encode_question_rules(rules: Dict[str, QuestionRule]) -> Dict[str, dict]:
+    """JSON document stored in Exam.question_rules."""
+    return {main: rule.model_dump(exclude_none=True) for main, rule in rules.items()}
+
+
+def _decode_json_string(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+# validated on input; JSON-string bodies are accepted for older clients
+QuestionRules = Annotated[Optional[Dict[str, QuestionRule]], BeforeValidator(_decode_json_string)]
+# lenient on output, so one bad stored entry cannot break an exam listing
+StoredQuestionRules = Annotated[Optional[Dict[str, QuestionRule]], BeforeValidator(
+    lambda raw: None if raw is None else decode_question_rules(raw)
+)]
+
 
 class QuestionOut(BaseModel):
     id: int
@@ -41,7 +100,7 @@ class ExamOut(ExamBase):
     is_locked: bool = False
     locked_by: Optional[int] = None
     created_by: Optional[int]=None
-    question_rules: Optional[Dict[str, Any]] = None
+    question_rules: StoredQuestionRules = None
     locked_by_name:Optional[str]=None
 
     class Config:
@@ -67,6 +126,37 @@ class AdminCombinedMarksOut(BaseModel):
     marks: List[AdminMarkOut]
 
 
+class ProgressCounts(BaseModel):
+    students: int = 0
+    absent: int = 0
+    marked: int = 0       # present and every question entered
+    pending: int = 0      # present, still missing marks
+    cells_filled: int = 0
+    cells_blank: int = 0
+    last_saved_at: Optional[datetime] = None
+
+
+class SectionProgressOut(ProgressCounts):
+    section_id: int
+    section_name: Optional[str] = None
+    teacher_id: Optional[int] = None
+    teacher_name: Optional[str] = None
+
+
+class ExamProgressOut(ProgressCounts):
+    exam_id: int
+    programme: str
+    subject_code: str
+    subject_name: str
+    exam_type: str
+    semester: int
+    academic_year: str
+    is_locked: bool = False
+    created_by: Optional[int] = None
+    teacher_name: Optional[str] = None
+    sections: List[SectionProgressOut] = []
+
+
 class QuestionIn(BaseModel):
     label: str
     max_marks: int
@@ -88,7 +178,7 @@ class MarksSaveRequest(BaseModel):
     semester: int
     questions: List[QuestionIn]
     students: List[StudentMarksIn]
-    question_rules: Optional[Dict[str, Any]] = None
+    question_rules: QuestionRules = None
 
 
 class MarkOut(BaseModel):
@@ -104,6 +194,17 @@ class ExamMarksOut(BaseModel):
     marks: List[MarkOut]
 
 
+class MarksBatchGetRequest(BaseModel):
+    exam_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
+class MarksBatchGetOut(BaseModel):
+    # each entry is what GET /exams/{id}/marks returns for that exam
+    exams: List[ExamMarksOut]
+    missing: List[int] = []
+    forbidden: List[int] = []
+
+
 class ExamSectionCreate(BaseModel):
     exam_id: int
     section_name: Optional[str] = None
@@ -125,7 +226,7 @@ class ExamSectionOut(BaseModel):
 class ExamUpdate(BaseModel):
     subject_code: Optional[str]
     subject_name: Optional[str]
-    question_rules: Optional[Dict[str, Any]] = None
+    question_rules: QuestionRules = None
 
 
 class SubjectCatalogOut(BaseModel):
@@ -0,0 +1,415 @@
+# backend/app/utils/archive.py
+"""
+Columnar archive files of past academic years.
+
+``python -m app.archive <year>`` packs every exam of an academic year into
+one file, ARCHIVE_DIR/<year>.gfa, after which the year's rows can be purged
+from the live tables. The /archive routes then serve marks grids and CSV
+exports straight from the file.
+
+Layout (all integers little-endian):
+
+    b"GFARCH1\\n"                      magic
+    column blocks                     zlib-compressed, one per (exam, table, column)
+    footer                            zlib-compressed JSON directory
+    uint64 footer length, b"GFARCH1\\n"
+
+Each exam is a row group of four tables (questions, students, marks,
+sections). The footer holds the exam metadata plus, for every column, its
+[offset, length, kind, rows]. Readers mmap the file and decompress only the
+columns of the exam asked for, so a request costs one exam's blocks however
+large the year is.
+
+Column kinds: ``i4`` int32 (-1 for NULL ids), ``f8`` float64 (NaN for
+NULL), ``b1`` one byte per bool, ``str`` a JSON list.
+"""
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import ARCHIVE_DIR
+from app.models.exam import LOGICAL_KEY, Exam, ExamSection, Mark, Question, Student
+from app.models.user import User
+from app.utils.layout import QuestionLayout, natural_key
+from app.utils.results import build_sheet
+from app.utils.rules import CompiledRules, compile_rules
+from app.utils.sections import SectionIndex, SectionSpan
+
+MAGIC = b"GFARCH1\n"
+VERSION = 1
+SUFFIX = ".gfa"
+_TAIL = struct.Struct("<Q")
+
+# table -> ((column, kind), ...)
+TABLES = {
+    "questions": (("id", "i4"), ("label", "str"), ("max_marks", "i4"), ("order", "i4")),
+    "students": (("id", "i4"), ("roll_no", "i4"), ("absent", "b1")),
+    "marks": (("roll_no", "i4"), ("question", "i4"), ("marks", "f8"), ("section_id", "i4")),
+    "sections": (("id", "i4"), ("teacher_id", "i4"), ("section_name", "str"),
+                 ("roll_start", "i4"), ("roll_end", "i4"), ("is_locked", "b1")),
+}
+
+# Exam columns kept in the footer, with the names of the users they point at
+EXAM_FIELDS = (
+    "id", "programme", "subject_code", "subject_name", "exam_type", "semester", "academic_year",
+    "is_locked", "locked_by", "created_by", "question_rules",
+)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_path(academic_year: str, directory: str = ARCHIVE_DIR) -> str:
+    safe = re.sub(r"[^0-9A-Za-z_-]", "_", academic_year)[:64]
+    # a year that did not survive as is ('2023/2024' next to '2023_2024', or
+    # differing only in case on a case-insensitive disk) gets a hash of its
+    # raw value so it cannot share another year's file
+    if safe != academic_year or safe != safe.lower():
+        safe += "-" + hashlib.sha1(academic_year.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(directory, safe + SUFFIX)
+
+
+# ---------- encoding ----------
+
+def _encode(kind: str, values: list) -> bytes:
+    if kind == "str":
+        return json.dumps(values, separators=(",", ":")).encode("utf-8")
+    if kind == "b1":
+        return bytes(1 if v else 0 for v in values)
+    if kind == "i4":
+        data = array("i", (-1 if v is None else int(v) for v in values))
+    else:
+        data = array("d", (math.nan if v is None else float(v) for v in values))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _decode(kind: str, raw: bytes) -> list:
+    if kind == "str":
+        return json.loads(raw)
+    if kind == "b1":
+        return [b == 1 for b in raw]
+    data = array("i" if kind == "i4" else "d")
+    data.frombytes(raw)
+    if sys.byteorder == "big":
+        data.byteswap()
+    if kind == "i4":
+        return data.tolist()
+    return [None if math.isnan(v) else v for v in data]
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+# ---------- writing ----------
+
+def _exam_tables(db: Session, exam: Exam) -> Dict[str, Dict[str, list]]:
+    questions = db.query(Question).filter(Question.exam_id == exam.id).order_by(Question.id.asc()).all()
+    students = db.query(Student).filter(Student.exam_id == exam.id).order_by(Student.roll_no.asc()).all()
+    position = {q.id: i for i, q in enumerate(questions)}
+    marks = (
+        db.query(Student.roll_no, Mark.question_id, Mark.marks, Mark.section_id)
+        .join(Student, Student.id == Mark.student_id)
+        .filter(Mark.exam_id == exam.id)
+        .order_by(Student.roll_no.asc(), Mark.question_id.asc())
+        .all()
+    )
+    sections = db.query(ExamSection).filter(ExamSection.exam_id == exam.id).order_by(ExamSection.roll_start).all()
+    marks = [m for m in marks if m.question_id in position]
+    return {
+        "questions": {
+            "id": [q.id for q in questions],
+            "label": [q.label for q in questions],
+            "max_marks": [q.max_marks for q in questions],
+            "order": [q.order or 0 for q in questions],
+        },
+        "students": {
+            "id": [s.id for s in students],
+            "roll_no": [s.roll_no for s in students],
+            "absent": [bool(s.absent) for s in students],
+        },
+        "marks": {
+            "roll_no": [m.roll_no for m in marks],
+            "question": [position[m.question_id] for m in marks],
+            "marks": [m.marks for m in marks],
+            "section_id": [m.section_id for m in marks],
+        },
+        "sections": {
+            "id": [s.id for s in sections],
+            "teacher_id": [s.teacher_id for s in sections],
+            "section_name": [s.section_name for s in sections],
+            "roll_start": [s.roll_start for s in sections],
+            "roll_end": [s.roll_end for s in sections],
+            "is_locked": [bool(s.is_locked) for s in sections],
+        },
+    }
+
+
+def write_archive(db: Session, academic_year: str, directory: str = ARCHIVE_DIR) -> dict:
+    """Pack every exam of ``academic_year`` into its archive file and return the file's summary."""
+    exams = db.query(Exam).filter(Exam.academic_year == academic_year).order_by(Exam.id.asc()).all()
+    if not exams:
+        raise ArchiveError(f"No exams found for academic year {academic_year}")
+
+    user_ids = {uid for e in exams for uid in (e.created_by, e.locked_by) if uid is not None}
+    names = dict(db.query(User.id, User.name).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+
+    os.makedirs(directory, exist_ok=True)
+    path = archive_path(academic_year, directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    footer_exams = []
+    counts = {table: 0 for table in TABLES}
+    try:
+        with open(tmp, "wb") as out:
+            out.write(MAGIC)
+            for exam in exams:
+                meta = {field: getattr(exam, field) for field in EXAM_FIELDS}
+                meta.update(
+                    locked_at=_iso(exam.locked_at),
+                    created_at=_iso(exam.created_at),
+                    updated_at=_iso(exam.updated_at),
+                    created_by_name=names.get(exam.created_by),
+                    locked_by_name=names.get(exam.locked_by),
+                    columns={},
+                )
+                for table, columns in _exam_tables(db, exam).items():
+                    directory_entry = {}
+                    for column, kind in TABLES[table]:
+                        values = columns[column]
+                        block = zlib.compress(_encode(kind, values), 6)
+                        directory_entry[column] = [out.tell(), len(block), kind, len(values)]
+                        out.write(block)
+                    meta["columns"][table] = directory_entry
+                    counts[table] += len(columns[TABLES[table][0][0]])
+                footer_exams.append(meta)
+
+            footer = zlib.compress(json.dumps({
+                "version": VERSION,
+                "academic_year": academic_year,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "counts": {"exams": len(exams), **counts},
+                "exams": footer_exams,
+            }, separators=(",", ":"), default=str).encode("utf-8"), 6)
+            out.write(footer)
+            out.write(_TAIL.pack(len(footer)))
+            out.write(MAGIC)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    _forget(path)
+    return open_archive(academic_year, directory).summary()
+
+
+# ---------- reading ----------
+
+class Archive:
+    """A memory-mapped archive file; columns are decompressed on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mm)
+        tail = len(MAGIC) + _TAIL.size
+        if size < len(MAGIC) + tail or self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            raise ArchiveError(f"{path} is not a Gradeflow archive")
+        (footer_len,) = _TAIL.unpack(self._mm[size - tail:size - len(MAGIC)])
+        footer = json.loads(zlib.decompress(self._mm[size - tail - footer_len:size - tail]))
+        if footer.get("version") != VERSION:
+            raise ArchiveError(f"{path}: unsupported archive version {footer.get('version')}")
+        self.academic_year: str = footer["academic_year"]
+        self.created_at: str = footer["created_at"]
+        self.counts: dict = footer["counts"]
+        self.exams: Dict[int, dict] = {e["id"]: e for e in footer["exams"]}
+
+    def summary(self) -> dict:
+        return {
+            "academic_year": self.academic_year,
+            "created_at": self.created_at,
+            "size_bytes": len(self._mm),
+            **self.counts,
+        }
+
+    def exam(self, exam_id: int) -> dict:
+        meta = self.exams.get(exam_id)
+        if meta is None:
+            raise KeyError(exam_id)
+        return meta
+
+    def table(self, exam_id: int, table: str) -> Dict[str, list]:
+        """Columns of one table of an exam's row group."""
+        out = {}
+        for column, (offset, length, kind, _rows) in self.exam(exam_id)["columns"][table].items():
+            out[column] = _decode(kind, zlib.decompress(self._mm[offset:offset + length]))
+        return out
+
+    def siblings(self, exam_id: int) -> List[int]:
+        """Ids of the exams of ``exam_id``'s logical exam, in id order."""
+        key = _logical_key(self.exam(exam_id))
+        return sorted(e["id"] for e in self.exams.values() if _logical_key(e) == key)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def _logical_key(meta: dict) -> tuple:
+    return tuple(meta[col] for col in LOGICAL_KEY)
+
+
+# open archives per process, keyed by path; reopened when the file changes
+_open: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def _forget(path: str) -> None:
+    with _lock:
+        entry = _open.pop(path, None)
+    if entry is not None:
+        entry[1].close()
+
+
+def open_archive(academic_year: str, directory: str = ARCHIVE_DIR) -> Archive:
+    path = archive_path(academic_year, directory)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        raise ArchiveError(f"No archive for academic year {academic_year}")
+    with _lock:
+        entry = _open.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+    archive = Archive(path)
+    with _lock:
+        _open[path] = (mtime, archive)
+    return archive
+
+
+def list_archives(directory: str = ARCHIVE_DIR) -> List[dict]:
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(SUFFIX):
+            continue
+        try:
+            summaries.append(Archive(os.path.join(directory, name)).summary())
+        except (ArchiveError, OSError, ValueError, zlib.error):
+            continue
+    return summaries
+
+
+# ---------- grids and sheets (same shapes as app/utils/results.py) ----------
+
+def exam_out(meta: dict) -> dict:
+    """ExamOut fields of an archived exam."""
+    return {k: v for k, v in meta.items() if k != "columns"}
+
+
+def _rules(archive: Archive, exam_ids: Iterable[int]) -> CompiledRules:
+    return CompiledRules.merge(compile_rules(archive.exam(i)["question_rules"]) for i in exam_ids)
+
+
+def _rows(columns: Dict[str, list]) -> List[SimpleNamespace]:
+    names = list(columns)
+    return [SimpleNamespace(**dict(zip(names, values))) for values in zip(*columns.values())]
+
+
+def _marks(archive: Archive, exam_id: int, labels: List[str]) -> List[dict]:
+    m = archive.table(exam_id, "marks")
+    return [
+        {"roll_no": roll, "question_label": labels[q], "marks": value}
+        for roll, q, value in zip(m["roll_no"], m["question"], m["marks"])
+    ]
+
+
+def archived_grid(archive: Archive, exam_id: int) -> dict:
+    """Grid of one archived exam, as GET /exams/{id}/marks served it."""
+    questions = sorted(_rows(archive.table(exam_id, "questions")), key=lambda q: q.order)
+    students = archive.table(exam_id, "students")
+    labels = archive.table(exam_id, "questions")["label"]
+    return {
+        "questions": [{"id": q.id, "label": q.label, "max_marks": q.max_marks} for q in questions],
+        "students": [
+            {"id": i, "roll_no": r, "absent": a}
+            for i, r, a in zip(students["id"], students["roll_no"], students["absent"])
+        ],
+        "marks": _marks(archive, exam_id, labels),
+    }
+
+
+def archived_merged_grid(archive: Archive, exam_ids: List[int]) -> dict:
+    """Grid over an archived logical exam: questions unique by label, students unique by roll."""
+    unique_questions: Dict[str, dict] = {}
+    students_by_roll: Dict[int, dict] = {}
+    marks: List[dict] = []
+    for exam_id in exam_ids:
+        questions = archive.table(exam_id, "questions")
+        for qid, label, max_marks in zip(questions["id"], questions["label"], questions["max_marks"]):
+            unique_questions.setdefault(label, {"id": qid, "label": label, "max_marks": max_marks})
+        students = archive.table(exam_id, "students")
+        for roll, absent in zip(students["roll_no"], students["absent"]):
+            entry = students_by_roll.setdefault(roll, {"id": roll, "roll_no": roll, "absent": False})
+            # if ABSENT in ANY exam -> absent in admin view
+            entry["absent"] = entry["absent"] or absent
+        marks.extend(_marks(archive, exam_id, questions["label"]))
+    return {
+        "questions": [unique_questions[label] for label in sorted(unique_questions, key=natural_key)],
+        "students": sorted(students_by_roll.values(), key=lambda s: int(s["roll_no"])),
+        "marks": marks,
+    }
+
+
+def _sheet_data(archive: Archive, exam_ids: List[int]):
+    labels: List[str] = []
+    students: List[SimpleNamespace] = []
+    marks_map: Dict[tuple, Optional[float]] = {}
+    student_section: Dict[tuple, str] = {}
+    for exam_id in exam_ids:
+        questions = archive.table(exam_id, "questions")
+        labels.extend(questions["label"])
+        sections = SectionIndex(
+            SectionSpan(s.id, s.roll_start, s.roll_end, s.section_name or "", s.teacher_id)
+            for s in _rows(archive.table(exam_id, "sections"))
+        )
+        for roll in archive.table(exam_id, "students")["roll_no"]:
+            sid = (exam_id, roll)
+            students.append(SimpleNamespace(id=sid, roll_no=roll))
+            sec = sections.find(roll)
+            student_section[sid] = sec.name if sec else ""
+        m = archive.table(exam_id, "marks")
+        for roll, q, value in zip(m["roll_no"], m["question"], m["marks"]):
+            marks_map[((exam_id, roll), questions["label"][q])] = value
+    students.sort(key=lambda s: s.roll_no)
+    return labels, students, marks_map, student_section
+
+
+def archived_sheet(archive: Archive, exam_id: int) -> dict:
+    labels, students, marks_map, student_section = _sheet_data(archive, [exam_id])
+    exam = SimpleNamespace(**archive.exam(exam_id))
+    layout = QuestionLayout.from_labels(labels)
+    return build_sheet(exam, layout, students, marks_map, student_section, _rules(archive, [exam_id]))
+
+
+def archived_merged_sheet(archive: Archive, exam_ids: List[int]) -> dict:
+    labels, students, marks_map, student_section = _sheet_data(archive, exam_ids)
+    ref = SimpleNamespace(**archive.exam(exam_ids[0]))
+    layout = QuestionLayout.from_labels(labels, merged=True)
+    return build_sheet(ref, layout, students, marks_map, student_section, _rules(archive, exam_ids), merged=True)
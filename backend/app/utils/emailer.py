@@ -1,9 +1,7 @@
 # app/utils/emailer.py
 
-import resend
 from typing import Optional
 from app.core.config import RESEND_API_KEY, EMAIL_FROM
-resend.api_key = RESEND_API_KEY
 
 def send_email(
     to_email: str,
@@ -15,6 +13,10 @@ def send_email(
     if not RESEND_API_KEY:
         raise RuntimeError("RESEND_API_KEY not configured")
 
+    # the SDK pulls in requests and friends; only pay for it when mailing
+    import resend
+    resend.api_key = RESEND_API_KEY
+
     try:
         params = {
             "from": EMAIL_FROM,
@@ -0,0 +1,154 @@
+# backend/app/utils/layout.py
+"""
+Question layout of an exam or of several merged exams: the columns of its
+sheet and grid, in display order.
+
+A single exam keeps its questions in creation order. A merged layout (a
+logical exam spread over several exams) takes the union of their labels in
+natural order, so Q2 comes before Q10 and Q1.b before Q1.10. Sub-questions
+are grouped under their main question, the label before the first dot.
+
+Layouts only change when save_marks creates questions, so they are cached
+in the shared cache ("question_layout" namespace): per exam as a versioned
+entry (see Cache.slot; save_marks calls invalidate_layouts before and after
+its commit), and per set of merged exams under the ids plus a version of
+each exam's layout, which a new question changes. The exports and grids
+then do no sorting or grouping of their own and never query the questions
+table.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.models.exam import Question
+
+LAYOUT_CACHE = "question_layout"
+
+_DIGITS = re.compile(r"(\d+)")
+
+# (id, label, max_marks); id and max_marks are None for archived labels
+QuestionRow = Tuple[Optional[int], str, Optional[float]]
+
+
+def natural_key(label: str) -> tuple:
+    """Sort key ordering the digit runs of ``label`` by value: Q2 < Q10."""
+    # split() puts the digit runs at the odd positions, so parts of one type line up
+    parts = _DIGITS.split(label)
+    return tuple(int(p) if i % 2 else p.casefold() for i, p in enumerate(parts)), label
+
+
+def _main(label: str) -> str:
+    return label.split(".", 1)[0]
+
+
+class QuestionLayout:
+    def __init__(self, questions: Sequence[QuestionRow], labels: Sequence[str], main_order: Sequence[str],
+                 subs_by_main: Dict[str, List[str]], version: tuple = ()):
+        self.questions = list(questions)       # grid columns, one per label when merged
+        self.labels = list(labels)             # sheet columns
+        self.main_order = list(main_order)
+        self.subs_by_main = subs_by_main
+        self.version = version
+
+    @classmethod
+    def build(cls, questions: Iterable[QuestionRow], merged: bool = False) -> "QuestionLayout":
+        """Layout of ``questions`` given in creation order."""
+        rows = list(questions)
+        if merged:
+            first: Dict[str, QuestionRow] = {}
+            for row in rows:
+                first.setdefault(row[1], row)
+            labels = sorted(first, key=natural_key)
+            rows = [first[label] for label in labels]
+        else:
+            labels = [row[1] for row in rows]
+
+        main_order: List[str] = []
+        subs_by_main: Dict[str, List[str]] = {}
+        for label in labels:
+            main = _main(label)
+            if main not in subs_by_main:
+                subs_by_main[main] = []
+                main_order.append(main)
+            subs_by_main[main].append(label)
+        # questions are only ever added, so count and newest id identify a layout
+        version = (len(rows), max((row[0] or 0 for row in rows), default=0))
+        return cls(rows, labels, main_order, subs_by_main, version)
+
+    @classmethod
+    def from_labels(cls, labels: Iterable[str], merged: bool = False) -> "QuestionLayout":
+        return cls.build(((None, label, None) for label in labels), merged)
+
+    def state(self) -> tuple:
+        return self.questions, self.labels, self.main_order, self.subs_by_main, self.version
+
+    def grid_questions(self) -> List[dict]:
+        return [{"id": qid, "label": label, "max_marks": max_marks} for qid, label, max_marks in self.questions]
+
+
+def exam_layouts(db: Session, exam_ids: Iterable[int]) -> Dict[int, QuestionLayout]:
+    """Layouts of ``exam_ids``, loading the uncached ones in one query."""
+    cache = get_cache()
+    layouts: Dict[int, QuestionLayout] = {}
+    missing = []
+    slots: Dict[int, str] = {}
+    for exam_id in set(exam_ids):
+        # taken before the query, so a layout read from rows a concurrent
+        # save is replacing lands in a slot its commit has already retired
+        slots[exam_id] = cache.slot(LAYOUT_CACHE, exam_id)
+        cached = cache.get_at(slots[exam_id])
+        if cached is None:
+            missing.append(exam_id)
+        else:
+            layouts[exam_id] = QuestionLayout(*cached)
+
+    if missing:
+        rows: Dict[int, List[QuestionRow]] = {exam_id: [] for exam_id in missing}
+        questions = (
+            db.query(Question.exam_id, Question.id, Question.label, Question.max_marks)
+            .filter(Question.exam_id.in_(missing))
+            .order_by(Question.exam_id.asc(), Question.order.asc(), Question.id.asc())
+        )
+        for exam_id, qid, label, max_marks in questions:
+            rows[exam_id].append((qid, label, max_marks))
+        for exam_id, items in rows.items():
+            layout = layouts[exam_id] = QuestionLayout.build(items)
+            cache.set_at(slots[exam_id], layout.state())
+    return layouts
+
+
+def exam_layout(db: Session, exam_id: int) -> QuestionLayout:
+    return exam_layouts(db, [exam_id])[exam_id]
+
+
+def merged_layout(db: Session, exam_ids: Iterable[int],
+                  layouts: Optional[Dict[int, QuestionLayout]] = None) -> QuestionLayout:
+    """Merged layout of ``exam_ids``, built from (and versioned by) the per-exam layouts."""
+    ids = sorted(set(exam_ids))
+    if layouts is None:
+        layouts = exam_layouts(db, ids)
+    key = "merged:" + ",".join(f"{exam_id}@{layouts[exam_id].version[0]}.{layouts[exam_id].version[1]}"
+                               for exam_id in ids)
+    cache = get_cache()
+    cached = cache.get(LAYOUT_CACHE, key)
+    if cached is not None:
+        return QuestionLayout(*cached)
+    layout = QuestionLayout.build((row for exam_id in ids for row in layouts[exam_id].questions), merged=True)
+    cache.set(LAYOUT_CACHE, key, layout.state())
+    return layout
+
+
+def invalidate_layouts(*exam_ids: int) -> None:
+    """Drop the cached layouts of ``exam_ids`` (all layouts when none are given).
+
+    Call it inside the transaction adding the questions and again after the
+    commit. Merged layouts need no explicit drop: their key carries each
+    exam's layout version, so they are rebuilt once the exam's layout is.
+    """
+    cache = get_cache()
+    if not exam_ids:
+        cache.invalidate(LAYOUT_CACHE)
+    for exam_id in exam_ids:
+        cache.bump(LAYOUT_CACHE, exam_id)
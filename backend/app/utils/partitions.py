@@ -0,0 +1,121 @@
+# backend/app/utils/partitions.py
+"""
+Marks and students partitioned by academic year (Postgres only).
+
+Both tables carry an ``academic_year`` column copied from their exam. After
+``python -m app.partition`` has converted them to LIST partitioned tables
+and DB_PARTITION_BY_YEAR is on:
+
+* queries add ``year_filter`` so Postgres prunes to the exam's partition;
+* a year gets its partitions when its first exam is created;
+* deleting a year drops its partitions instead of deleting rows one by one.
+
+With the flag off (the default, and always on SQLite) every helper here is a
+no-op and the column is simply filled in.
+"""
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_, text, true
+
+from app.core.config import DB_PARTITION_BY_YEAR
+
+# children before parents: marks reference students
+PARTITIONED_TABLES = ("marks", "students")
+
+
+def partitioning_enabled(bind) -> bool:
+    return DB_PARTITION_BY_YEAR and bind.dialect.name == "postgresql"
+
+
+# years spelled like this map one-to-one onto partition names
+_PLAIN_YEAR = re.compile(r"[0-9a-z]+(?:-[0-9a-z]+)*")
+
+
+def partition_name(table: str, academic_year: str) -> str:
+    """marks + '2023-2024' -> marks_y2023_2024; marks + '2023/2024' -> marks_y2023_2024_<hash>"""
+    year = academic_year or ""
+    name = f"{table}_y{re.sub(r'[^0-9A-Za-z]+', '_', year)[:32].lower()}"
+    # other spellings ('2023/2024', '2023 2024', upper case) would share a
+    # name once sanitized and case-folded, so they also carry a hash of the
+    # raw value
+    if len(year) > 32 or not _PLAIN_YEAR.fullmatch(year):
+        name += "_" + hashlib.sha1(year.encode("utf-8")).hexdigest()[:8]
+    return name
+
+
+def _literal(value: str) -> str:
+    return "'" + (value or "").replace("'", "''") + "'"
+
+
+def year_filter(model, academic_year):
+    """Predicate pruning ``model`` (Student or Mark) to one year's partition."""
+    if not DB_PARTITION_BY_YEAR or academic_year is None:
+        return true()
+    return model.academic_year == academic_year
+
+
+def exams_filter(model, years: Dict[int, Optional[str]]):
+    """``model`` rows of the exams in ``years`` (exam id -> academic_year), pruned to their partitions."""
+    if not DB_PARTITION_BY_YEAR:
+        return model.exam_id.in_(list(years))
+    by_year: Dict[Optional[str], List[int]] = defaultdict(list)
+    for exam_id, academic_year in years.items():
+        by_year[academic_year].append(exam_id)
+    return or_(*(and_(model.exam_id.in_(ids), year_filter(model, academic_year))
+                 for academic_year, ids in by_year.items()))
+
+
+def create_partition_ddl(academic_year: str) -> List[str]:
+    # students first, in the order the tables were created
+    return [
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, academic_year)} "
+        f"PARTITION OF {table} FOR VALUES IN ({_literal(academic_year)})"
+        for table in reversed(PARTITIONED_TABLES)
+    ]
+
+
+def drop_partition_ddl(academic_year: str) -> List[str]:
+    # detached first: that also removes the foreign key clones pointing at
+    # the students partition, which a plain DROP would trip over
+    statements = []
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, academic_year)
+        statements += [f"ALTER TABLE {table} DETACH PARTITION {name}", f"DROP TABLE {name}"]
+    return statements
+
+
+def _exists(db, name: str) -> bool:
+    # to_regclass is NULL for a missing table, without raising
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def ensure_year_partitions(db, academic_year: str) -> bool:
+    """Create the partitions of ``academic_year`` if missing; True when any were created."""
+    bind = db.get_bind()
+    if not partitioning_enabled(bind):
+        return False
+    # checked every time rather than remembered: another worker may have
+    # dropped the year since
+    if _exists(db, partition_name("marks", academic_year)):
+        return False
+    for statement in create_partition_ddl(academic_year):
+        db.execute(text(statement))
+    return True
+
+
+def drop_year_partitions(db, academic_year: str) -> bool:
+    """
+    Drop the marks and students partitions of ``academic_year``.
+
+    Much cheaper than cascading the exam delete into every mark row; the
+    caller still deletes the exams (and everything else under them).
+    """
+    bind = db.get_bind()
+    if not partitioning_enabled(bind) or not _exists(db, partition_name("marks", academic_year)):
+        return False
+    for statement in drop_partition_ddl(academic_year):
+        db.execute(text(statement))
+    return True
@@ -0,0 +1,184 @@
+# backend/app/utils/progress.py
+"""
+Marking progress counters.
+
+Every exam has one ExamProgress row for the whole exam (section_id NULL)
+and one per section, counting students, absentees, fully marked students
+and filled / blank cells. The admin progress view reads those rows for a
+whole academic year in one query instead of loading every exam's marks.
+
+save_marks maintains them on write: _write_group reports each student it
+touches to a ProgressDelta (state before and after the save), and
+apply_progress adds the differences with one UPDATE per row, in the same
+transaction as the marks. New questions turn every present student's new
+cells blank and unmark everyone, which the UPDATE derives from the row's
+own counters.
+
+refresh_progress recounts an exam from its students and marks instead; it
+runs when sections change (students move between rows), when a save finds
+a row missing, and from ``python -m app.migrate`` for exams saved before
+progress tracking existed.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, literal, update
+from sqlalchemy.orm import Session
+
+from app.models.exam import Exam, ExamProgress, Mark, Question, Student
+from app.utils.sections import SectionIndex, load_section_index
+
+COUNTERS = ("students", "absent", "marked", "cells_filled", "cells_blank")
+
+
+def refresh_progress(
+    db: Session,
+    exam: Exam,
+    sections: Optional[SectionIndex] = None,
+    touched: Iterable[Optional[int]] = (),
+    saved_at: Optional[datetime] = None,
+) -> None:
+    """
+    Recount ``exam``'s progress rows; the caller commits.
+
+    ``touched`` are the section ids (None: no section) a save wrote to; they
+    and the exam row get ``saved_at`` as their last save time.
+    """
+    # serialise concurrent saves of one exam so the last recount sees every commit
+    db.query(Exam.id).filter(Exam.id == exam.id).with_for_update().first()
+    if sections is None:
+        # the cached index may not see an uncommitted section yet
+        sections = load_section_index(db, exam.id)
+
+    n_questions = db.query(func.count(Question.id)).filter(Question.exam_id == exam.id).scalar() or 0
+    students = (
+        db.query(Student.roll_no, Student.absent, func.count(Mark.marks))
+        .outerjoin(Mark, Mark.student_id == Student.id)
+        .filter(Student.exam_id == exam.id)
+        .group_by(Student.id, Student.roll_no, Student.absent)
+        .all()
+    )
+
+    counts: Dict[Optional[int], Dict[str, int]] = {None: dict.fromkeys(COUNTERS, 0)}
+    for span in sections.spans:
+        counts[span.id] = dict.fromkeys(COUNTERS, 0)
+    for roll_no, absent, filled in students:
+        span = sections.find(roll_no)
+        buckets = [counts[None]] + ([counts[span.id]] if span else [])
+        filled = min(filled, n_questions)
+        for c in buckets:
+            c["students"] += 1
+            if absent:
+                c["absent"] += 1
+                continue
+            c["cells_filled"] += filled
+            c["cells_blank"] += n_questions - filled
+            if n_questions and filled == n_questions:
+                c["marked"] += 1
+
+    teachers = {span.id: span.teacher_id for span in sections.spans}
+    teachers[None] = exam.created_by
+    touched = set(touched)
+    existing = {row.section_id: row for row in db.query(ExamProgress).filter(ExamProgress.exam_id == exam.id)}
+
+    for section_id, values in counts.items():
+        row = existing.pop(section_id, None)
+        if row is None:
+            row = ExamProgress(exam_id=exam.id, section_id=section_id)
+            db.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+        row.teacher_id = teachers[section_id]
+        if saved_at is not None and (section_id is None or section_id in touched):
+            row.last_saved_at = saved_at
+    for stale in existing.values():
+        db.delete(stale)
+
+
+def _contribution(absent: bool, filled: int, questions: int) -> Dict[str, int]:
+    """What one student adds to its rows' counters."""
+    if absent:
+        return {"students": 1, "absent": 1}
+    filled = min(filled, questions)
+    return {
+        "students": 1,
+        "cells_filled": filled,
+        "cells_blank": questions - filled,
+        "marked": int(bool(questions) and filled == questions),
+    }
+
+
+class ProgressDelta:
+    """Counter changes of one marks flush, collected by _write_group."""
+
+    def __init__(self, sections: SectionIndex):
+        self.sections = sections
+        self.questions_before: Optional[int] = None
+        self.questions = 0
+        # student -> [section id, state before (absent, filled) or None if new, filled now]
+        self._students: Dict[Student, list] = {}
+
+    def count_questions(self, existing: int, created: int = 0) -> None:
+        if self.questions_before is None:
+            self.questions_before = self.questions = existing
+        self.questions += created
+
+    def student(self, student: Student, filled: int, new: bool = False) -> None:
+        """Register ``student`` before the save changes it; ``filled`` counts its entered marks."""
+        if student not in self._students:
+            span = self.sections.find(student.roll_no)
+            before = None if new else (bool(student.absent), filled)
+            self._students[student] = [span.id if span else None, before, filled]
+
+    def cell(self, student: Student, old: Optional[float], new: Optional[float]) -> None:
+        self._students[student][2] += (new is not None) - (old is not None)
+
+    @property
+    def touched(self) -> set:
+        return {entry[0] for entry in self._students.values()}
+
+    def changes(self) -> Dict[Optional[int], Dict[str, int]]:
+        """Per row (section id, None for the exam): counter differences at the new question count."""
+        diffs: Dict[Optional[int], Dict[str, int]] = {}
+        for student, (section_id, before, filled) in self._students.items():
+            after = _contribution(bool(student.absent), filled, self.questions)
+            old = _contribution(*before, self.questions) if before is not None else {}
+            for key in {None, section_id}:
+                row = diffs.setdefault(key, dict.fromkeys(COUNTERS, 0))
+                for name in COUNTERS:
+                    row[name] += after.get(name, 0) - old.get(name, 0)
+        return diffs
+
+
+def apply_progress(db: Session, exam: Exam, delta: ProgressDelta, saved_at: Optional[datetime] = None) -> None:
+    """Add ``delta`` to ``exam``'s progress rows; recounts if a row is missing. The caller commits."""
+    grown = delta.questions - (delta.questions_before or 0)
+    changes = delta.changes()
+    touched = delta.touched
+    rows = [None] + [span.id for span in delta.sections.spans] if grown else list(changes)
+    for section_id in rows:
+        diff = changes.get(section_id, dict.fromkeys(COUNTERS, 0))
+        values = {
+            name: getattr(ExamProgress, name) + diff[name]
+            for name in ("students", "absent", "cells_filled")
+        }
+        # SET expressions read the row as it was: new cells of the students
+        # already counted start blank, and nobody is fully marked any more
+        values["cells_blank"] = (
+            ExamProgress.cells_blank + grown * (ExamProgress.students - ExamProgress.absent) + diff["cells_blank"]
+        )
+        values["marked"] = (literal(0) if grown else ExamProgress.marked) + diff["marked"]
+        if saved_at is not None and (section_id is None or section_id in touched):
+            values["last_saved_at"] = saved_at
+        section = ExamProgress.section_id.is_(None) if section_id is None else ExamProgress.section_id == section_id
+        updated = db.execute(
+            update(ExamProgress)
+            .where(ExamProgress.exam_id == exam.id, section)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            # never counted (an exam from before progress tracking): count it all now
+            refresh_progress(db, exam, delta.sections, touched, saved_at=saved_at)
+            return
+
@@ -0,0 +1,265 @@
+# backend/app/utils/results.py
+"""
+Result sheets and marks grids of exams.
+
+A sheet is the per-student table with per-question and grand totals that
+the CSV exports are rendered from; a grid is the questions / students /
+marks payload of the marks views. Both are plain JSON-serialisable dicts so
+they can be frozen in a snapshot:
+
+    sheet: {"filename": ..., "preamble": [...], "header": [...], "rows": [[...], ...],
+            "totals": [{"roll_no", "section", "totals": {main: total}, "grand_total"}, ...]}
+    grid:  {"questions": [{"id", "label", "max_marks"}, ...],
+            "students": [{"id", "roll_no", "absent"}, ...],
+            "marks": [{"roll_no", "question_label", "marks"}, ...]}
+"""
+import csv
+import io
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.exam import Exam, Mark, Question, Student
+from app.utils.layout import QuestionLayout, exam_layout, exam_layouts, merged_layout
+from app.utils.partitions import exams_filter, year_filter
+from app.utils.rules import CompiledRules, merged_rules_for, rules_for
+from app.utils.sections import section_index, section_indexes
+
+
+def _number(value: float):
+    # integer if whole else round 2 decimals
+    if float(value).is_integer():
+        return int(value)
+    return round(float(value), 2)
+
+
+def _preamble(exam: Exam) -> List[List[str]]:
+    return [
+        [f"Academic Year: {exam.academic_year or ''}"],
+        [f"Subject: {exam.subject_name} ({exam.subject_code})"],
+        [f"Semester: {exam.semester}"],
+        [f"Exam Type: {exam.exam_type}"],
+        [],
+    ]
+
+
+def _build(students, main_order, subs_by_main, marks_map, student_section, rules: CompiledRules) -> dict:
+    header = ["Roll No", "Section"]
+    # for each main question add its subs then a Total column
+    for main in main_order:
+        header.extend(subs_by_main[main])
+        header.append(f"Total_{main}")  # e.g. Total_Q1
+    header.append("Grand_Total")
+
+    rows: List[list] = []
+    totals: List[dict] = []
+    for s in students:
+        section = student_section.get(s.id, "")
+        row: List[Any] = [s.roll_no, section]
+        main_totals: Dict[str, Any] = {}
+        grand_total = 0.0
+
+        for main in main_order:
+            values: List[float] = []
+            for lbl in subs_by_main[main]:
+                v = marks_map.get((s.id, lbl))
+                # blank if None (absent / not entered), fraction kept as-is
+                row.append("" if v is None else v)
+                if v is not None:
+                    values.append(v)
+
+            # best N answers when the question has a min-to-count rule
+            main_total = rules.main_total(main, values)
+            main_totals[main] = _number(main_total)
+            row.append(main_totals[main])
+            grand_total += main_total
+
+        row.append(_number(grand_total))
+        rows.append(row)
+        totals.append({
+            "roll_no": s.roll_no,
+            "section": section,
+            "totals": main_totals,
+            "grand_total": _number(grand_total),
+        })
+
+    return {"header": header, "rows": rows, "totals": totals}
+
+
+def _marks_map(marks, layouts) -> Dict[tuple, Optional[float]]:
+    # marks_map: (student_id, label) -> mark_value
+    id_to_label = {qid: lbl for layout in layouts for qid, lbl, _ in layout.questions}
+    marks_map: Dict[tuple, Optional[float]] = {}
+    for m in marks:
+        lbl = id_to_label.get(m.question_id)
+        if lbl:
+            marks_map[(m.student_id, lbl)] = None if m.marks is None else float(m.marks)
+    return marks_map
+
+
+def build_sheet(exam, layout: QuestionLayout, students, marks_map, student_section,
+                rules: CompiledRules, merged: bool = False) -> dict:
+    """
+    Sheet from already loaded data; ``exam`` only needs the metadata
+    attributes. ``students`` have ``id`` and ``roll_no`` and are in roll
+    order; ``marks_map`` and ``student_section`` are keyed by student id.
+    """
+    sheet = _build(students, layout.main_order, layout.subs_by_main, marks_map, student_section, rules)
+    sheet["preamble"] = _preamble(exam)
+    if merged:
+        sheet["filename"] = (
+            f"{exam.subject_code}_{exam.subject_name}_"
+            f"{exam.exam_type}_Sem{exam.semester}_{exam.academic_year}_MERGED.csv"
+        )
+    else:
+        sheet["filename"] = (
+            f"{(exam.subject_name or 'exam').replace(' ', '_')}_{exam.exam_type}_"
+            f"Sem{exam.semester}_{exam.academic_year or ''}.csv"
+        )
+    return sheet
+
+
+def single_exam_sheet(db: Session, exam: Exam) -> dict:
+    """Sheet of one exam, questions in creation order."""
+    layout = exam_layout(db, exam.id)
+
+    students = (
+        db.query(Student)
+        .filter(Student.exam_id == exam.id, year_filter(Student, exam.academic_year))
+        .order_by(Student.roll_no.asc())
+        .all()
+    )
+    marks = db.query(Mark).filter(Mark.exam_id == exam.id, year_filter(Mark, exam.academic_year)).all()
+    marks_map = _marks_map(marks, [layout])
+
+    # student -> section name, from the section whose roll range holds the student
+    sections = section_index(db, exam.id)
+    student_section: Dict[int, str] = {}
+    for s in students:
+        sec = sections.find(s.roll_no)
+        student_section[s.id] = sec.name if sec else ""
+
+    return build_sheet(exam, layout, students, marks_map, student_section, rules_for(exam))
+
+
+def merged_exam_sheet(db: Session, exams: List[Exam]) -> dict:
+    """Sheet over several exams of one logical exam, labels merged in natural order."""
+    exam_ids = [e.id for e in exams]
+    ref = exams[0]  # metadata reference
+
+    layouts = exam_layouts(db, exam_ids)
+    layout = merged_layout(db, exam_ids, layouts)
+
+    students = (
+        db.query(Student)
+        .filter(Student.exam_id.in_(exam_ids), year_filter(Student, ref.academic_year))
+        .order_by(Student.roll_no.asc())
+        .all()
+    )
+    marks = db.query(Mark).filter(Mark.exam_id.in_(exam_ids), year_filter(Mark, ref.academic_year)).all()
+    marks_map = _marks_map(marks, layouts.values())
+
+    # each student's section comes from the interval index of its own exam
+    indexes = section_indexes(db, exam_ids)
+    student_section: Dict[int, str] = {}
+    for s in students:
+        sec = indexes[s.exam_id].find(s.roll_no) if s.exam_id in indexes else None
+        student_section[s.id] = sec.name if sec else ""
+
+    return build_sheet(
+        ref, layout, students, marks_map, student_section,
+        merged_rules_for(exams), merged=True,
+    )
+
+
+def single_exam_grid(db: Session, exam: Exam) -> dict:
+    """Grid of one exam, as served by GET /exams/{id}/marks."""
+    layout = exam_layout(db, exam.id)
+    students = (
+        db.query(Student)
+        .filter(Student.exam_id == exam.id, year_filter(Student, exam.academic_year))
+        .order_by(Student.roll_no.asc())
+        .all()
+    )
+    marks = (
+        db.query(Student.roll_no, Question.label, Mark.marks)
+        .join(Mark, Mark.student_id == Student.id)
+        .join(Question, Question.id == Mark.question_id)
+        .filter(Student.exam_id == exam.id, year_filter(Student, exam.academic_year),
+                year_filter(Mark, exam.academic_year))
+        .all()
+    )
+    return {
+        "questions": layout.grid_questions(),
+        "students": [{"id": s.id, "roll_no": s.roll_no, "absent": bool(s.absent)} for s in students],
+        "marks": [{"roll_no": r, "question_label": lbl, "marks": v} for r, lbl, v in marks],
+    }
+
+
+def exam_grids(db: Session, years: Dict[int, Optional[str]]) -> Dict[int, dict]:
+    """Grids of several exams (exam id -> academic_year; as single_exam_grid) from one query per table."""
+    grids: Dict[int, dict] = {exam_id: {"questions": [], "students": [], "marks": []} for exam_id in years}
+    if not years:
+        return grids
+    for exam_id, layout in exam_layouts(db, years).items():
+        grids[exam_id]["questions"] = layout.grid_questions()
+    students = (
+        db.query(Student.exam_id, Student.id, Student.roll_no, Student.absent)
+        .filter(exams_filter(Student, years))
+        .order_by(Student.exam_id.asc(), Student.roll_no.asc())
+    )
+    for exam_id, student_id, roll, absent in students:
+        grids[exam_id]["students"].append({"id": student_id, "roll_no": roll, "absent": bool(absent)})
+    marks = (
+        db.query(Student.exam_id, Student.roll_no, Question.label, Mark.marks)
+        .join(Mark, Mark.student_id == Student.id)
+        .join(Question, Question.id == Mark.question_id)
+        .filter(exams_filter(Student, years), exams_filter(Mark, years))
+    )
+    for exam_id, roll, label, value in marks:
+        grids[exam_id]["marks"].append({"roll_no": roll, "question_label": label, "marks": value})
+    return grids
+
+
+def merged_exam_grid(db: Session, exams: List[Exam]) -> dict:
+    """Grid over a logical exam: questions unique by label, students unique by roll."""
+    exam_ids = [e.id for e in exams]
+    # one logical exam is one academic year
+    year = exams[0].academic_year
+
+    layout = merged_layout(db, exam_ids)
+
+    students_by_roll: Dict[int, dict] = {}
+    students = db.query(Student.roll_no, Student.absent).filter(
+        Student.exam_id.in_(exam_ids), year_filter(Student, year)
+    )
+    for roll, absent in students:
+        entry = students_by_roll.get(roll)
+        if entry is None:
+            # synthetic but stable id
+            students_by_roll[roll] = {"id": roll, "roll_no": roll, "absent": bool(absent)}
+        else:
+            # if ABSENT in ANY exam -> absent in admin view
+            entry["absent"] = entry["absent"] or bool(absent)
+
+    marks = (
+        db.query(Student.roll_no, Question.label, Mark.marks)
+        .join(Student, Student.id == Mark.student_id)
+        .join(Question, Question.id == Mark.question_id)
+        .filter(Mark.exam_id.in_(exam_ids), year_filter(Mark, year), year_filter(Student, year))
+        .all()
+    )
+    return {
+        "questions": layout.grid_questions(),
+        "students": sorted(students_by_roll.values(), key=lambda s: int(s["roll_no"])),
+        "marks": [{"roll_no": r, "question_label": lbl, "marks": v} for r, lbl, v in marks],
+    }
+
+
+def sheet_csv(sheet: dict) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerows(sheet["preamble"])
+    writer.writerow(sheet["header"])
+    writer.writerows(sheet["rows"])
+    return out.getvalue()
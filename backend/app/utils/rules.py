@@ -0,0 +1,77 @@
+# backend/app/utils/rules.py
+"""
+Compiled question rules.
+
+An exam's ``question_rules`` JSON is validated and reduced once into a
+CompiledRules (main label -> how many of its best sub-question marks count)
+and kept per exam and rules_version. Totals then look a main question up
+in one dict instead of re-parsing the JSON and probing key spellings for
+every student.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from app.models.exam import Exam
+from app.schemas.exam_schema import decode_question_rules
+
+RULES_CACHE_SIZE = 1024
+
+
+class CompiledRules:
+    __slots__ = ("best_of",)
+
+    def __init__(self, best_of: Optional[Dict[str, int]] = None):
+        self.best_of: Dict[str, int] = best_of or {}
+
+    def main_total(self, main: str, values: list) -> float:
+        """Total of a main question from its entered sub-question marks."""
+        n = self.best_of.get(main)
+        if n:
+            return sum(heapq.nlargest(n, values))
+        return sum(values)
+
+    @classmethod
+    def merge(cls, compiled: Iterable["CompiledRules"]) -> "CompiledRules":
+        # the first exam defining a rule for a question wins
+        best_of: Dict[str, int] = {}
+        for rules in compiled:
+            for main, n in rules.best_of.items():
+                best_of.setdefault(main, n)
+        return cls(best_of)
+
+
+def compile_rules(raw) -> CompiledRules:
+    return CompiledRules({
+        main: rule.minToCount
+        for main, rule in decode_question_rules(raw).items()
+        if rule.minToCount
+    })
+
+
+# (exam id, created_at, rules_version) -> compiled; created_at tells apart an
+# exam that reuses the id of a deleted one
+_compiled: "OrderedDict[tuple, CompiledRules]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def rules_for(exam: Exam) -> CompiledRules:
+    """Compiled rules of ``exam``, cached per exam version."""
+    key = (exam.id, exam.created_at, exam.rules_version or 0)
+    with _lock:
+        rules = _compiled.get(key)
+        if rules is not None:
+            _compiled.move_to_end(key)
+            return rules
+
+    rules = compile_rules(exam.question_rules)
+    with _lock:
+        _compiled[key] = rules
+        if len(_compiled) > RULES_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return rules
+
+
+def merged_rules_for(exams: Iterable[Exam]) -> CompiledRules:
+    return CompiledRules.merge(rules_for(e) for e in exams)
@@ -0,0 +1,126 @@
+# backend/app/utils/sections.py
+"""
+Per-exam interval index over ExamSection roll ranges.
+
+Sections of one exam never overlap (create_section enforces it), so sorted
+by roll_start their roll_end values are sorted too. Overlap checks and
+roll -> section lookups are then one bisect each instead of a scan of the
+sections or of every mark's section_id.
+
+Indexes are cached per exam in the shared cache ("sections" namespace) as
+versioned entries (see Cache.slot): a route changing an exam's sections
+calls invalidate_sections before and after its commit, so an index loaded
+from the rows as they were before the commit is never served.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.models.exam import ExamSection
+
+SECTIONS_CACHE = "sections"
+
+
+class SectionSpan(NamedTuple):
+    id: int
+    roll_start: int
+    roll_end: int
+    name: str
+    teacher_id: Optional[int]
+
+
+class SectionIndex:
+    def __init__(self, spans: Iterable[SectionSpan]):
+        self.spans: List[SectionSpan] = sorted(spans, key=lambda s: (s.roll_start, s.roll_end))
+        self._starts = [s.roll_start for s in self.spans]
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def find(self, roll_no: int) -> Optional[SectionSpan]:
+        """The section whose range contains ``roll_no``."""
+        i = bisect_right(self._starts, roll_no) - 1
+        if i >= 0 and self.spans[i].roll_end >= roll_no:
+            return self.spans[i]
+        return None
+
+    def overlapping(self, roll_start: int, roll_end: int) -> Optional[SectionSpan]:
+        """A section intersecting ``roll_start..roll_end``, if any."""
+        # the last section starting at or before roll_end has the largest end
+        # of all candidates, so it is the only one to check
+        i = bisect_right(self._starts, roll_end) - 1
+        if i >= 0 and self.spans[i].roll_end >= roll_start:
+            return self.spans[i]
+        return None
+
+    def get(self, section_id: int) -> Optional[SectionSpan]:
+        return next((s for s in self.spans if s.id == section_id), None)
+
+    def for_teacher(self, teacher_id: int) -> List[SectionSpan]:
+        return [s for s in self.spans if s.teacher_id == teacher_id]
+
+
+def _span(row) -> SectionSpan:
+    return SectionSpan(row.id, row.roll_start, row.roll_end, row.section_name or "", row.teacher_id)
+
+
+def load_section_index(db: Session, exam_id: int) -> SectionIndex:
+    """Index straight from the session, bypassing the cache (sees uncommitted sections)."""
+    rows = (
+        db.query(ExamSection.id, ExamSection.roll_start, ExamSection.roll_end,
+                 ExamSection.section_name, ExamSection.teacher_id)
+        .filter(ExamSection.exam_id == exam_id)
+        .all()
+    )
+    return SectionIndex(_span(row) for row in rows)
+
+
+def section_indexes(db: Session, exam_ids: Iterable[int]) -> Dict[int, SectionIndex]:
+    """Section indexes for ``exam_ids``, loading the uncached ones in one query."""
+    cache = get_cache()
+    spans: Dict[int, list] = {}
+    missing = []
+    slots: Dict[int, str] = {}
+    for exam_id in set(exam_ids):
+        # taken before the query: see the module docstring
+        slots[exam_id] = cache.slot(SECTIONS_CACHE, exam_id)
+        cached = cache.get_at(slots[exam_id])
+        if cached is None:
+            missing.append(exam_id)
+        else:
+            spans[exam_id] = cached
+
+    if missing:
+        loaded: Dict[int, list] = {exam_id: [] for exam_id in missing}
+        rows = (
+            db.query(ExamSection.id, ExamSection.exam_id, ExamSection.roll_start, ExamSection.roll_end,
+                     ExamSection.section_name, ExamSection.teacher_id)
+            .filter(ExamSection.exam_id.in_(missing))
+            .all()
+        )
+        for row in rows:
+            loaded[row.exam_id].append(tuple(_span(row)))
+        for exam_id, items in loaded.items():
+            cache.set_at(slots[exam_id], items)
+        spans.update(loaded)
+
+    return {exam_id: SectionIndex(SectionSpan(*item) for item in items) for exam_id, items in spans.items()}
+
+
+def section_index(db: Session, exam_id: int) -> SectionIndex:
+    return section_indexes(db, [exam_id])[exam_id]
+
+
+def invalidate_sections(*exam_ids: int) -> None:
+    """Drop the cached indexes of ``exam_ids`` (all exams when none are given).
+
+    Call it inside the transaction changing the sections and again after
+    the commit.
+    """
+    cache = get_cache()
+    if not exam_ids:
+        cache.invalidate(SECTIONS_CACHE)
+    for exam_id in exam_ids:
+        cache.bump(SECTIONS_CACHE, exam_id)
@@ -0,0 +1,113 @@
+# backend/app/utils/snapshots.py
+"""
+Frozen results of finalized exams.
+
+Finalizing stamps the exams with ``locked_at`` and writes one immutable
+``result_snapshots`` row per exam (plus one for the merged logical exam on an
+admin finalize). Each row holds a zlib-compressed JSON document with the
+marks grid, the per-student totals and the rendered CSV, keyed by
+(exam, scope, locked_at).
+
+While an exam stays locked its marks cannot change, so the marks views and
+exports read that one row instead of every mark. A snapshot only matches
+the lock it was taken at; unfinalizing, or editing a locked exam's
+metadata, deletes it.
+"""
+import json
+import zlib
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.exam import Exam, ResultSnapshot
+from app.utils.results import (
+    merged_exam_grid,
+    merged_exam_sheet,
+    sheet_csv,
+    single_exam_grid,
+    single_exam_sheet,
+)
+
+SINGLE = "single"
+MERGED = "merged"
+
+
+def _pack(sheet: dict, grid: dict) -> bytes:
+    doc = {"filename": sheet["filename"], "csv": sheet_csv(sheet), "totals": sheet["totals"], "grid": grid}
+    return zlib.compress(json.dumps(doc, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def unpack(snap: ResultSnapshot) -> dict:
+    """The snapshot's {"filename", "csv", "totals", "grid"} document."""
+    return json.loads(zlib.decompress(snap.blob))
+
+
+def _store(db: Session, exam_id: int, scope: str, locked_at, blob: bytes,
+           exam_ids: Optional[List[int]] = None) -> None:
+    # older locks of this exam can never match again
+    db.query(ResultSnapshot).filter(
+        ResultSnapshot.exam_id == exam_id, ResultSnapshot.scope == scope
+    ).delete(synchronize_session=False)
+    db.add(ResultSnapshot(
+        exam_id=exam_id,
+        scope=scope,
+        locked_at=locked_at,
+        exam_ids=json.dumps(sorted(exam_ids)) if exam_ids else None,
+        blob=blob,
+    ))
+
+
+def snapshot_exams(db: Session, exams: List[Exam], locked_at, merged: bool = False) -> None:
+    """Freeze each of ``exams`` (plus their merged results) at ``locked_at``; the caller commits."""
+    for exam in exams:
+        _store(db, exam.id, SINGLE, locked_at, _pack(single_exam_sheet(db, exam), single_exam_grid(db, exam)))
+    if merged and exams:
+        ids = [e.id for e in exams]
+        blob = _pack(merged_exam_sheet(db, exams), merged_exam_grid(db, exams))
+        _store(db, min(ids), MERGED, locked_at, blob, ids)
+
+
+def single_snapshot(db: Session, exam: Exam) -> Optional[dict]:
+    if not exam.is_locked or exam.locked_at is None:
+        return None
+    snap = (
+        db.query(ResultSnapshot)
+        .filter(
+            ResultSnapshot.exam_id == exam.id,
+            ResultSnapshot.scope == SINGLE,
+            ResultSnapshot.locked_at == exam.locked_at,
+        )
+        .first()
+    )
+    return None if snap is None else unpack(snap)
+
+
+def merged_snapshot(db: Session, exams: List[Exam]) -> Optional[dict]:
+    """Merged results covering exactly ``exams``, if they are all still under the same lock."""
+    if not exams:
+        return None
+    locked_at = exams[0].locked_at
+    if locked_at is None or not all(e.is_locked and e.locked_at == locked_at for e in exams):
+        return None
+    ids = sorted(e.id for e in exams)
+    snap = (
+        db.query(ResultSnapshot)
+        .filter(
+            ResultSnapshot.exam_id == ids[0],
+            ResultSnapshot.scope == MERGED,
+            ResultSnapshot.locked_at == locked_at,
+        )
+        .first()
+    )
+    # an exam added to the group after finalizing makes the snapshot stale
+    if snap is None or json.loads(snap.exam_ids or "[]") != ids:
+        return None
+    return unpack(snap)
+
+
+def drop_snapshots(db: Session, exam_ids: Iterable[int]) -> int:
+    """Delete the snapshots of ``exam_ids``; the caller commits."""
+    ids = list(exam_ids)
+    if not ids:
+        return 0
+    return db.query(ResultSnapshot).filter(ResultSnapshot.exam_id.in_(ids)).delete(synchronize_session=False)
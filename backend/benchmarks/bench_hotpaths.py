@@ -0,0 +1,219 @@
+# backend/benchmarks/bench_hotpaths.py
+"""
+Latency benchmark for the grading hot paths.
+
+Seeds a throwaway database, then drives the real app in-process (TestClient)
+and reports p50/p95 latency, queries per call (from the Server-Timing header)
+and peak RSS for each endpoint.
+
+    cd backend
+    python -m benchmarks.bench_hotpaths
+    python -m benchmarks.bench_hotpaths --preset exam-week
+    python -m benchmarks.bench_hotpaths --database-url postgresql://localhost/gradeflow_bench --reset
+    python -m benchmarks.bench_hotpaths --json current.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+PRESETS = {
+    "small": {"exams": 10, "students": 500, "questions": 20},
+    "exam-week": {"exams": 50, "students": 2000, "questions": 30},
+}
+
+_TIMING_RE = re.compile(r'db;dur=([\d.]+);desc="queries=(\d+) rows=(\d+)"')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true", help="allow dropping all tables on a non-SQLite --database-url")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--exams", type=int)
+    parser.add_argument("--students", type=int, help="students per exam")
+    parser.add_argument("--questions", type=int, help="questions per exam")
+    parser.add_argument("--teachers-per-subject", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--login-repeat", type=int, default=5, help="login is dominated by Argon2, keep it short")
+    parser.add_argument("--json", dest="json_out", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed p95 slowdown before flagging (0.20 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def measure(name: str, call: Callable, repeat: int, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        call(0)
+    timings, queries, db_ms = [], [], []
+    for i in range(repeat):
+        started = time.perf_counter()
+        resp = call(i + 1)
+        elapsed = time.perf_counter() - started
+        if resp.status_code >= 400:
+            raise RuntimeError(f"{name}: HTTP {resp.status_code}: {resp.text[:200]}")
+        timings.append(elapsed * 1000)
+        match = _TIMING_RE.search(resp.headers.get("server-timing", ""))
+        if match:
+            db_ms.append(float(match.group(1)))
+            queries.append(int(match.group(2)))
+    return {
+        "name": name,
+        "calls": repeat,
+        "p50_ms": round(percentile(timings, 0.50), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "mean_ms": round(sum(timings) / len(timings), 2),
+        "db_ms": round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+        "queries": round(sum(queries) / len(queries), 1) if queries else None,
+        "peak_rss_mb": round(peak_rss_mb() or 0, 1) or None,
+    }
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path) as fh:
+        baseline = {r["name"]: r for r in json.load(fh)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base:
+            continue
+        if r["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r['name']}: p95 {base['p95_ms']}ms -> {r['p95_ms']}ms")
+        if base.get("queries") is not None and r["queries"] is not None and r["queries"] > base["queries"]:
+            regressions.append(f"{r['name']}: queries/call {base['queries']} -> {r['queries']}")
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    header = f"{'endpoint':<28}{'p50 ms':>10}{'p95 ms':>10}{'db ms':>10}{'queries':>10}{'peak RSS MB':>14}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['name']:<28}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+            f"{r['db_ms'] if r['db_ms'] is not None else '-':>10}"
+            f"{r['queries'] if r['queries'] is not None else '-':>10}"
+            f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>14}"
+        )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scale = dict(PRESETS[args.preset])
+    for key in ("exams", "students", "questions"):
+        if getattr(args, key):
+            scale[key] = getattr(args, key)
+
+    url = args.database_url
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="gradeflow-bench-"), "bench.db")
+    elif not url.startswith("sqlite") and not args.reset:
+        print("Refusing to drop tables on a non-SQLite database without --reset", file=sys.stderr)
+        return 2
+
+    # the app reads these at import time
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ["METRICS_ENABLED"] = "true"
+
+    from fastapi.testclient import TestClient
+
+    from app.database import engine
+    from app.main import app
+    from benchmarks.seed import BENCH_PASSWORD, seed
+
+    print(f"Seeding {scale['exams']} exams x {scale['students']} students x {scale['questions']} questions into {engine.url.render_as_string(hide_password=True)}")
+    started = time.perf_counter()
+    data = seed(engine, teachers_per_subject=args.teachers_per_subject, **scale)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    client = TestClient(app)
+
+    def login(email):
+        resp = client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+        resp.raise_for_status()
+        return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    admin = login(data.admin_email)
+    exam_id = data.exam_ids[0]
+    teacher_email = data.exam_owner[exam_id]
+    teacher = login(teacher_email)
+    group_key, group_ids = next((k, ids) for k, ids in data.groups.items() if exam_id in ids)
+    code, name, exam_type, semester, academic_year = group_key
+    roll_start, roll_end = data.roll_range[exam_id]
+
+    def save_payload(i):
+        return {
+            "section_id": data.section_id[exam_id],
+            "subject_code": code,
+            "subject_name": name,
+            "exam_type": exam_type,
+            "semester": semester,
+            "questions": [{"label": lbl, "max_marks": 10} for lbl in data.question_labels],
+            "students": [
+                {"roll_no": roll, "absent": False,
+                 "marks": {lbl: float((roll + n + i) % 11) for n, lbl in enumerate(data.question_labels)}}
+                for roll in range(roll_start, roll_end + 1)
+            ],
+        }
+
+    ops = [
+        ("login", lambda i: client.post("/auth/login", json={"email": teacher_email, "password": BENCH_PASSWORD}), args.login_repeat),
+        ("list_exams (teacher)", lambda i: client.get("/exams", headers=teacher), args.repeat),
+        ("list_exams (admin)", lambda i: client.get("/exams", headers=admin), args.repeat),
+        ("get_exam_marks", lambda i: client.get(f"/exams/{exam_id}/marks", headers=teacher), args.repeat),
+        ("get_admin_combined_marks", lambda i: client.get("/exams/admin/combined-marks", headers=admin, params={
+            "subject_code": code, "subject_name": name, "exam_type": exam_type,
+            "semester": semester, "academic_year": academic_year}), args.repeat),
+        ("export_single_exam_csv", lambda i: client.get(f"/exams/{exam_id}/export", headers=teacher), args.repeat),
+        ("export_merged_exam_csv", lambda i: client.post("/exams/export-merged", headers=admin, json={"exam_ids": group_ids}), args.repeat),
+        ("save_marks", lambda i: client.post(f"/exams/{exam_id}/marks", headers=teacher, json=save_payload(i)), args.repeat),
+    ]
+
+    results = []
+    for op_name, call, repeat in ops:
+        results.append(measure(op_name, call, repeat))
+        print(f"  {op_name}: done", flush=True)
+    print()
+    print_table(results)
+
+    if args.json_out:
+        with open(args.json_out, "w") as fh:
+            json.dump({"scale": scale, "dialect": engine.dialect.name, "results": results}, fh, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("\nNo regressions against", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# backend/benchmarks/cold_start.py
+"""
+Cold-start benchmark.
+
+Measures, in fresh interpreters, how long ``import app.main`` takes and how
+long a new uvicorn process needs to answer its first request, and checks
+that the modules we load lazily (passlib/argon2, jose's JWT backends,
+resend) are not pulled in at startup.
+
+    cd backend
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --budget-ms 1500    # exit 1 when over budget
+    python -m benchmarks.cold_start --profile 25        # slowest imports (-X importtime)
+
+The database is a temporary SQLite file migrated up front, and the app runs
+with DB_AUTO_CREATE=false like a deployment would.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import requests
+
+from benchmarks.bench_hotpaths import percentile
+
+# must stay out of sys.modules after `import app.main`
+LAZY_MODULES = ("passlib.context", "argon2", "jose.jwt", "resend")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"import_ms": elapsed * 1000, "eager": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure_import(env) -> Dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure_first_response(env, port: int) -> float:
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning"]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env)
+    try:
+        while True:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                    return (time.perf_counter() - started) * 1000
+            except requests.RequestException:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            if time.perf_counter() - started > 60:
+                raise RuntimeError("uvicorn did not answer within 60s")
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def import_profile(env, top: int) -> List[str]:
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=env,
+                         check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        if self_us.isdigit():
+            rows.append((int(cumulative), int(self_us), name))
+    rows.sort(reverse=True)
+    return [f"{cum / 1000:>9.1f}{own / 1000:>9.1f}  {name}" for cum, own, name in rows[:top]]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--budget-ms", type=float, help="fail when p50 time-to-first-response exceeds this")
+    parser.add_argument("--profile", type=int, metavar="N", help="also print the N slowest imports")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="gradeflow-cold-"), "cold.db")
+    env.setdefault("SECRET_KEY", "benchmark-secret-key")
+    env["DB_AUTO_CREATE"] = "false"
+    env["PYTHONDONTWRITEBYTECODE"] = "0"
+    subprocess.run([sys.executable, "-m", "app.migrate"], env=env, check=True, capture_output=True)
+
+    # first run warms the bytecode cache, like a built image would have it
+    measure_import(env)
+    imports, eager = [], set()
+    for _ in range(args.repeat):
+        result = measure_import(env)
+        imports.append(result["import_ms"])
+        eager.update(result["eager"])
+    first = [measure_first_response(env, args.port) for _ in range(args.repeat)]
+
+    print(f"{'':<26}{'p50 ms':>10}{'max ms':>10}")
+    print(f"{'import app.main':<26}{percentile(imports, 0.5):>10.1f}{max(imports):>10.1f}")
+    print(f"{'time to first response':<26}{percentile(first, 0.5):>10.1f}{max(first):>10.1f}")
+
+    if args.profile:
+        print(f"\n{'cum ms':>9}{'self ms':>9}  module")
+        for line in import_profile(env, args.profile):
+            print(line)
+
+    failed = False
+    if eager:
+        print(f"\nImported at startup but expected to be lazy: {', '.join(sorted(eager))}")
+        failed = True
+    if args.budget_ms and percentile(first, 0.5) > args.budget_ms:
+        print(f"\nTime to first response over budget ({args.budget_ms:.0f} ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
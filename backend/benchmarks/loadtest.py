@@ -0,0 +1,266 @@
+# backend/benchmarks/loadtest.py
+"""
+Exam-week load test.
+
+Replays scripted sessions against a running server over HTTP:
+
+* teachers log in, open /exams, load their sheet, autosave it every few
+  seconds and finally finalize it
+* admins log in, list exams, pull combined marks and download exports
+
+and reports throughput and tail latency per endpoint.
+
+    cd backend
+    # seed a temp SQLite DB and start uvicorn with 4 workers for the run
+    python -m benchmarks.loadtest --teachers 40 --admins 4 --duration 60 --workers 4
+
+    # or hit a server you started yourself on a DB seeded with benchmarks.seed
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --no-seed
+
+Worker count and pool settings are passed to the spawned server through
+--workers / --pool-size / --max-overflow (DB_POOL_SIZE / DB_MAX_OVERFLOW).
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmarks.bench_hotpaths import percentile
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def call(self, session: requests.Session, label: str, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            resp = session.request(method, url, timeout=60, **kwargs)
+        except requests.RequestException:
+            resp = None
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies[label].append(elapsed)
+            if resp is None or resp.status_code >= 400:
+                self.errors[label] += 1
+        return resp
+
+
+class Scenario:
+    def __init__(self, args, data, recorder: Recorder, stop: threading.Event):
+        self.args = args
+        self.data = data
+        self.rec = recorder
+        self.stop = stop
+        self.base = args.base_url.rstrip("/")
+
+    def _login(self, session, email) -> bool:
+        from benchmarks.seed import BENCH_PASSWORD
+
+        resp = self.rec.call(session, "POST /auth/login", "POST", f"{self.base}/auth/login",
+                             json={"email": email, "password": BENCH_PASSWORD})
+        if resp is None or resp.status_code != 200:
+            return False
+        session.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+        return True
+
+    def _sleep(self, seconds):
+        # jitter so virtual users do not move in lockstep
+        self.stop.wait(seconds * random.uniform(0.7, 1.3))
+
+    def teacher(self, vu: int):
+        data = self.data
+        email = data.teacher_emails[vu % len(data.teacher_emails)]
+        owned = [e for e in data.exam_ids if data.exam_owner[e] == email]
+        exam_id = owned[(vu // len(data.teacher_emails)) % len(owned)]
+        roll_start, roll_end = data.roll_range[exam_id]
+        key = next(k for k, ids in data.groups.items() if exam_id in ids)
+        session = requests.Session()
+
+        while not self.stop.is_set():
+            if not self._login(session, email):
+                self._sleep(1)
+                continue
+            self.rec.call(session, "GET /exams", "GET", f"{self.base}/exams")
+            self.rec.call(session, "GET /exams/{id}/marks", "GET", f"{self.base}/exams/{exam_id}/marks")
+
+            for n in range(self.args.autosaves):
+                if self.stop.is_set():
+                    return
+                self._sleep(self.args.autosave_interval)
+                payload = {
+                    "section_id": data.section_id[exam_id],
+                    "subject_code": key[0], "subject_name": key[1],
+                    "exam_type": key[2], "semester": key[3],
+                    "questions": [{"label": lbl, "max_marks": 10} for lbl in data.question_labels],
+                    "students": [
+                        {"roll_no": roll, "absent": False,
+                         "marks": {lbl: float((roll + i + n) % 11) for i, lbl in enumerate(data.question_labels)}}
+                        for roll in range(roll_start, roll_end + 1)
+                    ],
+                }
+                self.rec.call(session, "POST /exams/{id}/marks", "POST", f"{self.base}/exams/{exam_id}/marks", json=payload)
+
+            self.rec.call(session, "POST /exams/{id}/finalize", "POST", f"{self.base}/exams/{exam_id}/finalize")
+            self._sleep(self.args.think_time)
+
+    def admin(self, vu: int):
+        data = self.data
+        session = requests.Session()
+        groups = list(data.groups.items())
+
+        while not self.stop.is_set():
+            if not self._login(session, data.admin_email):
+                self._sleep(1)
+                continue
+            for _ in range(5):
+                if self.stop.is_set():
+                    return
+                (code, name, exam_type, semester, year), ids = random.choice(groups)
+                self.rec.call(session, "GET /exams", "GET", f"{self.base}/exams")
+                self.rec.call(session, "GET /exams/admin/combined-marks", "GET", f"{self.base}/exams/admin/combined-marks",
+                              params={"subject_code": code, "subject_name": name, "exam_type": exam_type,
+                                      "semester": semester, "academic_year": year})
+                self.rec.call(session, "POST /exams/export-merged", "POST", f"{self.base}/exams/export-merged",
+                              json={"exam_ids": ids})
+                self.rec.call(session, "GET /exams/{id}/export", "GET", f"{self.base}/exams/{ids[0]}/export")
+                self._sleep(self.args.think_time)
+
+
+def start_server(args, env) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+           "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{args.base_url}/", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not become ready in 60s")
+
+
+def report(rec: Recorder, duration: float) -> None:
+    header = f"{'endpoint':<34}{'count':>8}{'req/s':>9}{'err':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    total = 0
+    for label in sorted(rec.latencies):
+        values = rec.latencies[label]
+        total += len(values)
+        print(
+            f"{label:<34}{len(values):>8}{len(values) / duration:>9.1f}{rec.errors[label]:>6}"
+            f"{percentile(values, 0.50):>9.1f}{percentile(values, 0.95):>9.1f}"
+            f"{percentile(values, 0.99):>9.1f}{max(values):>9.1f}"
+        )
+    print("-" * len(header))
+    print(f"{'total':<34}{total:>8}{total / duration:>9.1f}{sum(rec.errors.values()):>6}   (latencies in ms)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="server to test; omit to start one locally")
+    parser.add_argument("--database-url", help="DB for the spawned server (default: temp SQLite file)")
+    parser.add_argument("--reset", action="store_true", help="allow seeding (dropping tables) on a non-SQLite DB")
+    parser.add_argument("--no-seed", action="store_true", help="reuse data already seeded with the same scale")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    parser.add_argument("--pool-size", type=int, help="DB_POOL_SIZE for the spawned server")
+    parser.add_argument("--max-overflow", type=int, help="DB_MAX_OVERFLOW for the spawned server")
+    parser.add_argument("--teachers", type=int, default=20, help="concurrent teacher sessions")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent admin sessions")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds to start all sessions")
+    parser.add_argument("--autosaves", type=int, default=5, help="autosaves per teacher session before finalize")
+    parser.add_argument("--autosave-interval", type=float, default=3.0)
+    parser.add_argument("--think-time", type=float, default=2.0)
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--students", type=int, default=120, help="students per exam (one division)")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--teachers-per-subject", type=int, default=4, help="also the number of teacher accounts")
+    args = parser.parse_args(argv)
+
+    from benchmarks.seed import seed
+
+    spawn = not args.base_url
+    if spawn:
+        url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="gradeflow-load-"), "load.db")
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    else:
+        url = args.database_url or os.getenv("DATABASE_URL")
+    if not url:
+        print("--database-url (or DATABASE_URL) is needed to seed or describe the target data", file=sys.stderr)
+        return 2
+    if not args.no_seed and not url.startswith("sqlite") and not args.reset:
+        print("Refusing to drop tables on a non-SQLite database without --reset", file=sys.stderr)
+        return 2
+
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    # --no-seed still computes the layout (ids, owners, roll ranges) without touching the DB
+    data = seed(engine, exams=args.exams, students=args.students, questions=args.questions,
+                teachers_per_subject=args.teachers_per_subject, dry_run=args.no_seed)
+    engine.dispose()
+
+    server = None
+    if spawn:
+        env = dict(os.environ)
+        # every virtual user logs in from 127.0.0.1
+        env.setdefault("RATE_LIMIT_ENABLED", "false")
+        if args.pool_size is not None:
+            env["DB_POOL_SIZE"] = str(args.pool_size)
+        if args.max_overflow is not None:
+            env["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+        server = start_server(args, env)
+
+    rec = Recorder()
+    stop = threading.Event()
+    scenario = Scenario(args, data, rec, stop)
+    users = [(scenario.teacher, i) for i in range(args.teachers)] + [(scenario.admin, i) for i in range(args.admins)]
+    random.shuffle(users)
+
+    print(f"Running {args.teachers} teachers + {args.admins} admins for {args.duration:.0f}s against {args.base_url}")
+    threads = []
+    started = time.perf_counter()
+    try:
+        for n, (fn, vu) in enumerate(users):
+            t = threading.Thread(target=fn, args=(vu,), daemon=True)
+            t.start()
+            threads.append(t)
+            if args.ramp_up and n < len(users) - 1:
+                time.sleep(args.ramp_up / len(users))
+        stop.wait(max(0.0, args.duration - (time.perf_counter() - started)))
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=60)
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print()
+    report(rec, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# backend/benchmarks/seed.py
+"""
+Synthetic data for benchmarks and load tests.
+
+Exams come in groups of ``teachers_per_subject`` that share one logical exam
+(subject_code, subject_name, exam_type, semester, academic_year), each owned
+by a different teacher with a disjoint roll range, like a subject split
+across divisions.
+"""
+import random
+import string
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+BENCH_PASSWORD = "benchpass"
+ACADEMIC_YEAR = "2025-2026"
+SUBS_PER_MAIN = 3
+CHUNK = 20_000
+
+
+@dataclass
+class SeedResult:
+    admin_email: str
+    teacher_emails: List[str]
+    exam_ids: List[int]
+    exam_owner: Dict[int, str] = field(default_factory=dict)
+    # logical exam key -> member exam ids
+    groups: Dict[tuple, List[int]] = field(default_factory=dict)
+    question_labels: List[str] = field(default_factory=list)
+    roll_range: Dict[int, tuple] = field(default_factory=dict)
+    section_id: Dict[int, int] = field(default_factory=dict)
+
+
+def question_labels(count: int) -> List[str]:
+    # Q1.a, Q1.b, Q1.c, Q2.a, ... so exports exercise sub-question grouping
+    labels = []
+    main = 1
+    while len(labels) < count:
+        for sub in string.ascii_lowercase[:SUBS_PER_MAIN]:
+            if len(labels) == count:
+                break
+            labels.append(f"Q{main}.{sub}")
+        main += 1
+    return labels
+
+
+def seed(
+    engine,
+    *,
+    exams: int = 10,
+    students: int = 500,
+    questions: int = 20,
+    teachers_per_subject: int = 2,
+    blank_ratio: float = 0.05,
+    absent_ratio: float = 0.02,
+    seed_value: int = 42,
+    dry_run: bool = False,
+) -> SeedResult:
+    """Drop and recreate all tables on ``engine`` and fill them.
+
+    With ``dry_run`` only the layout (ids, owners, roll ranges) is computed,
+    for clients of a database seeded earlier with the same arguments.
+    """
+    from app.core.security import hash_password
+    from app.database import Base
+    from app.models import Exam, ExamSection, Mark, Programme, Question, Student, SubjectCatalog, User
+
+    rng = random.Random(seed_value)
+    teacher_count = max(1, teachers_per_subject)
+    labels = question_labels(questions)
+    mains = sorted({lbl.split(".", 1)[0] for lbl in labels}, key=lambda m: int(m[1:]))
+    rules = {m: {"minToCount": 2, "outOf": 10} for m in mains}
+
+    result = SeedResult(
+        admin_email="admin@bench.local",
+        teacher_emails=[f"teacher{i}@bench.local" for i in range(1, teacher_count + 1)],
+        exam_ids=list(range(1, exams + 1)),
+        question_labels=labels,
+    )
+
+    exam_rows, section_rows, question_rows = [], [], []
+    subjects = set()
+    question_id = 0
+    for exam_id in result.exam_ids:
+        subject_no = (exam_id - 1) // teacher_count
+        teacher_no = (exam_id - 1) % teacher_count
+        teacher_id = teacher_no + 2
+        code = f"BENCH.{subject_no + 1:03d}"
+        name = f"Benchmark Subject {subject_no + 1}"
+        subjects.add((code, name))
+        exam_rows.append({
+            "id": exam_id, "programme": "M.Sc. (Benchmark)", "subject_code": code,
+            "subject_name": name, "exam_type": "Internal", "semester": 1,
+            "academic_year": ACADEMIC_YEAR, "created_by": teacher_id, "is_locked": False,
+            "question_rules": rules,
+        })
+        key = (code, name, "Internal", 1, ACADEMIC_YEAR)
+        result.groups.setdefault(key, []).append(exam_id)
+        result.exam_owner[exam_id] = result.teacher_emails[teacher_no]
+
+        roll_start = teacher_no * students + 1
+        result.roll_range[exam_id] = (roll_start, roll_start + students - 1)
+        result.section_id[exam_id] = exam_id
+        section_rows.append({
+            "id": exam_id, "exam_id": exam_id, "teacher_id": teacher_id,
+            "section_name": f"Div {teacher_no + 1}", "roll_start": roll_start,
+            "roll_end": roll_start + students - 1, "is_locked": False,
+        })
+        for order, label in enumerate(labels):
+            question_id += 1
+            question_rows.append({
+                "id": question_id, "exam_id": exam_id, "label": label,
+                "max_marks": 10, "order": order,
+            })
+
+    if dry_run:
+        return result
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    hashed = hash_password(BENCH_PASSWORD)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 1, "name": "Bench Admin", "email": result.admin_email, "hashed_password": hashed,
+             "role": "admin", "is_frozen": False, "is_deleted": False},
+        ] + [
+            {"id": i + 1, "name": f"Teacher {i}", "email": email, "hashed_password": hashed,
+             "role": "teacher", "is_frozen": False, "is_deleted": False}
+            for i, email in enumerate(result.teacher_emails, start=1)
+        ])
+        conn.execute(insert(Programme), [
+            {"id": 1, "name": "M.Sc. (Benchmark)", "programme_code": "MSC_BENCH",
+             "total_semesters": 4, "semester_start": 1},
+        ])
+
+        conn.execute(insert(SubjectCatalog), [
+            {"programme": "M.Sc. (Benchmark)", "semester": 1, "subject_code": code,
+             "subject_name": name, "is_active": True}
+            for code, name in sorted(subjects)
+        ])
+        conn.execute(insert(Exam), exam_rows)
+        conn.execute(insert(ExamSection), section_rows)
+        conn.execute(insert(Question), question_rows)
+
+        student_id = 0
+        student_rows, mark_rows = [], []
+
+        def flush():
+            # students first: marks reference them
+            if student_rows:
+                conn.execute(insert(Student), student_rows)
+                student_rows.clear()
+            if mark_rows:
+                conn.execute(insert(Mark), mark_rows)
+                mark_rows.clear()
+
+        for exam_id in result.exam_ids:
+            first_q = (exam_id - 1) * len(labels) + 1
+            roll_start, roll_end = result.roll_range[exam_id]
+            for roll in range(roll_start, roll_end + 1):
+                student_id += 1
+                absent = rng.random() < absent_ratio
+                student_rows.append({
+                    "id": student_id, "exam_id": exam_id, "roll_no": roll, "absent": absent,
+                    "academic_year": ACADEMIC_YEAR,
+                })
+                for offset in range(len(labels)):
+                    value = None if absent or rng.random() < blank_ratio else float(rng.randint(0, 10))
+                    mark_rows.append({
+                        "exam_id": exam_id, "student_id": student_id,
+                        "question_id": first_q + offset, "marks": value,
+                        "section_id": result.section_id[exam_id], "academic_year": ACADEMIC_YEAR,
+                    })
+                if len(mark_rows) >= CHUNK:
+                    flush()
+        flush()
+
+    # Postgres sequences do not move when ids are inserted explicitly
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for table in ("users", "programmes", "exams", "exam_sections", "questions", "students", "marks", "subjects_catalog"):
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                )
+
+    return result
@@ -0,0 +1,42 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures. Run from backend/:
+
+    python -m pytest -q                                  # throwaway SQLite file
+    TEST_DATABASE_URL=postgresql://... python -m pytest -q   # a database the tests may wipe
+
+The database is dropped, recreated and seeded with benchmarks.seed, so
+never point TEST_DATABASE_URL at anything holding real data.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# before anything imports app.database, which builds its engine on import
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or (
+    f"sqlite:///{tempfile.mkdtemp(prefix='gradeflow-tests-')}/test.db"
+)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["DB_AUTO_CREATE"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.database import engine
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def seeded(engine):
+    """A small but complete data set: users, subjects, exams, sections, students and marks."""
+    from benchmarks.seed import seed
+
+    return seed(engine, exams=6, students=120, questions=6, seed_value=7)
@@ -0,0 +1,39 @@
+# backend/tests/test_cache.py
+"""Shared cache storage (app/core/cache.py): values are kept as JSON."""
+import pickle
+
+import pytest
+
+from app.core.cache import Cache, SQLiteBackend
+from app.utils.layout import QuestionLayout
+from app.utils.sections import SectionIndex, SectionSpan
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+
+
+def test_layout_and_sections_round_trip(backend):
+    cache = Cache(backend)
+    layout = QuestionLayout.build([(1, "Q1.a", 5), (2, "Q1.b", 5), (3, "Q2", 10)])
+    cache.set("t", "layout", layout.state())
+    loaded = QuestionLayout(*cache.get("t", "layout"))
+    assert loaded.grid_questions() == layout.grid_questions()
+    assert loaded.subs_by_main == {"Q1": ["Q1.a", "Q1.b"], "Q2": ["Q2"]}
+
+    cache.set("t", "sections", [tuple(SectionSpan(7, 1, 10, "A", None))])
+    index = SectionIndex(SectionSpan(*item) for item in cache.get("t", "sections"))
+    assert index.find(5).id == 7
+
+
+def test_pickled_entries_are_never_loaded(backend):
+    class Boom:
+        def __reduce__(self):
+            return (pytest.fail, ("unpickled a cache entry",))
+
+    backend._conn().execute(
+        "INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, NULL)", ("k", pickle.dumps(Boom())),
+    )
+    assert backend.get("k") is None
+    assert backend.incr("k") == 1
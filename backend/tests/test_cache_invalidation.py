@@ -0,0 +1,69 @@
+# backend/tests/test_cache_invalidation.py
+"""
+Cached section indexes and question layouts against a racing write.
+
+A reader loads the rows while a writer's change is still uncommitted; the
+writer commits (and invalidates) before the reader stores what it loaded.
+The stale value must not be served afterwards.
+"""
+import pytest
+
+from app.core.cache import get_cache
+from app.database import SessionLocal
+from app.models.exam import ExamSection, Question
+from app.utils.layout import exam_layout, invalidate_layouts
+from app.utils.sections import invalidate_sections, section_index
+
+
+@pytest.fixture
+def race(monkeypatch):
+    """Commit ``writer`` (then run ``after``) just before the reader's first cache store."""
+    cache = get_cache()
+    set_at = cache.set_at
+
+    def arm(writer, after):
+        state = {"armed": True}
+
+        def racing_set_at(slot, value, ttl=None):
+            if state.pop("armed", False):
+                writer.commit()
+                after()
+            set_at(slot, value, ttl)
+
+        monkeypatch.setattr(cache, "set_at", racing_set_at)
+
+    return arm
+
+
+def test_layout_loaded_before_a_save_commits_is_not_served(seeded, race):
+    exam_id = seeded.exam_ids[1]
+    writer, reader = SessionLocal(), SessionLocal()
+    try:
+        writer.add(Question(exam_id=exam_id, label="Q99.race", max_marks=1))
+        writer.flush()
+        invalidate_layouts(exam_id)
+        race(writer, lambda: invalidate_layouts(exam_id))
+
+        stale = exam_layout(reader, exam_id)
+        assert "Q99.race" not in stale.labels
+        assert "Q99.race" in exam_layout(reader, exam_id).labels
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_section_index_loaded_before_a_create_commits_is_not_served(seeded, race):
+    exam_id = seeded.exam_ids[1]
+    writer, reader = SessionLocal(), SessionLocal()
+    try:
+        writer.add(ExamSection(exam_id=exam_id, section_name="Race", roll_start=90000, roll_end=90010))
+        writer.flush()
+        invalidate_sections(exam_id)
+        race(writer, lambda: invalidate_sections(exam_id))
+
+        assert section_index(reader, exam_id).find(90005) is None
+        # the stale index would let an overlapping section through
+        assert section_index(reader, exam_id).overlapping(90008, 90020) is not None
+    finally:
+        writer.close()
+        reader.close()
@@ -0,0 +1,19 @@
+# backend/tests/test_layout.py
+"""Question layouts (app/utils/layout.py): ordering and grouping of question columns."""
+from app.utils.layout import QuestionLayout
+
+
+def test_merged_layout_is_in_natural_order():
+    layout = QuestionLayout.from_labels(["Q10.a", "Q2.b", "Q1.10", "Q2.a", "Q1.2", "Q10.a", "q3"], merged=True)
+    assert layout.labels == ["Q1.2", "Q1.10", "Q2.a", "Q2.b", "q3", "Q10.a"]
+    assert layout.main_order == ["Q1", "Q2", "q3", "Q10"]
+    assert layout.subs_by_main["Q1"] == ["Q1.2", "Q1.10"]
+
+
+def test_single_layout_keeps_creation_order():
+    rows = [(1, "Q2.a", 5.0), (2, "Q10", 10.0), (3, "Q1", 2.0), (4, "Q2.b", 5.0)]
+    layout = QuestionLayout.build(rows)
+    assert layout.labels == ["Q2.a", "Q10", "Q1", "Q2.b"]
+    assert layout.main_order == ["Q2", "Q10", "Q1"]
+    assert layout.subs_by_main["Q2"] == ["Q2.a", "Q2.b"]
+    assert layout.grid_questions()[1] == {"id": 2, "label": "Q10", "max_marks": 10.0}
@@ -0,0 +1,31 @@
+# backend/tests/test_live.py
+"""Live marks events (GET /exams/{id}/events): what a section teacher receives."""
+from app.api.routes.exams import _slice_event
+
+
+def _marks_event(**changes):
+    event = {
+        "type": "marks", "exam_id": 1, "user_id": 2, "section_id": None, "counts": {},
+        "resync": False, "cells": [[5, "Q1", 2.0], [25, "Q1", 1.0]], "absent": [[26, True]],
+    }
+    event.update(changes)
+    return event
+
+
+def test_cells_outside_the_teachers_sections_are_dropped():
+    event = _slice_event(_marks_event(), [(1, 10), (40, 50)])
+    assert event["cells"] == [[5, "Q1", 2.0]]
+    assert event["absent"] == []
+
+
+def test_event_about_other_sections_only_is_not_sent():
+    assert _slice_event(_marks_event(), [(100, 120)]) is None
+    # a resync still reaches everyone: it only asks the page to refetch its slice
+    assert _slice_event(_marks_event(resync=True, cells=None), [(100, 120)])["cells"] is None
+
+
+def test_unrestricted_readers_and_other_events_pass_through():
+    event = _marks_event()
+    assert _slice_event(event, []) is event
+    finalize = {"type": "finalize", "exam_ids": [1]}
+    assert _slice_event(finalize, [(1, 10)]) is finalize
@@ -0,0 +1,43 @@
+# backend/tests/test_metrics.py
+"""Request instrumentation (app/core/metrics.py) and the /metrics endpoint."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.fixture(scope="module")
+def client(seeded):
+    from app.main import app
+
+    return TestClient(app)
+
+
+def test_failed_statement_leaves_no_timing_behind(engine):
+    from app.core.metrics import RequestStats, _current_stats
+
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert "query_start_time" not in conn.info
+    finally:
+        _current_stats.reset(token)
+    assert stats.queries == 1
+    assert 0 <= stats.db_time < 1
+
+
+def test_metrics_are_closed_without_a_token(client, monkeypatch):
+    monkeypatch.setattr("app.main.METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 401
+
+    monkeypatch.setattr("app.main.METRICS_TOKEN", "scrape")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape"}).status_code == 200
+
+    monkeypatch.setattr("app.main.METRICS_TOKEN", None)
+    monkeypatch.setattr("app.main.METRICS_PUBLIC", True)
+    assert client.get("/metrics").status_code == 200
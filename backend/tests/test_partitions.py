@@ -0,0 +1,34 @@
+# backend/tests/test_partitions.py
+"""Per-year names (partitions and archive files) stay distinct for every academic_year spelling."""
+from app.utils.archive import archive_path
+from app.utils.partitions import partition_name
+
+SPELLINGS = ["2023-2024", "2023/2024", "2023 2024", "2023_2024", "2023-2024A", "2023-2024a", " 2023-2024"]
+
+
+def test_partition_names_are_distinct():
+    names = {partition_name("marks", year) for year in SPELLINGS}
+    assert len(names) == len(SPELLINGS)
+    assert all(len(partition_name("students", year)) <= 63 for year in SPELLINGS + ["x" * 200])
+
+
+def test_canonical_year_keeps_its_partition_name():
+    assert partition_name("marks", "2023-2024") == "marks_y2023_2024"
+
+
+def test_archive_paths_are_distinct():
+    # lower(): a case-insensitive disk must not merge two years either
+    paths = {archive_path(year, "archives").lower() for year in SPELLINGS}
+    assert len(paths) == len(SPELLINGS)
+    assert archive_path("2023-2024", "archives").endswith("2023-2024.gfa")
+
+
+def test_exams_filter_prunes_each_year(monkeypatch):
+    from app.models.exam import Mark
+    from app.utils.partitions import exams_filter
+
+    monkeypatch.setattr("app.utils.partitions.DB_PARTITION_BY_YEAR", True)
+    clause = exams_filter(Mark, {1: "2023-2024", 2: "2023-2024", 3: "2024-2025"})
+    sql = str(clause.compile(compile_kwargs={"literal_binds": True}))
+    assert sql.count("marks.academic_year") == 2
+    assert "'2023-2024'" in sql and "'2024-2025'" in sql
@@ -0,0 +1,75 @@
+# backend/tests/test_progress.py
+"""Progress counters (app/utils/progress.py): deltas applied by save_marks match a full recount."""
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.seed import BENCH_PASSWORD
+
+from app.models.exam import ExamProgress
+
+COUNTED = ("students", "absent", "marked", "cells_filled", "cells_blank")
+
+
+@pytest.fixture(scope="module")
+def client(seeded):
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _counters(session, exam_id):
+    rows = session.query(ExamProgress).filter(ExamProgress.exam_id == exam_id)
+    return {row.section_id: tuple(getattr(row, name) for name in COUNTED) for row in rows}
+
+
+def _stored_and_recounted(exam_id):
+    from app.database import SessionLocal
+    from app.models.exam import Exam
+    from app.utils.progress import refresh_progress
+
+    db = SessionLocal()
+    try:
+        stored = _counters(db, exam_id)
+        refresh_progress(db, db.get(Exam, exam_id))
+        db.flush()
+        recounted = _counters(db, exam_id)
+        db.rollback()
+        return stored, recounted
+    finally:
+        db.close()
+
+
+def test_saves_keep_counters_equal_to_a_recount(client, seeded, monkeypatch):
+    import app.utils.progress as progress
+
+    recounts = []
+    recount = progress.refresh_progress
+    monkeypatch.setattr(progress, "refresh_progress", lambda *a, **kw: recounts.append(1) or recount(*a, **kw))
+
+    exam_id = seeded.exam_ids[-1]
+    res = client.post("/auth/login", json={"email": seeded.exam_owner[exam_id], "password": BENCH_PASSWORD})
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+    lo, hi = seeded.roll_range[exam_id]
+    labels = list(seeded.question_labels)
+    rng = random.Random(41)
+
+    for step in range(12):
+        if step in (3, 8):
+            labels.append(f"Q{90 + step}")  # new question column
+        students = []
+        for roll in rng.sample(range(lo, hi + 6), 8):  # some rolls are new students
+            marks = {lbl: rng.choice([None, 0, 1, 2.5]) for lbl in rng.sample(labels, rng.randint(0, len(labels)))}
+            students.append({"roll_no": roll, "absent": rng.random() < 0.15, "marks": marks})
+        body = {
+            "subject_code": "x", "subject_name": "x", "exam_type": "x", "semester": 1,
+            "questions": [{"label": lbl, "max_marks": 5} for lbl in labels],
+            "students": students,
+        }
+        assert client.post(f"/exams/{exam_id}/marks", headers=headers, json=body).status_code == 200
+
+        stored, recounted = _stored_and_recounted(exam_id)
+        assert stored == recounted, f"step {step}"
+    # the seeded exam had no rows: only its first save recounted
+    assert len(recounts) == 1 + 12
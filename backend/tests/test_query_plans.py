@@ -0,0 +1,234 @@
+# backend/tests/test_query_plans.py
+"""
+Query plan guardrails for the hot queries of exams.py, subjects.py and auth.py.
+
+Each query is built the way its route builds it, explained against the
+seeded database (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on
+Postgres) and checked table by table: every table it reads must be reached
+through an index, and where a case names the index, through that one. A
+schema change that drops or renames an index the query depends on turns
+into a failing test instead of a full scan in production.
+
+Postgres plans small tables with sequential scans whatever the indexes, so
+sequential scans are switched off for the EXPLAIN: one still showing up
+means no usable index exists.
+"""
+import json
+import re
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import (
+    Exam,
+    ExamProgress,
+    ExamSection,
+    IdempotencyRecord,
+    Mark,
+    PasswordReset,
+    Programme,
+    Question,
+    RefreshSession,
+    ResultSnapshot,
+    Student,
+    SubjectCatalog,
+    User,
+)
+
+
+class Access(NamedTuple):
+    table: str
+    indexed: bool
+    index: Optional[str]  # None for a primary key lookup by rowid
+
+
+def _base_table(name: str) -> str:
+    # partitions of marks / students (app/utils/partitions.py) count as the table
+    return re.sub(r"_y[0-9A-Za-z_]*$", "", name) if name.startswith(("marks_", "students_")) else name
+
+
+def _sqlite_accesses(conn, sql: str) -> List[Access]:
+    accesses = []
+    for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+        detail = row[-1]
+        match = re.match(r"(SCAN|SEARCH) (\w+)(?: AS \w+)?(.*)", detail)
+        if not match:
+            continue  # temp b-trees, subquery markers
+        how, table, rest = match.groups()
+        index = re.search(r"USING (?:COVERING )?INDEX (\w+)", rest)
+        # SCAN ... USING INDEX still walks the whole index
+        accesses.append(Access(_base_table(table), how == "SEARCH", index.group(1) if index else None))
+    return accesses
+
+
+def _postgres_accesses(conn, sql: str) -> List[Access]:
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    accesses = []
+
+    def walk(node: dict, parent_table: Optional[str] = None) -> None:
+        kind = node.get("Node Type", "")
+        table = node.get("Relation Name")
+        if kind == "Seq Scan":
+            accesses.append(Access(_base_table(table), False, None))
+        elif kind in ("Index Scan", "Index Only Scan"):
+            accesses.append(Access(_base_table(table), True, node.get("Index Name")))
+        elif kind == "Bitmap Heap Scan":
+            parent_table = table
+        elif kind == "Bitmap Index Scan":
+            accesses.append(Access(_base_table(parent_table or ""), True, node.get("Index Name")))
+        for child in node.get("Plans", []):
+            walk(child, parent_table)
+
+    walk(plan[0]["Plan"])
+    return accesses
+
+
+def explain(engine, stmt) -> List[Access]:
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            with conn.begin():
+                return _postgres_accesses(conn, sql)
+        return _sqlite_accesses(conn, sql)
+
+
+def _ids(seeded) -> Dict[str, object]:
+    exam_id = seeded.exam_ids[0]
+    lo, hi = seeded.roll_range[exam_id]
+    return {
+        "exam_id": exam_id,
+        "exam_ids": seeded.exam_ids[:3],
+        "rolls": list(range(lo, min(hi, lo + 20) + 1)),
+        "lo": lo,
+        "hi": hi,
+        "section_id": seeded.section_id[exam_id],
+        "email": seeded.admin_email,
+        "key": ("BENCH.001", "Benchmark Subject 1", "Internal", 1, "2025-2026"),
+    }
+
+
+# name -> (query builder, {table: required index, or None for "any index"})
+HOT_QUERIES = {
+    # --- exams.py ---
+    "marks of an exam": (
+        lambda v: select(Mark.id, Mark.marks).where(Mark.exam_id == v["exam_id"]),
+        {"marks": "ix_marks_exam_id"},
+    ),
+    "save_marks: students by roll": (
+        lambda v: select(Student).where(Student.exam_id == v["exam_id"], Student.roll_no.in_(v["rolls"])),
+        {"students": "ix_students_exam_roll"},
+    ),
+    "save_marks: marks of those students": (
+        lambda v: select(Mark).where(
+            Mark.exam_id == v["exam_id"], Mark.student_id.in_(select(Student.id).where(Student.exam_id == v["exam_id"]))
+        ),
+        {"marks": None, "students": "ix_students_exam_roll"},
+    ),
+    "marks grid": (
+        lambda v: select(Student.roll_no, Question.label, Mark.marks)
+        .join(Mark, Mark.student_id == Student.id)
+        .join(Question, Question.id == Mark.question_id)
+        .where(Student.exam_id == v["exam_id"]),
+        {"students": "ix_students_exam_roll", "marks": None, "questions": None},
+    ),
+    "section slice of students": (
+        lambda v: select(Student).where(Student.exam_id == v["exam_id"], Student.roll_no.between(v["lo"], v["hi"])),
+        {"students": "ix_students_exam_roll"},
+    ),
+    "questions of an exam": (
+        lambda v: select(Question).where(Question.exam_id == v["exam_id"]).order_by(Question.order),
+        {"questions": "ix_questions_exam_id"},
+    ),
+    "batch grids: questions": (
+        lambda v: select(Question).where(Question.exam_id.in_(v["exam_ids"])),
+        {"questions": "ix_questions_exam_id"},
+    ),
+    "sections of an exam": (
+        lambda v: select(ExamSection).where(ExamSection.exam_id == v["exam_id"]),
+        {"exam_sections": "ix_exam_sections_exam_id"},
+    ),
+    "logical exam siblings": (
+        lambda v: select(Exam.id).where(Exam.logical_filter(v["key"])),
+        {"exams": "ix_exams_logical_key"},
+    ),
+    "exams of an academic year": (
+        lambda v: select(Exam.id).where(Exam.academic_year == "2025-2026"),
+        {"exams": "ix_exams_academic_year"},
+    ),
+    "progress rows": (
+        lambda v: select(ExamProgress).where(ExamProgress.exam_id == v["exam_id"], ExamProgress.section_id.is_(None)),
+        {"exam_progress": "ix_exam_progress_exam_section"},
+    ),
+    "result snapshot": (
+        lambda v: select(ResultSnapshot.id).where(
+            ResultSnapshot.exam_id == v["exam_id"],
+            ResultSnapshot.scope == "single",
+            ResultSnapshot.locked_at == datetime(2026, 1, 1),
+        ),
+        {"result_snapshots": None},
+    ),
+    "idempotency key": (
+        lambda v: select(IdempotencyRecord).where(IdempotencyRecord.user_id == 1, IdempotencyRecord.key_hash == "x"),
+        {"idempotency_keys": None},
+    ),
+    # --- subjects.py ---
+    "subject catalog of a semester": (
+        lambda v: select(SubjectCatalog)
+        .where(SubjectCatalog.programme == "M.Sc. (Benchmark)", SubjectCatalog.semester == 1,
+               SubjectCatalog.is_active.is_(True))
+        .order_by(SubjectCatalog.subject_code),
+        {"subjects_catalog": None},
+    ),
+    "programme by code": (
+        lambda v: select(Programme).where(Programme.programme_code == "MSC"),
+        {"programmes": "ix_programmes_programme_code"},
+    ),
+    # --- auth.py ---
+    "user by email": (
+        lambda v: select(User).where(User.email == v["email"]),
+        {"users": "ix_users_email"},
+    ),
+    "user by id": (
+        lambda v: select(User).where(User.id == 1),
+        {"users": None},
+    ),
+    "password reset by token": (
+        lambda v: select(PasswordReset).where(PasswordReset.token == "x"),
+        {"password_resets": "ix_password_resets_token"},
+    ),
+    "password resets of a user": (
+        lambda v: select(func.count(PasswordReset.id)).where(PasswordReset.user_id == 1),
+        {"password_resets": "ix_password_resets_user_id"},
+    ),
+    "refresh session by token": (
+        lambda v: select(RefreshSession).where(RefreshSession.token_hash == "x"),
+        {"refresh_sessions": "ix_refresh_sessions_token_hash"},
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_indexes(engine, seeded, name):
+    build, expected = HOT_QUERIES[name]
+    accesses = explain(engine, build(_ids(seeded)))
+
+    scans = [a.table for a in accesses if not a.indexed]
+    assert not scans, f"{name}: full scan of {scans} ({accesses})"
+    for table, index in expected.items():
+        used = [a for a in accesses if a.table == table]
+        assert used, f"{name}: {table} not read at all ({accesses})"
+        if index is not None:
+            names = {a.index for a in used}
+            assert index in names, f"{name}: {table} read through {names}, expected {index}"
+
+
+def test_scan_is_detected(engine, seeded):
+    # the guard itself: an unindexed predicate must be reported as a scan
+    accesses = explain(engine, select(Mark.id).where(Mark.marks > 5))
+    assert any(a.table == "marks" and not a.indexed for a in accesses)
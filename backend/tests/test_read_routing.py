@@ -0,0 +1,38 @@
+# backend/tests/test_read_routing.py
+"""Read-your-writes routing (app/database.py): the window follows the user, not the token."""
+from starlette.requests import Request
+
+
+def _request(token=None) -> Request:
+    headers = [] if token is None else [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_every_token_of_a_user_shares_the_window(monkeypatch):
+    import app.database as database
+    from app.core.security import create_access_token
+
+    monkeypatch.setattr(database, "read_engine", object())  # a replica is configured
+    first = create_access_token({"sub": "7", "ep": 0})
+    second = create_access_token({"sub": "7", "ep": 0, "role": "teacher"})
+    assert database._client_key(_request(first)) == database._client_key(_request(second)) == "user:7"
+    assert database._client_key(_request(create_access_token({"sub": "8"}))) == "user:8"
+    assert database._client_key(_request("not-a-jwt")) is None
+    assert database._client_key(_request()) is None
+
+
+def test_saved_marks_route_the_users_other_tabs_to_the_primary(monkeypatch):
+    import app.database as database
+    from app.core.security import create_access_token
+
+    monkeypatch.setattr(database, "read_engine", object())
+    other_tab = _request(create_access_token({"sub": "9", "ep": 0, "tab": 2}))
+    assert not database._wrote_recently(other_tab)
+
+    session = database.SessionLocal()
+    try:
+        session.info["client_keys"] = {database._client_key(_request(create_access_token({"sub": "9", "ep": 0})))}
+        session.commit()
+    finally:
+        session.close()
+    assert database._wrote_recently(other_tab)
@@ -0,0 +1,103 @@
+# backend/tests/test_sessions.py
+"""Refresh-token rotation (app/core/sessions.py) through POST /auth/refresh."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.seed import BENCH_PASSWORD
+
+
+@pytest.fixture(scope="module")
+def client(seeded):
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _login(client, seeded) -> str:
+    res = client.post("/auth/login", json={"email": seeded.admin_email, "password": BENCH_PASSWORD})
+    assert res.status_code == 200
+    return res.json()["refresh_token"]
+
+
+def _refresh(client, token: str):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+def _legacy_token(user_id: int, **claims) -> str:
+    from app.core.security import ALGORITHM, SECRET_KEY, _jwt
+
+    payload = {"sub": str(user_id), "type": "refresh", "exp": datetime.now(timezone.utc) + timedelta(days=7)}
+    payload.update(claims)
+    return _jwt().encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _user_id(engine, email: str) -> int:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT id FROM users WHERE email = :e"), {"e": email}).scalar()
+
+
+def _admin_id(engine, seeded) -> int:
+    return _user_id(engine, seeded.admin_email)
+
+
+@pytest.fixture
+def teacher(engine, seeded):
+    """A teacher whose flags a test may change; restored afterwards."""
+    from sqlalchemy import text
+
+    user_id = _user_id(engine, seeded.exam_owner[seeded.exam_ids[0]])
+    yield user_id
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET is_frozen = 0, token_epoch = 0 WHERE id = :id"), {"id": user_id})
+
+
+def test_two_refreshes_with_one_token_both_succeed(client, seeded):
+    token = _login(client, seeded)
+    first, second = _refresh(client, token), _refresh(client, token)
+    assert first.status_code == 200 and second.status_code == 200
+    new_tokens = {first.json()["refresh_token"], second.json()["refresh_token"]}
+    assert len(new_tokens) == 2 and token not in new_tokens
+    # both successors are live sessions
+    assert all(_refresh(client, t).status_code == 200 for t in new_tokens)
+
+
+def test_reuse_after_grace_revokes_sessions(client, seeded, monkeypatch):
+    token = _login(client, seeded)
+    successor = _refresh(client, token).json()["refresh_token"]
+
+    monkeypatch.setattr("app.core.sessions.REFRESH_REUSE_GRACE", -1)
+    assert _refresh(client, token).status_code == 401
+    # the reuse revoked the whole family, successor included
+    assert _refresh(client, successor).status_code == 401
+
+
+def test_legacy_token_is_exchanged_once(client, engine, seeded, monkeypatch):
+    legacy = _legacy_token(_admin_id(engine, seeded), ep=0)
+    assert _refresh(client, legacy).status_code == 200
+
+    monkeypatch.setattr("app.core.sessions.REFRESH_REUSE_GRACE", -1)
+    assert _refresh(client, legacy).status_code == 401
+
+
+def test_legacy_token_without_epoch_is_exchanged_once(client, teacher, monkeypatch):
+    # refresh tokens issued before token epochs carry no "ep" claim
+    legacy = _legacy_token(teacher)
+    res = _refresh(client, legacy)
+    assert res.status_code == 200
+    assert _refresh(client, res.json()["refresh_token"]).status_code == 200
+
+    monkeypatch.setattr("app.core.sessions.REFRESH_REUSE_GRACE", -1)
+    assert _refresh(client, legacy).status_code == 401
+
+
+@pytest.mark.parametrize("column", ["is_frozen", "token_epoch"])
+def test_legacy_token_without_epoch_is_rejected_after_a_revocation(client, engine, teacher, column):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE users SET {column} = 1 WHERE id = :id"), {"id": teacher})
+    assert _refresh(client, _legacy_token(teacher)).status_code == 401
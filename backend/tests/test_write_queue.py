@@ -0,0 +1,96 @@
+# backend/tests/test_write_queue.py
+"""Write coalescing (app/core/write_queue.py): latency, flush order and failure isolation."""
+import threading
+import time
+
+import pytest
+
+from app.core.write_queue import WriteQueue
+
+
+def _submit_all(queue, items, flush, gap=0.005):
+    replies, threads = {}, []
+
+    def run(item):
+        try:
+            replies[item] = queue.submit("exam", item, flush)[0]
+        except Exception as exc:
+            replies[item] = exc
+
+    for item in items:
+        thread = threading.Thread(target=run, args=(item,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(gap)  # fixes the submission order
+    for thread in threads:
+        thread.join()
+    return replies
+
+
+def test_uncontended_save_flushes_at_once():
+    flushed = []
+
+    def flush(items, flush_id):
+        flushed.append(list(items))
+        return items
+
+    queue = WriteQueue(max_batch=10)
+    started = time.perf_counter()
+    assert [queue.submit("exam", i, flush)[0] for i in range(3)] == [0, 1, 2]
+    assert time.perf_counter() - started < 0.05
+    assert flushed == [[0], [1], [2]]
+
+
+def test_saves_during_a_flush_are_written_together():
+    flushed = []
+
+    def flush(items, flush_id):
+        time.sleep(0.1 if items[0] == 0 else 0)
+        flushed.append(list(items))
+        return items
+
+    replies = _submit_all(WriteQueue(max_batch=10), list(range(5)), flush)
+    assert flushed == [[0], [1, 2, 3, 4]]
+    assert replies == {i: i for i in range(5)}
+
+
+def test_overflowing_batches_flush_in_submission_order():
+    flushed = []
+
+    def flush(items, flush_id):
+        # the batches behind a slow flush all queue up for their turn
+        time.sleep(0.1 if items[0] == 0 else 0)
+        flushed.extend(items)
+        return items
+
+    queue = WriteQueue(max_batch=1)
+    replies = _submit_all(queue, list(range(12)), flush, gap=0.002)
+    assert flushed == list(range(12))
+    assert replies == {i: i for i in range(12)}
+    assert queue.pending("exam") == 0
+
+
+def test_failed_batch_only_fails_the_bad_item():
+    calls = []
+
+    def flush(items, flush_id):
+        # the first flush is slow, so the next three gather in one batch
+        time.sleep(0.1 if items[0] == "first" else 0)
+        calls.append(list(items))
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [f"saved {item}" for item in items]
+
+    queue = WriteQueue(max_batch=10)
+    replies = _submit_all(queue, ["first", "a", "bad", "c"], flush)
+    assert calls[1] == ["a", "bad", "c"]
+    assert replies["a"] == "saved a" and replies["c"] == "saved c"
+    assert isinstance(replies["bad"], ValueError)
+
+
+def test_single_item_error_is_raised():
+    def flush(items, flush_id):
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError):
+        WriteQueue(max_batch=10).submit("exam", 1, flush)
@@ -1,7 +1,7 @@
 // src/context/AuthContext.tsx
 import React from "react";
 import { type User, type TokenResponse } from "../services/authService";
-import { setAuthToken } from "../services/api";
+import { api, setAuthToken } from "../services/api";
 
 type AuthContextType = {
   user: User | null;
@@ -64,6 +64,12 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
   }
 
   function logout() {
+    const storedRefresh = localStorage.getItem("gf_refresh");
+    if (storedRefresh) {
+      // end the server-side session too; logging out locally must not wait on it
+      api.post("/auth/logout", { refresh_token: storedRefresh }).catch(() => {});
+    }
+
     setToken(null);
     setRefreshToken(null);
     setUser(null);
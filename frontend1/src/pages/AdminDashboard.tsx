@@ -10,7 +10,7 @@ import {
 import TeacherList from "./TeacherList";
 import { Link, useNavigate } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
-import { api } from "../services/api";
+import { api, setAuthToken } from "../services/api";
 import { addSubjectToCatalog } from "../services/subjectService";
 import {
   deleteCatalogSubject,
@@ -970,10 +970,13 @@ export default function AdminDashboard() {
 
                   try {
                     // call backend change-password endpoint
-                    await api.post("/auth/change-password", {
+                    const res = await api.post("/auth/change-password", {
                       current_password: currentPassword,
                       new_password: newPassword,
                     });
+                    // older tokens are revoked by the change; keep this session on the new pair
+                    setAuthToken(res.data.access_token);
+                    localStorage.setItem("gf_refresh", res.data.refresh_token);
                     setPwdChangeSuccess("Password updated successfully.");
                     // optionally close the modal after success (small delay)
                     setTimeout(() => {
@@ -11,6 +11,7 @@ import {
 } from "../services/examService";
 import { useAuth } from "../context/AuthContext";
 import { api } from "../services/api";
+import { subscribeExamEvents } from "../services/liveEvents";
 
 type Student = {
   id: number;
@@ -106,6 +107,8 @@ export default function MarksEntry() {
   const [mainQuestions, setMainQuestions] = React.useState<MainQuestion[]>([]);
   const [students, setStudents] = React.useState<Student[]>(initialStudents);
   const [marks, setMarks] = React.useState<MarksMap>({});
+  // bumped to refetch the grid when live updates cannot be applied in place
+  const [reloadTick, setReloadTick] = React.useState(0);
   const [error, setError] = React.useState<string | null>(null);
 
   // new main question builder state
@@ -293,7 +296,62 @@ export default function MarksEntry() {
     }
 
     loadMarks();
-  }, [exam, isAdminView]);
+  }, [exam, isAdminView, reloadTick]);
+
+  // live updates: cells saved by other teachers/admins, finalize / unfinalize
+  const examIdForEvents = exam?.id;
+  useEffect(() => {
+    if (!examIdForEvents) return;
+    const myId = user?.id == null ? null : Number(user.id);
+
+    return subscribeExamEvents(
+      examIdForEvents,
+      (ev) => {
+        if (ev.type === "resync") {
+          setReloadTick((t) => t + 1);
+          return;
+        }
+        if (ev.type === "marks") {
+          if (ev.user_id === myId) return; // our own save is already on screen
+          if (ev.resync || !ev.cells) {
+            setReloadTick((t) => t + 1);
+            return;
+          }
+          const cells = ev.cells;
+          if (cells.length) {
+            setMarks((prev) => {
+              const next = { ...prev };
+              cells.forEach(([roll, label, value]) => {
+                next[`${roll}-${label}`] = value ?? "";
+              });
+              return next;
+            });
+          }
+          if (ev.absent.length) {
+            const flags = new Map(ev.absent);
+            setStudents((prev) =>
+              prev.map((s) =>
+                flags.has(s.rollNo) ? { ...s, absent: flags.get(s.rollNo) } : s,
+              ),
+            );
+          }
+          return;
+        }
+        if (!ev.exam_ids.includes(examIdForEvents)) return;
+        const locked = ev.type === "finalize";
+        setExam((prev) =>
+          prev && prev.is_locked !== locked
+            ? ({
+                ...prev,
+                is_locked: locked,
+                locked_by: ev.type === "finalize" ? ev.locked_by : null,
+              } as ExamWithRules)
+            : prev,
+        );
+      },
+      { scope: isAdminView ? "logical" : "exam" },
+    );
+  }, [examIdForEvents, isAdminView, user?.id]);
 
   // helpers
   const normalizeRollValue = (v: string) => v.trim();
@@ -55,6 +55,17 @@ api.interceptors.response.use(
   async (error) => {
     const originalRequest = error.config;
 
+    // no response at all (flaky network): a write carrying an Idempotency-Key
+    // is safe to resend, the server answers a duplicate with its stored response
+    if (!error.response && originalRequest?.headers?.["Idempotency-Key"]) {
+      const attempt = (originalRequest._networkRetries ?? 0) + 1;
+      if (attempt <= 2) {
+        originalRequest._networkRetries = attempt;
+        await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+        return api(originalRequest);
+      }
+    }
+
     if (error.response?.status !== 401) {
       return Promise.reject(error);
     }
@@ -93,6 +104,10 @@ api.interceptors.response.use(
       const newAccess = res.data.access_token;
 
       setAuthToken(newAccess);
+      // refresh tokens are single-use: keep the rotated one
+      if (res.data.refresh_token) {
+        localStorage.setItem("gf_refresh", res.data.refresh_token);
+      }
       notify(newAccess);
 
       originalRequest.headers.Authorization = `Bearer ${newAccess}`;
@@ -62,6 +62,17 @@ export interface SaveMarksPayload {
   
 }
 
+// Saves to one exam that arrive close together are written in one flush;
+// counts cover everything merged with this save
+export interface SaveMarksResult {
+  detail: string;
+  created_questions: number;
+  created_students: number;
+  created_marks: number;
+  updated_marks: number;
+  flush: { id: number; requests: number; merged: number; saved_at: string };
+}
+
 export interface QuestionOut {
   id: number;
   label: string;
@@ -88,11 +99,75 @@ export interface ExamMarksOut {
   marks: MarkOut[];
 }
 
-export async function getExamMarks(examId: number) {
-  const res = await api.get<ExamMarksOut>(`/exams/${examId}/marks`);
+export interface ProgressCounts {
+  students: number;
+  absent: number;
+  marked: number;
+  pending: number;
+  cells_filled: number;
+  cells_blank: number;
+  last_saved_at: string | null;
+}
+
+export interface SectionProgressOut extends ProgressCounts {
+  section_id: number;
+  section_name: string | null;
+  teacher_id: number | null;
+  teacher_name: string | null;
+}
+
+export interface ExamProgressOut extends ProgressCounts {
+  exam_id: number;
+  programme: string;
+  subject_code: string;
+  subject_name: string;
+  exam_type: string;
+  semester: number;
+  academic_year: string;
+  is_locked: boolean;
+  created_by: number | null;
+  teacher_name: string | null;
+  sections: SectionProgressOut[];
+}
+
+// Admin only: marking progress of every exam (and section) in an academic year
+export async function getAdminProgress(academicYear: string) {
+  const res = await api.get<ExamProgressOut[]>("/exams/admin/progress", {
+    params: { academic_year: academicYear },
+  });
+  return res.data;
+}
+
+// Teachers get the roll range of their own section(s) unless sectionId picks one
+export async function getExamMarks(examId: number, sectionId?: number | null) {
+  const res = await api.get<ExamMarksOut>(`/exams/${examId}/marks`, {
+    params: sectionId ? { section_id: sectionId } : undefined,
+  });
   return res.data;
 }
 
+export interface MarksBatchGetOut {
+  exams: ExamMarksOut[];
+  missing: number[];
+  forbidden: number[];
+}
+
+// Grids of several exams in one request. Large batches come back as NDJSON
+// (a missing/forbidden line, then one line per exam); both are returned alike.
+export async function batchGetExamMarks(examIds: number[]): Promise<MarksBatchGetOut> {
+  const res = await api.post("/exams/marks:batchGet", { exam_ids: examIds }, {
+    responseType: "text",
+    transformResponse: (data) => data,
+  });
+  const contentType = String(res.headers["content-type"] ?? "");
+  if (!contentType.includes("ndjson")) return JSON.parse(res.data);
+
+  const [head, ...rest] = String(res.data).split("\n").filter(Boolean);
+  return {
+    ...(JSON.parse(head) as Omit<MarksBatchGetOut, "exams">),
+    exams: rest.map((line) => JSON.parse(line) as ExamMarksOut),
+  };
+}
 
 export async function getExams(params?: {
   subject_name?: string;
@@ -147,16 +222,46 @@ export async function downloadMergedExamCsv(
 }
 
 
+// Idempotency-Key per write: resending the same body (a retry after a network
+// error) reuses the key of the attempt that may already have been saved, so
+// the server replays its response instead of processing the sheet again.
+const pendingKeys = new Map<string, { body: string; key: string }>();
+
+function newKey(): string {
+  if (typeof crypto !== "undefined" && "randomUUID" in crypto) return crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+async function withIdempotencyKey<T>(
+  scope: string,
+  payload: unknown,
+  send: (headers: Record<string, string>) => Promise<T>,
+): Promise<T> {
+  const body = JSON.stringify(payload);
+  let entry = pendingKeys.get(scope);
+  if (!entry || entry.body !== body) {
+    entry = { body, key: newKey() };
+    pendingKeys.set(scope, entry);
+  }
+  const result = await send({ "Idempotency-Key": entry.key });
+  pendingKeys.delete(scope);
+  return result;
+}
+
 export async function createExam(
   payload: ExamCreatePayload
 ): Promise<ExamOut> {
-  const res = await api.post<ExamOut>("/exams", payload);
-  return res.data;
+  return withIdempotencyKey("create-exam", payload, async (headers) => {
+    const res = await api.post<ExamOut>("/exams", payload, { headers });
+    return res.data;
+  });
 }
 
 export async function saveExamMarks(examId: number, payload: SaveMarksPayload) {
-  const res = await api.post(`/exams/${examId}/marks`, payload);
-  return res.data;
+  return withIdempotencyKey(`marks-${examId}`, payload, async (headers) => {
+    const res = await api.post<SaveMarksResult>(`/exams/${examId}/marks`, payload, { headers });
+    return res.data;
+  });
 }
 
 
@@ -0,0 +1,109 @@
+// src/services/liveEvents.ts
+import { api } from "./api";
+
+export type LiveEvent =
+  | {
+      type: "marks";
+      exam_id: number;
+      user_id: number;
+      section_id: number | null;
+      counts: {
+        created_questions: number;
+        created_students: number;
+        created_marks: number;
+        updated_marks: number;
+      };
+      resync: boolean;
+      // [roll_no, question_label, marks]; null when the save was too large to send
+      cells: [number, string, number | null][] | null;
+      absent: [number, boolean][];
+      ts: number;
+    }
+  | {
+      type: "finalize";
+      exam_ids: number[];
+      scope: "single" | "global";
+      locked_by: number;
+      locked_by_name: string;
+      ts: number;
+    }
+  | { type: "unfinalize"; exam_ids: number[]; ts: number }
+  | { type: "resync"; reason: string };
+
+// Committed changes to an exam pushed by GET /exams/{id}/events (Server-Sent
+// Events). Uses fetch rather than EventSource so the bearer token travels in a
+// header instead of the URL. Reconnects on its own; after a reconnect a
+// "resync" event tells the caller to refetch what it may have missed.
+export function subscribeExamEvents(
+  examId: number,
+  onEvent: (event: LiveEvent) => void,
+  opts: { scope?: "exam" | "logical" } = {},
+): () => void {
+  const controller = new AbortController();
+  let stopped = false;
+  let connectedBefore = false;
+  let retryMs = 3000;
+
+  function handleBlock(block: string) {
+    const retry = block.match(/^retry: (\d+)/m);
+    if (retry) retryMs = Number(retry[1]);
+    const data = block
+      .split("\n")
+      .filter((line) => line.startsWith("data:"))
+      .map((line) => line.slice(5).trimStart())
+      .join("\n");
+    if (!data) return; // keep-alive comment
+    try {
+      onEvent(JSON.parse(data) as LiveEvent);
+    } catch (err) {
+      console.error("Bad live event", err);
+    }
+  }
+
+  async function run() {
+    while (!stopped) {
+      try {
+        const auth = api.defaults.headers.common["Authorization"];
+        const res = await fetch(
+          `${api.defaults.baseURL}/exams/${examId}/events?scope=${opts.scope ?? "exam"}`,
+          {
+            headers: {
+              Accept: "text/event-stream",
+              ...(auth ? { Authorization: String(auth) } : {}),
+            },
+            signal: controller.signal,
+          },
+        );
+        // not allowed, or live events disabled on the server: nothing to push
+        if (res.status === 403 || res.status === 404) return;
+        if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+        if (connectedBefore) onEvent({ type: "resync", reason: "reconnect" });
+        connectedBefore = true;
+
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let sep;
+          while ((sep = buffer.indexOf("\n\n")) >= 0) {
+            handleBlock(buffer.slice(0, sep));
+            buffer = buffer.slice(sep + 2);
+          }
+        }
+      } catch (err) {
+        if (stopped) return;
+      }
+      // stream ended (server restart, resync, network): try again shortly
+      await new Promise((resolve) => setTimeout(resolve, retryMs));
+    }
+  }
+
+  run();
+  return () => {
+    stopped = true;
+    controller.abort();
+  };
+}